@@ -16,6 +16,9 @@ __all__ = [
     "ProgressBar",
     "StaticBitmap",
     "Slider",
+    "LightWidget",
+    "LightLabel",
+    "LightButton",
 
     # Style
     "Style",
@@ -40,6 +43,10 @@ __all__ = [
     "GradientColor",
     "GradientPen",
     "GradientBrush",
+    "VirtualListBox",
+    "TreeView",
+    "DataGrid",
+    "LogView",
 
     # Animation,
     "Animation",
@@ -50,6 +57,15 @@ __all__ = [
     "ButtonEvent",
     "EVT_TEXT",
     "TextEvent",
+    "EVT_SCALE_CHANGED",
+    "ScaleChangedEvent",
+    "EVT_LISTBOX",
+    "ListBoxEvent",
+    "EVT_TREE_ITEM_EXPANDED",
+    "EVT_TREE_ITEM_COLLAPSED",
+    "TreeEvent",
+    "EVT_GRID_SELECT_CELL",
+    "GridEvent",
 
     # Other
     "ft",
@@ -57,3 +73,11 @@ __all__ = [
     "GCRender",
     "CustomGraphicsContext"
 ]
+
+
+def __getattr__(name: str):
+    # EasyColor依赖colour库, 只在使用时导入
+    if name == "EasyColor":
+        from .style.easy_color import EasyColor
+        return EasyColor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,18 +2,21 @@
 CustomWxpython 的动画库, 提供诸多动画
 Animation library of CustomWxpython, provide some animation.
 """
-from bisect import bisect_left
+from bisect import bisect_right
 from dataclasses import dataclass
-from enum import Enum
-from time import perf_counter
 
 import wx
 
+from .clock import Clock, RealClock, ManualClock, ScaledClock, TheRealClock
+from .color_ramp import ColorRamp, get_color_ramp, rgb_to_hsl, hsl_to_rgb, mix_color
+from .curves import KeyFrameCurves, CubicBezier, EasingTable, Curve, get_easing_table
+
 Num = int | float
 
 
 class Animation:
     """一个动画, """
+    clock: Clock = TheRealClock  # 动画使用的时钟, 使用 `set_default_clock` 修改全部动画的默认时钟
 
     def __init__(self, during: float):
         self.during = during  # 持续时间
@@ -22,32 +25,56 @@ class Animation:
 
         self.playing_start = -1  # 动画开始时间
 
+        self.sample_stamp = 0  # 缓存的动画值所属的帧编号, 0表示没有缓存
+        self.sample_value = None  # 在该帧中缓存的动画值
+
     def set_invent(self, invent: bool):
         self.is_invent = invent
+        self.sample_stamp = 0
+
+    def set_clock(self, clock: Clock):
+        """设置该动画使用的时钟"""
+        self.clock = clock
 
     def play(self):
         """播放动画, 并切换至动画的开头"""
-        self.playing_start = perf_counter()
+        self.playing_start = self.clock.now()
         self.has_finish = False
+        self.sample_stamp = 0
 
     def stop(self):
         """停止动画, 并切换至动画的结尾"""
         self.playing_start = -1
         self.has_finish = True
+        self.sample_stamp = 0
 
     @property
     def is_playing(self) -> bool:
         """是否正在播放动画"""
         return self.playing_start != -1 and not self.has_finish
 
+    @property
+    def percent(self) -> float:
+        """动画的播放进度 (0~1), 不考虑动画曲线与倒放"""
+        if self.is_playing:
+            return max(0.0, min(self.raw_percent, 1.0))
+        return 1.0 if self.has_finish else 0.0
+
     @property
     def raw_percent(self):
         """播放中, 获取当前动画播放的百分比"""
-        return (perf_counter() - self.playing_start) / self.during
+        return (self.clock.now() - self.playing_start) / self.during
 
     @property
     def value(self) -> float:
-        """动画的值"""
+        """
+        动画的值, 在同一个动画帧(Clock.frame)内只会计算一次
+        The value of the animation, only computed once in the same animation frame (Clock.frame).
+        """
+        stamp = self.clock.frame_stamp
+        if stamp and stamp == self.sample_stamp:
+            return self.sample_value
+
         if self.is_playing:
             percent = self.raw_percent
             if not self.has_finish and percent > 1:
@@ -59,7 +86,11 @@ class Animation:
             percent = 1
         else:
             percent = 0
-        return self.raw_get_value(percent)
+        value = self.raw_get_value(percent)
+        if stamp:
+            self.sample_stamp = stamp
+            self.sample_value = value
+        return value
 
     def get_next_frame_time(self, fps: float):
         return 1 / fps
@@ -88,38 +119,10 @@ class BlinkAnimation(Animation):
         return self.range[1] if percent > self.threshold else self.range[0]
 
 
-class KeyFrameCurves(Enum):
-    """动画曲线, 用于KeyFrame(动画关键帧)"""
-    BLINK = 0
-    "突然闪现"
-
-    SMOOTH = 1
-    "平滑匀速运动"
-
-    EASE_IN = 2
-    "缓入"
-    QUADRATIC_EASE_IN = 3
-    "二次方缓入"
-    CUBE_EASE_IN = 4
-    "三次方缓入"
-
-    EASE_OUT = 5
-    "缓出"
-    QUADRATIC_EASE_OUT = 6
-    "二次方缓出"
-    CUBE_EASE_OUT = 7
-    "三次方缓出"
-
-    QUADRATIC_EASE = 8
-    "二次方缓动"
-    CUBE_EASE = 9
-    "三次方缓动"
-
-
 @dataclass
 class KeyFrame:
     """动画关键帧"""
-    way: KeyFrameCurves  # 动画曲线
+    way: Curve  # 动画曲线, KeyFrameCurves 或 CubicBezier
     percent: float  # 动画百分比
     data: float  # 指定百分比的数据值
 
@@ -136,6 +139,10 @@ class KeyFrameAnimation(Animation):
             self.key_frames.append(KeyFrame(KeyFrameCurves.BLINK, 1, self.key_frames[-1].data))
             self.percents.append(1)
 
+        # 预先获取各关键帧曲线的共享查找表
+        self.frame_tables: list[EasingTable] = [get_easing_table(frame.way) for frame in self.key_frames]
+        self.last_index = len(self.key_frames) - 1
+
         self.raw_range = (self.key_frames[0].data, self.key_frames[-1].data)
         self.percent_offset = 0
         self.raw_during = float(self.during)
@@ -146,7 +153,7 @@ class KeyFrameAnimation(Animation):
 
     def get_next_frame_time(self, fps: float):
         frame_time = 1 / fps
-        crt_time = perf_counter()
+        crt_time = self.clock.now()
         if crt_time + frame_time > self.playing_start + self.during:
             return self.playing_start + self.during - crt_time
         return frame_time
@@ -155,58 +162,28 @@ class KeyFrameAnimation(Animation):
         if self.is_invent:
             percent = 1 - percent
         percent = min(max(percent * (1 - self.percent_offset), 0), 1)
-        index = bisect_left(self.percents, percent) - 1
-        frame = self.key_frames[index]
+        index = bisect_right(self.percents, percent) - 1
+        if index >= self.last_index:
+            return self.key_frames[-1].data
 
-        start = frame.data
-
-        if index >= len(self.percents) - 1:
-            size = 0
-            local_percent = 1
-        else:
-            next_frame = self.key_frames[index + 1]
-            size = next_frame.data - frame.data
-            local_percent = (percent - frame.percent) / (next_frame.percent - frame.percent)
-
-        match frame.way:
-            case KeyFrameCurves.BLINK:
-                return start
-            case KeyFrameCurves.SMOOTH:
-                return start + size * local_percent
-            case KeyFrameCurves.QUADRATIC_EASE:
-                if local_percent < 0.5:
-                    eased = 2 * (local_percent ** 2)
-                else:
-                    eased = -1 + 4 * local_percent - 2 * (local_percent ** 2)
-                return start + size * eased
-            case KeyFrameCurves.CUBE_EASE:
-                if local_percent < 0.5:
-                    eased = 4 * (local_percent ** 3)
-                else:
-                    eased = 1 - ((-2 * local_percent + 2) ** 3) / 2
-                return start + size * eased
-            case KeyFrameCurves.QUADRATIC_EASE_IN:
-                return start + size * (local_percent ** 2)
-            case KeyFrameCurves.CUBE_EASE_IN:
-                return start + size * (local_percent ** 3)
-            case KeyFrameCurves.QUADRATIC_EASE_OUT:
-                return start + size * (1 - (1 - local_percent) ** 2)
-            case KeyFrameCurves.CUBE_EASE_OUT:
-                return start + size * (1 - (1 - local_percent) ** 3)
-        raise NotImplementedError()
+        frame = self.key_frames[index]
+        next_frame = self.key_frames[index + 1]
+        local_percent = (percent - frame.percent) / (next_frame.percent - frame.percent)
+        return frame.data + (next_frame.data - frame.data) * self.frame_tables[index](local_percent)
 
     def set_invent(self, invent: bool):
         super().set_invent(invent)
         if not self.is_playing:
             return
 
-        raw_percent = (perf_counter() - self.playing_start) / self.raw_during
+        now = self.clock.now()
+        raw_percent = (now - self.playing_start) / self.raw_during
         self.percent_offset = 1 - raw_percent
         if invent:
             self.during = self.raw_during * raw_percent
         else:
             self.during = self.raw_during * (1 - raw_percent)
-        self.playing_start = perf_counter()
+        self.playing_start = now
         # print(f"Set Animation Invent {invent}: percent: {raw_percent},\n during: {self.during},\n percent_offset: {self.percent_offset}")
 
     def stop(self):
@@ -215,12 +192,12 @@ class KeyFrameAnimation(Animation):
         super().stop()
 
     @classmethod
-    def simple(cls, during: float, way: KeyFrameCurves, start: float, end: float):
+    def simple(cls, during: float, way: Curve, start: float, end: float):
         return cls(during, [KeyFrame(way, 0, start), KeyFrame(way, 1, end)])
 
 
 class EZKeyFrameAnimation(KeyFrameAnimation):
-    def __init__(self, during: float, way: KeyFrameCurves, start: float, end: float):
+    def __init__(self, during: float, way: Curve, start: float, end: float):
         super().__init__(during, [KeyFrame(way, 0, 0.0), KeyFrame(way, 1, 1.0)])
         self.start = start
         self.end = end
@@ -234,29 +211,15 @@ class EZKeyFrameAnimation(KeyFrameAnimation):
         return super().value * (self.end - self.start) + self.start
 
 
-import colorsys
-
-
 class ColorGradientAnimation(KeyFrameAnimation):
     DEFAULT_FRAMES = [
         KeyFrame(KeyFrameCurves.SMOOTH, 0, 0),
         KeyFrame(KeyFrameCurves.SMOOTH, 1, 1)
     ]
 
-    @staticmethod
-    def rgb_to_hsl(color: wx.Colour):
-        # 归一化到[0,1]
-        r_norm, g_norm, b_norm = color.GetRed() / 255.0, color.GetGreen() / 255.0, color.GetBlue() / 255.0
-        # colorsys使用0-1范围的H，需要转换为0-360
-        h, l, s = colorsys.rgb_to_hls(r_norm, g_norm, b_norm)
-        return h, s, l  # 转换为标准的HSL表示
-
-    @staticmethod
-    def hsl_to_rgb(h, s, l):
-        """使用color sys将浮点HSL转换为整数RGB"""
-        # 将H从0-360转换为0-1
-        r, g, b = colorsys.hls_to_rgb(h, l, s)
-        return int(round(r * 255)), int(round(g * 255)), int(round(b * 255))
+    rgb_to_hsl = staticmethod(rgb_to_hsl)
+    hsl_to_rgb = staticmethod(hsl_to_rgb)
+    mix_color = staticmethod(mix_color)
 
     def __init__(self, during: float, color1: wx.Colour, color2: wx.Colour, key_frames=None):
         if key_frames is None:
@@ -264,27 +227,17 @@ class ColorGradientAnimation(KeyFrameAnimation):
         super().__init__(during, key_frames)
         self.color1 = color1
         self.color2 = color2
+        self.ramp: ColorRamp = get_color_ramp(color1, color2)
 
     def set_color(self, color1: wx.Colour, color2: wx.Colour):
         self.color1 = color1
         self.color2 = color2
-
-    @staticmethod
-    def mix_color(color1: wx.Colour, color2: wx.Colour, percent: float):
-        hsl1 = ColorGradientAnimation.rgb_to_hsl(color1)
-        hsl2 = ColorGradientAnimation.rgb_to_hsl(color2)
-        new_hsl = (
-            hsl1[0] * (1 - percent) + hsl2[0] * percent,
-            hsl1[1] * (1 - percent) + hsl2[1] * percent,
-            hsl1[2] * (1 - percent) + hsl2[2] * percent
-        )
-        new_rgb = ColorGradientAnimation.hsl_to_rgb(*new_hsl)
-        return wx.Colour(*new_rgb, int(color1.Alpha() * (1 - percent) + color2.Alpha() * percent))
+        self.ramp = get_color_ramp(color1, color2)
 
     @property
     def value(self) -> wx.Colour:
-        percent = super().value
-        return self.mix_color(self.color1, self.color2, percent)
+        """动画当前的颜色, 该颜色来自共享色带, 请不要修改"""
+        return self.ramp(super().value)
 
 
 class MultiColorGradientAnimation(Animation):
@@ -297,10 +250,12 @@ class MultiColorGradientAnimation(Animation):
         self.current_color: wx.Colour = self.colors[self.current_name]
         self.start_color: wx.Colour = self.current_color
         self.last_color: wx.Colour = self.current_color
+        self.ramp: ColorRamp = get_color_ramp(self.start_color, self.current_color)
 
     def set_default_target(self, name: str):
         self.current_name = name
         self.current_color = self.colors[name]
+        self.ramp = get_color_ramp(self.start_color, self.current_color)
 
     def set_target(self, name: str, invent: bool = False):
         """设置目标颜色, 颜色将会从当前颜色渐变至"""
@@ -308,6 +263,7 @@ class MultiColorGradientAnimation(Animation):
         self.start_color = self.last_color
         self.current_name = name
         self.current_color = self.colors[name]
+        self.ramp = get_color_ramp(self.start_color, self.current_color)
 
     def __getitem__(self, name: str):
         return self.colors[name]
@@ -317,8 +273,8 @@ class MultiColorGradientAnimation(Animation):
 
     @property
     def value(self) -> wx.Colour:
-        percent = super().value
-        self.last_color = ColorGradientAnimation.mix_color(self.start_color, self.current_color, percent)
+        """动画当前的颜色, 该颜色来自共享色带, 请不要修改"""
+        self.last_color = self.ramp(super().value)
         return self.last_color
 
 
@@ -342,6 +298,11 @@ class MultiKeyFrameAnimation(Animation):
         super().set_invent(invent)
         self.playing_anim.set_invent(invent)
 
+    def set_clock(self, clock: Clock):
+        super().set_clock(clock)
+        for anim in self.animations.values():
+            anim.set_clock(clock)
+
     def set_sub_anim(self, name: str):
         if self.playing_anim != self.animations[name]:
             for anim in self.animations.values():
@@ -386,6 +347,11 @@ class AnimationGroup(Animation):
             animation.is_invent = invent
         super().set_invent(invent)
 
+    def set_clock(self, clock: Clock):
+        super().set_clock(clock)
+        for animation in self.animations.values():
+            animation.set_clock(clock)
+
     @property
     def is_playing(self) -> bool:
         return any(animation.is_playing for animation in self.animations.values())
@@ -395,7 +361,20 @@ class AnimationGroup(Animation):
         raise NotImplementedError
 
 
-def MAKE_ANIM_FRAMES(way: KeyFrameCurves):
+def set_default_clock(clock: Clock):
+    """
+    设置所有动画默认使用的时钟, 未单独设置时钟的动画都会受到影响. 动画调度器按各动画自己的时钟安排下一帧
+    Set the default clock of all animations, schedulers time each animation on its own clock.
+    """
+    Animation.clock = clock
+
+
+def get_default_clock() -> Clock:
+    """获取动画默认使用的时钟"""
+    return Animation.clock
+
+
+def MAKE_ANIM_FRAMES(way: Curve):
     """
     以指定的动画曲线创建一个从0~1的关键帧列表
 
@@ -406,5 +385,5 @@ def MAKE_ANIM_FRAMES(way: KeyFrameCurves):
     ]
 
 
-def MAKE_ANIMATION(during: float, way: KeyFrameCurves = KeyFrameCurves.SMOOTH):
+def MAKE_ANIMATION(during: float, way: Curve = KeyFrameCurves.SMOOTH):
     return KeyFrameAnimation(during, MAKE_ANIM_FRAMES(way))
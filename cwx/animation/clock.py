@@ -0,0 +1,129 @@
+"""
+动画时钟, 所有动画与动画调度器都通过时钟获取时间, 从而可以替换为虚拟时钟进行测试与快进
+Animation clocks, all animations and schedulers read time from a clock,
+ so it can be replaced by a virtual clock for testing and fast-forwarding.
+"""
+from itertools import count
+from time import perf_counter
+from typing import Iterator
+
+FRAME_STAMPS = count(1)  # 全局递增的帧编号
+
+
+class FrameScope:
+    """
+    动画帧的作用域, 作用域内读取的动画值会按帧缓存, 嵌套时沿用最外层的帧编号.
+    帧编号由所有时钟共享, 从任意时钟开始的帧同样缓存使用其他时钟的动画.
+    Scope of an animation frame, animation values read inside it are cached per frame.
+     The frame stamp is shared by all clocks.
+    """
+
+    def __init__(self, clock: 'Clock'):
+        self.clock = clock
+        self.is_owner = False
+
+    def __enter__(self):
+        if not Clock.frame_stamp:
+            Clock.frame_stamp = next(FRAME_STAMPS)
+            self.is_owner = True
+        return Clock.frame_stamp
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.is_owner:
+            Clock.frame_stamp = 0
+            self.is_owner = False
+
+
+class Clock:
+    """时钟基类"""
+    frame_stamp: int = 0  # 当前动画帧的编号, 0表示不在动画帧内. 只由FrameScope在类上设置, 所有时钟共享
+
+    def frame(self) -> FrameScope:
+        """
+        使用 `with clock.frame():` 开始一个动画帧, 由动画调度器与画布在每帧调用
+        Use `with clock.frame():` to begin an animation frame, called by schedulers and canvas in each frame.
+        """
+        return FrameScope(self)
+
+    def now(self) -> float:
+        """当前时间, 单位为秒"""
+        raise NotImplementedError
+
+    def real_delay(self, seconds: float) -> float | None:
+        """
+        将时钟上的一段时长转换为真实等待的时长, 用于设置定时器.
+        返回None表示该时钟不由定时器驱动, 需要手动推进.
+        """
+        return seconds
+
+
+class RealClock(Clock):
+    """使用 `time.perf_counter` 的真实时钟"""
+
+    def now(self) -> float:
+        return perf_counter()
+
+
+class ManualClock(Clock):
+    """
+    手动推进的虚拟时钟, 适用于确定性测试与基准测试
+    A virtual clock advanced by hand, for deterministic tests and benchmarks.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.time = start
+
+    def now(self) -> float:
+        return self.time
+
+    def real_delay(self, seconds: float) -> None:
+        return None
+
+    def set(self, time: float):
+        self.time = time
+
+    def advance(self, seconds: float):
+        """推进时钟"""
+        self.time += seconds
+
+    def frames(self, during: float, fps: float) -> Iterator[float]:
+        """
+        以固定帧率推进时钟, 共推进 `during` 秒, 每推进一帧产出一次当前时间, 产出时处于该帧的作用域内
+        Advance the clock at a fixed frame rate for `during` seconds, yield the time after each frame.
+        """
+        frame_time = 1 / fps
+        for _ in range(round(during * fps)):
+            self.time += frame_time
+            with self.frame():
+                yield self.time
+
+
+class ScaledClock(Clock):
+    """
+    以指定倍速运行的时钟, 倍速可以在运行中修改
+    A clock running at a given speed, the speed can be changed at any time.
+    """
+
+    def __init__(self, scale: float = 1.0, base: Clock | None = None):
+        if scale <= 0:
+            raise ValueError(f"The scale of clock must be positive, got {scale}")
+        self.base = base if base is not None else TheRealClock
+        self.scale = scale
+        self.base_anchor = self.base.now()
+        self.anchor = self.base_anchor
+
+    def now(self) -> float:
+        return self.anchor + (self.base.now() - self.base_anchor) * self.scale
+
+    def set_scale(self, scale: float):
+        if scale <= 0:
+            raise ValueError(f"The scale of clock must be positive, got {scale}")
+        self.anchor = self.now()
+        self.base_anchor = self.base.now()
+        self.scale = scale
+
+    def real_delay(self, seconds: float) -> float | None:
+        return self.base.real_delay(seconds / self.scale)
+
+
+TheRealClock = RealClock()
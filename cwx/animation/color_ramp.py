@@ -0,0 +1,97 @@
+"""
+颜色渐变的量化色带, 相同起止颜色的渐变动画共享同一条色带
+Quantized colour ramps, gradient animations with the same colour pair share one ramp.
+"""
+import colorsys
+from collections import OrderedDict
+
+import wx
+
+RAMP_STEPS = 256  # 色带的量化级数
+MAX_RAMP_CACHE = 512  # 最多缓存的色带数量
+
+
+def rgb_to_hsl(color: wx.Colour) -> tuple[float, float, float]:
+    # 归一化到[0,1]
+    r_norm, g_norm, b_norm = color.GetRed() / 255.0, color.GetGreen() / 255.0, color.GetBlue() / 255.0
+    h, l, s = colorsys.rgb_to_hls(r_norm, g_norm, b_norm)
+    return h, s, l  # 转换为标准的HSL表示
+
+
+def hsl_to_rgb(h: float, s: float, l: float) -> tuple[int, int, int]:
+    """使用color sys将浮点HSL转换为整数RGB"""
+    r, g, b = colorsys.hls_to_rgb(h, l, s)
+    return int(round(r * 255)), int(round(g * 255)), int(round(b * 255))
+
+
+def mix_color(color1: wx.Colour, color2: wx.Colour, percent: float) -> wx.Colour:
+    """在HSL空间中混合两个颜色"""
+    hsl1 = rgb_to_hsl(color1)
+    hsl2 = rgb_to_hsl(color2)
+    new_hsl = (
+        hsl1[0] * (1 - percent) + hsl2[0] * percent,
+        hsl1[1] * (1 - percent) + hsl2[1] * percent,
+        hsl1[2] * (1 - percent) + hsl2[2] * percent
+    )
+    new_rgb = hsl_to_rgb(*new_hsl)
+    return wx.Colour(*new_rgb, int(color1.Alpha() * (1 - percent) + color2.Alpha() * percent))
+
+
+class ColorRamp:
+    """
+    两个颜色之间的量化色带, 色带中的颜色在第一次被用到时计算, 之后直接复用.
+    返回的颜色会被共享, 请不要修改它们.
+
+    A quantized ramp between two colours, each colour is computed on first use and reused after that.
+    Returned colours are shared, do not modify them.
+    """
+    __slots__ = ("hsl1", "hsl2", "alpha1", "alpha2", "colors", "last_index")
+
+    def __init__(self, color1: wx.Colour, color2: wx.Colour, steps: int = RAMP_STEPS):
+        self.hsl1 = rgb_to_hsl(color1)
+        self.hsl2 = rgb_to_hsl(color2)
+        self.alpha1 = color1.Alpha()
+        self.alpha2 = color2.Alpha()
+        self.colors: list[wx.Colour | None] = [None] * steps
+        self.last_index = steps - 1
+
+        # 两端的颜色直接使用原颜色的值, 保证动画首尾没有量化误差
+        self.colors[0] = wx.Colour(color1)
+        self.colors[-1] = wx.Colour(color2)
+
+    def __call__(self, percent: float) -> wx.Colour:
+        if percent <= 0:
+            index = 0
+        elif percent >= 1:
+            index = self.last_index
+        else:
+            index = int(percent * self.last_index + 0.5)
+        color = self.colors[index]
+        if color is None:
+            color = self.colors[index] = self.build(index / self.last_index)
+        return color
+
+    def build(self, percent: float) -> wx.Colour:
+        hsl1, hsl2 = self.hsl1, self.hsl2
+        rgb = hsl_to_rgb(
+            hsl1[0] + (hsl2[0] - hsl1[0]) * percent,
+            hsl1[1] + (hsl2[1] - hsl1[1]) * percent,
+            hsl1[2] + (hsl2[2] - hsl1[2]) * percent
+        )
+        return wx.Colour(*rgb, int(self.alpha1 * (1 - percent) + self.alpha2 * percent))
+
+
+COLOR_RAMPS: OrderedDict[tuple[int, int], ColorRamp] = OrderedDict()  # (RGBA1, RGBA2) -> 色带
+
+
+def get_color_ramp(color1: wx.Colour, color2: wx.Colour) -> ColorRamp:
+    """获取两个颜色之间的共享色带, 缓存按最近使用淘汰"""
+    key = (color1.GetRGBA(), color2.GetRGBA())
+    ramp = COLOR_RAMPS.get(key)
+    if ramp is None:
+        ramp = COLOR_RAMPS[key] = ColorRamp(color1, color2)
+        if len(COLOR_RAMPS) > MAX_RAMP_CACHE:
+            COLOR_RAMPS.popitem(last=False)
+    else:
+        COLOR_RAMPS.move_to_end(key)
+    return ramp
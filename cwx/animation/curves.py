@@ -0,0 +1,192 @@
+"""
+动画曲线, 所有曲线都会被编译为共享的查找表, 每帧求值只需一次线性插值
+Animation curves, every curve is compiled into a shared lookup table,
+ evaluating a curve in each frame only costs a linear interpolation.
+"""
+import re
+from enum import Enum
+from typing import Callable
+
+EASING_TABLE_STEPS = 256  # 查找表的采样段数
+
+
+class KeyFrameCurves(Enum):
+    """动画曲线, 用于KeyFrame(动画关键帧)"""
+    BLINK = 0
+    "突然闪现"
+
+    SMOOTH = 1
+    "平滑匀速运动"
+
+    EASE_IN = 2
+    "缓入, 等同于CSS的ease-in"
+    QUADRATIC_EASE_IN = 3
+    "二次方缓入"
+    CUBE_EASE_IN = 4
+    "三次方缓入"
+
+    EASE_OUT = 5
+    "缓出, 等同于CSS的ease-out"
+    QUADRATIC_EASE_OUT = 6
+    "二次方缓出"
+    CUBE_EASE_OUT = 7
+    "三次方缓出"
+
+    QUADRATIC_EASE = 8
+    "二次方缓动"
+    CUBE_EASE = 9
+    "三次方缓动"
+
+
+class CubicBezier:
+    """
+    CSS风格的三次贝塞尔动画曲线, 等同于 `cubic-bezier(x1, y1, x2, y2)`
+    CSS-style cubic bezier curve, same as `cubic-bezier(x1, y1, x2, y2)`.
+    """
+    NEWTON_ITERATIONS = 8
+    SOLVE_EPSILON = 1e-7
+
+    CSS_PATTERN = re.compile(r"^\s*cubic-bezier\s*\(([^)]*)\)\s*$")
+
+    def __init__(self, x1: float, y1: float, x2: float, y2: float):
+        if not (0 <= x1 <= 1 and 0 <= x2 <= 1):
+            raise ValueError(f"The x values of cubic-bezier must be in [0, 1], got ({x1}, {x2})")
+        self.points = (float(x1), float(y1), float(x2), float(y2))
+
+        # 多项式系数, 参考 WebKit 的 UnitBezier
+        self.cx = 3.0 * x1
+        self.bx = 3.0 * (x2 - x1) - self.cx
+        self.ax = 1.0 - self.cx - self.bx
+        self.cy = 3.0 * y1
+        self.by = 3.0 * (y2 - y1) - self.cy
+        self.ay = 1.0 - self.cy - self.by
+
+    @classmethod
+    def from_css(cls, text: str) -> 'CubicBezier':
+        """从CSS字符串创建, 例如 `cubic-bezier(0.4, 0, 0.2, 1)`"""
+        match = cls.CSS_PATTERN.match(text)
+        if match is None:
+            raise ValueError(f"Invalid cubic-bezier: {text}")
+        values = [float(v) for v in match.group(1).split(",")]
+        if len(values) != 4:
+            raise ValueError(f"cubic-bezier needs 4 values, got {len(values)}")
+        return cls(*values)
+
+    def sample_x(self, t: float) -> float:
+        return ((self.ax * t + self.bx) * t + self.cx) * t
+
+    def sample_y(self, t: float) -> float:
+        return ((self.ay * t + self.by) * t + self.cy) * t
+
+    def sample_dx(self, t: float) -> float:
+        return (3.0 * self.ax * t + 2.0 * self.bx) * t + self.cx
+
+    def solve_t(self, x: float) -> float:
+        """求解曲线参数t, 使得 x(t) = x. 先使用牛顿迭代, 失败时回退至二分法"""
+        t = x
+        for _ in range(self.NEWTON_ITERATIONS):
+            error = self.sample_x(t) - x
+            if abs(error) < self.SOLVE_EPSILON:
+                return t
+            dx = self.sample_dx(t)
+            if abs(dx) < 1e-6:
+                break
+            t -= error / dx
+
+        low, high = 0.0, 1.0
+        t = x
+        while low < high:
+            value = self.sample_x(t)
+            if abs(value - x) < self.SOLVE_EPSILON:
+                return t
+            if x > value:
+                low = t
+            else:
+                high = t
+            if high - low < self.SOLVE_EPSILON:
+                break
+            t = (high - low) / 2 + low
+        return t
+
+    def __call__(self, x: float) -> float:
+        if x <= 0:
+            return 0.0
+        if x >= 1:
+            return 1.0
+        return self.sample_y(self.solve_t(x))
+
+    def __eq__(self, other):
+        return isinstance(other, CubicBezier) and self.points == other.points
+
+    def __hash__(self):
+        return hash(self.points)
+
+    def __repr__(self):
+        return "cubic-bezier({}, {}, {}, {})".format(*self.points)
+
+
+def _quadratic_ease(p: float) -> float:
+    if p < 0.5:
+        return 2 * (p ** 2)
+    return -1 + 4 * p - 2 * (p ** 2)
+
+
+def _cube_ease(p: float) -> float:
+    if p < 0.5:
+        return 4 * (p ** 3)
+    return 1 - ((-2 * p + 2) ** 3) / 2
+
+
+CURVE_FUNCTIONS: dict[KeyFrameCurves, Callable[[float], float]] = {
+    KeyFrameCurves.BLINK: lambda p: 0.0,
+    KeyFrameCurves.SMOOTH: lambda p: p,
+    KeyFrameCurves.EASE_IN: CubicBezier(0.42, 0, 1, 1),
+    KeyFrameCurves.QUADRATIC_EASE_IN: lambda p: p ** 2,
+    KeyFrameCurves.CUBE_EASE_IN: lambda p: p ** 3,
+    KeyFrameCurves.EASE_OUT: CubicBezier(0, 0, 0.58, 1),
+    KeyFrameCurves.QUADRATIC_EASE_OUT: lambda p: 1 - (1 - p) ** 2,
+    KeyFrameCurves.CUBE_EASE_OUT: lambda p: 1 - (1 - p) ** 3,
+    KeyFrameCurves.QUADRATIC_EASE: _quadratic_ease,
+    KeyFrameCurves.CUBE_EASE: _cube_ease,
+}
+
+
+class EasingTable:
+    """
+    动画曲线的查找表, 以线性插值近似曲线
+    Lookup table of an animation curve, approximate the curve by linear interpolation.
+    """
+    __slots__ = ("steps", "values")
+
+    def __init__(self, func: Callable[[float], float], steps: int = EASING_TABLE_STEPS):
+        self.steps = steps
+        self.values: list[float] = [func(i / steps) for i in range(steps + 1)]
+
+    def __call__(self, percent: float) -> float:
+        if percent <= 0:
+            return self.values[0]
+        if percent >= 1:
+            return self.values[-1]
+        pos = percent * self.steps
+        index = int(pos)
+        start = self.values[index]
+        return start + (self.values[index + 1] - start) * (pos - index)
+
+
+Curve = KeyFrameCurves | CubicBezier
+
+EASING_TABLES: dict[Curve, EasingTable] = {}  # 曲线 -> 查找表, 在所有动画之间共享
+
+
+def get_easing_table(way: Curve) -> EasingTable:
+    """获取曲线的查找表, 同一曲线只会编译一次"""
+    table = EASING_TABLES.get(way)
+    if table is None:
+        if isinstance(way, CubicBezier):
+            func = way
+        elif way in CURVE_FUNCTIONS:
+            func = CURVE_FUNCTIONS[way]
+        else:
+            raise NotImplementedError(f"Unknown animation curve: {way}")
+        table = EASING_TABLES[way] = EasingTable(func)
+    return table
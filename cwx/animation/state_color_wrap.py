@@ -5,23 +5,74 @@ from cwx.widgets.animation_widget import AnimationWidget
 
 aw = typing.cast(type[AnimationWidget], object)
 
+_UNSET = object()
+
+
+class ObservableState:
+    """
+    可观察的状态属性(描述符), 只在值真正改变时调用实例的回调方法 `callback(old, new)`.
+    第一次赋值视为初始化, 不会触发回调. 读取与其他属性的写入保持原生速度.
+
+    An observable state property (descriptor), calls `callback(old, new)` of the instance only when the value changes.
+    The first assignment is treated as initialization and doesn't fire the callback.
+    """
+
+    def __init__(self, callback: str):
+        self.callback = callback
+        self.name = ""
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(f"'{owner.__name__}' object has no attribute '{self.name}'") from None
+
+    def set_quietly(self, instance, value):
+        """修改值而不触发回调"""
+        instance.__dict__[self.name] = value
+
+    def __set__(self, instance, value):
+        old = instance.__dict__.get(self.name, _UNSET)
+        instance.__dict__[self.name] = value
+        if old is not _UNSET and old != value:
+            getattr(instance, self.callback)(old, value)
+
 
 class StateAnimManager(aw):
+    """
+    管理遮罩状态动画, 遮罩状态改变时将所有状态动画切换到新状态, 并一次性播放
+    Manage mask state animations, retarget and play all state animations at once when the mask state changes.
+    """
     mask_state_name: str = "mask_state"
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 为遮罩状态属性安装描述符, 子类可以通过类属性 `mask_state_name` 修改属性名
+        if not isinstance(getattr(cls, cls.mask_state_name, None), ObservableState):
+            state = ObservableState("on_mask_state_change")
+            state.__set_name__(cls, cls.mask_state_name)
+            setattr(cls, cls.mask_state_name, state)
+
     def __init__(self, mask_state_name: str = "mask_state"):
         if 0.0 == 1.0:  # 欺骗类型检查器
             super().__init__(self)
-        self.mask_state_name = mask_state_name
+        if mask_state_name != type(self).mask_state_name:
+            raise ValueError(f"Mask state name '{mask_state_name}' doesn't match the class attribute "
+                             f"'mask_state_name' ({type(self).mask_state_name}), set it on the class instead")
         self.state_animations: dict[StateGradientAnimation, tuple[str, str]] = {}
 
-    def __setattr__(self, name, value):
-        if name == self.mask_state_name:
-            for anim, (anim_name, var_name) in self.state_animations.items():
-                anim.set_target(value)
-                self.play_animation(anim_name)
-            self.Refresh()
-        return super().__setattr__(name, value)
+    def on_mask_state_change(self, _old, state):
+        """遮罩状态改变时调用, 批量切换状态动画的目标"""
+        if self.state_animations:
+            for anim in self.state_animations:
+                anim.set_target(state)
+            self.play_animations(*(anim_name for anim_name, _ in self.state_animations.values()))
+        self.Refresh()
 
     def reg_state_animation(self, name: str, var_name: str, anim: StateGradientAnimation):
         self.reg_animation(name, anim)
@@ -40,3 +40,29 @@ def translate_size(size: tuple[int, int]):
 
 X_SCALE, Y_SCALE = get_screen_scale()
 SCALE = X_SCALE
+
+
+class ScaleContext:
+    """
+    顶层窗口的DPI缩放, 窗口移动到DPI不同的显示器时改变 (见 `TopLevelWrapper.set_scale`).
+    控件应通过 `Widget.scale` 读取当前缩放, 依赖缩放的缓存需要以缩放作为键的一部分.
+
+    DPI scale of a top level window, changes when the window moves to a monitor with a different DPI.
+    """
+
+    def __init__(self, scale: float = SCALE):
+        self.scale = scale
+
+    def translate_size(self, size: tuple[int, int]):
+        return (
+            -1 if size[0] == -1 else round(size[0] * self.scale),
+            -1 if size[1] == -1 else round(size[1] * self.scale)
+        )
+
+
+DEFAULT_SCALE_CONTEXT = ScaleContext()  # 不在CWX顶层窗口中的控件使用的缩放
+
+
+def get_scale_context(window) -> ScaleContext:
+    """获取窗口所在顶层窗口的缩放"""
+    return getattr(window.GetTopLevelParent(), "scale_context", DEFAULT_SCALE_CONTEXT)
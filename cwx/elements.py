@@ -3,6 +3,7 @@ from typing import Any
 
 import wx
 
+from cwx.lib.spatial_index import HitTester, rect_contains
 from cwx.render import CustomGraphicsContext
 
 
@@ -42,21 +43,29 @@ class BaseElement:
         self.x: float = 0
         self.y: float = 0
 
+    def get_rect(self, width: float, height: float) -> tuple[float, float, float, float]:
+        if self.align == Align.CENTER:
+            return self.x - width / 2, self.y - height / 2, width, height
+        return self.x, self.y, width, height
+
     def check_state(self, width: float, height: float) -> MaskState:
+        """
+        元素的遮罩状态. 窗口为CWX控件时, 元素作为可交互区域登记到控件的命中测试器, 悬停状态由鼠标事件更新,
+         不再查询鼠标位置; 其他窗口仍直接查询鼠标位置.
+        """
         if not self.wnd.IsEnabled():
             return MaskState.DISABLED
-        if self.align == Align.TOP_LEFT:
-            rect = wx.Rect2D(self.x, self.y, width, height)
-        elif self.align == Align.CENTER:
-            rect = wx.Rect2D(self.x - width / 2, self.y - height / 2, width, height)
-        mouse_pt = self.wnd.ScreenToClient(wx.GetMousePosition())
-        if rect.Contains(mouse_pt):
-            if wx.GetMouseState().LeftIsDown():
-                return MaskState.PRESSED
-            else:
-                return MaskState.HOVER
+        rect = self.get_rect(width, height)
+        tester: HitTester | None = getattr(self.wnd, "hit_tester", None)
+        if tester is not None:
+            tester.set_region(self, rect)
+            hovered = tester.hovered is self
         else:
+            mouse_pt = self.wnd.ScreenToClient(wx.GetMousePosition())
+            hovered = rect_contains(rect, mouse_pt.x, mouse_pt.y)
+        if not hovered:
             return MaskState.NONE
+        return MaskState.PRESSED if wx.GetMouseState().LeftIsDown() else MaskState.HOVER
 
     def draw(self, gc: 'CustomGraphicsContext'):
         ...
@@ -1,8 +1,13 @@
+import math
+from bisect import bisect_left
+
 import wx
 
 from ..animation import Animation
 from ..render import CustomGraphicsContext
 
+PointLike = wx.Point2D | tuple[float, float]
+
 
 class AnimationElement:
     CGC = CustomGraphicsContext  # 只是为了保持引用
@@ -23,42 +28,152 @@ class DrawCallAE(AnimationElement):
         func(*args)
 
 
-class DrawLinesAE(AnimationElement):
-    def __init__(self, anim: Animation, point2Ds: list[wx.Point2D] = None,
+class TrimPath:
+    """
+    可被裁剪绘制的路径, 由折线、三次贝塞尔曲线与圆弧组成, 曲线会被展开为折线
+    A trimmable path made of polylines, cubic bezier curves and arcs, curves are flattened into polylines.
+    """
+    CURVE_SEGMENT_LENGTH = 2.0  # 曲线展开时每段的目标长度 (像素)
+    MAX_CURVE_SEGMENTS = 64
+
+    def __init__(self, x: float | None = None, y: float | None = None):
+        self.points: list[tuple[float, float]] = [] if x is None else [(x, y)]
+
+    @classmethod
+    def from_points(cls, points: list[PointLike]) -> 'TrimPath':
+        path = cls()
+        for point in points:
+            path.line_to(point[0], point[1])
+        return path
+
+    @property
+    def current(self) -> tuple[float, float]:
+        if not self.points:
+            raise ValueError("The path has no current point, use line_to or arc first")
+        return self.points[-1]
+
+    def _segments_for(self, length: float) -> int:
+        return max(2, min(self.MAX_CURVE_SEGMENTS, math.ceil(length / self.CURVE_SEGMENT_LENGTH)))
+
+    def line_to(self, x: float, y: float) -> 'TrimPath':
+        """连线至指定点, 空路径时作为起点"""
+        self.points.append((x, y))
+        return self
+
+    def curve_to(self, c1x: float, c1y: float, c2x: float, c2y: float, x: float, y: float) -> 'TrimPath':
+        """添加一段三次贝塞尔曲线"""
+        x0, y0 = self.current
+        # 以控制多边形长度估计曲线长度, 决定分段数
+        hull = math.hypot(c1x - x0, c1y - y0) + math.hypot(c2x - c1x, c2y - c1y) + math.hypot(x - c2x, y - c2y)
+        segments = self._segments_for(hull)
+        for i in range(1, segments + 1):
+            t = i / segments
+            mt = 1 - t
+            a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+            self.points.append((a * x0 + b * c1x + c * c2x + d * x, a * y0 + b * c1y + c * c2y + d * y))
+        return self
+
+    def arc(self, cx: float, cy: float, radius: float, start_angle: float, end_angle: float) -> 'TrimPath':
+        """
+        添加一段圆弧, 角度单位为度, 已有的当前点会先连线至圆弧起点
+        Add an arc in degrees, the current point (if any) is connected to the start of the arc.
+        """
+        start, end = math.radians(start_angle), math.radians(end_angle)
+        segments = self._segments_for(abs(end - start) * radius)
+        first = (cx + radius * math.cos(start), cy + radius * math.sin(start))
+        if not self.points or self.points[-1] != first:
+            self.points.append(first)
+        for i in range(1, segments + 1):
+            angle = start + (end - start) * i / segments
+            self.points.append((cx + radius * math.cos(angle), cy + radius * math.sin(angle)))
+        return self
+
+
+class PathTrimAE(AnimationElement):
+    """
+    按动画值裁剪绘制路径的动画元素, 动画值为0~1, 表示从起点绘制到的路径长度比例.
+    路径的累计弧长在设置路径时计算, 每帧只需二分查找裁剪点并复用预分配的点.
+
+    An animation element drawing a path trimmed by the animation value (0~1).
+    Cumulative arc lengths are computed when the path is set,
+     each frame only bisects the cut point and reuses preallocated points.
+    """
+
+    def __init__(self, anim: Animation, path: TrimPath | list[PointLike] | None = None,
                  fill_style: wx.PolygonFillMode = wx.ODDEVEN_RULE):
         super().__init__()
         self.anim = anim
-        self.point2Ds: list[wx.Point2D] = point2Ds
         self.fill_style = fill_style
 
+        self.points: list[wx.Point2D] | None = None
+        self.points_key: tuple[tuple[float, float], ...] | None = None
+        self.lengths: list[float] = []  # 从起点到各点的累计弧长
+        self.total_length: float = 0
+        self.tail = wx.Point2D()  # 裁剪点, 每帧原地修改
+        self.buffers: dict[int, list[wx.Point2D]] = {}  # 裁剪点所在段 -> 预分配的绘制点列表
+
+        self.set_path(path)
+
+    def set_path(self, path: TrimPath | list[PointLike] | None):
+        """设置路径, 与当前路径相同时不会重新计算"""
+        if path is None:
+            self.points = self.points_key = None
+            return
+        raw_points = path.points if isinstance(path, TrimPath) else path
+        key = tuple((float(point[0]), float(point[1])) for point in raw_points)
+        if key == self.points_key:
+            return
+
+        self.points_key = key
+        self.points = [wx.Point2D(x, y) for x, y in key]
+        self.lengths = [0.0]
+        total = 0.0
+        for i in range(1, len(key)):
+            total += math.hypot(key[i][0] - key[i - 1][0], key[i][1] - key[i - 1][1])
+            self.lengths.append(total)
+        self.total_length = total
+        self.buffers.clear()
+
+    def get_buffer(self, index: int) -> list[wx.Point2D]:
+        """获取裁剪点位于第index段时的绘制点列表, 列表的最后一个元素为裁剪点"""
+        buffer = self.buffers.get(index)
+        if buffer is None:
+            buffer = self.buffers[index] = self.points[:index] + [self.tail]
+        return buffer
+
     def draw(self, gc: 'CustomGraphicsContext'):
-        if self.point2Ds is None:
+        if not self.points or len(self.points) < 2:
             return
 
         value = self.anim.value
-        if value == 0:
+        if value <= 0 or self.total_length == 0:
             return
-        if value == 1:
-            gc.DrawLines(self.point2Ds, self.fill_style)
+        if value >= 1:
+            gc.DrawLines(self.points, self.fill_style)
             return
 
-        point2Ds = self.point2Ds
-        active_points = [point2Ds[0]]
-        distances = [point2Ds[i].GetDistance(point2Ds[i + 1]) for i in range(len(point2Ds) - 1)]
-        total_distance = sum(distances)
-        left_distance = total_distance * min(max(value, 0), 1)
-        distance = 0
-        for i, distance in enumerate(distances):
-            active_points.append(point2Ds[i + 1])
-            if left_distance <= distance:
-                break
-            left_distance -= distance
-        if left_distance != 0:
-            last_second_pt = wx.Point2D(active_points[-2])
-            last_pt = wx.Point2D(active_points[-1])
-            percent = left_distance / distance
-            last_pt[0] = last_second_pt[0] + (last_pt[0] - last_second_pt[0]) * percent
-            last_pt[1] = last_second_pt[1] + (last_pt[1] - last_second_pt[1]) * percent
-            active_points[-1] = last_pt
-
-        gc.DrawLines(active_points, wx.ODDEVEN_RULE)
+        target = self.total_length * value
+        index = bisect_left(self.lengths, target)  # 裁剪点位于 index-1 与 index 之间
+        start, end = self.points_key[index - 1], self.points_key[index]
+        seg_length = self.lengths[index] - self.lengths[index - 1]
+        percent = (target - self.lengths[index - 1]) / seg_length if seg_length else 1
+        self.tail[0] = start[0] + (end[0] - start[0]) * percent
+        self.tail[1] = start[1] + (end[1] - start[1]) * percent
+
+        gc.DrawLines(self.get_buffer(index), self.fill_style)
+
+
+class DrawLinesAE(PathTrimAE):
+    """按动画值逐渐绘制一条折线"""
+
+    def __init__(self, anim: Animation, point2Ds: list[PointLike] = None,
+                 fill_style: wx.PolygonFillMode = wx.ODDEVEN_RULE):
+        super().__init__(anim, point2Ds, fill_style)
+
+    @property
+    def point2Ds(self) -> list[wx.Point2D] | None:
+        return self.points
+
+    @point2Ds.setter
+    def point2Ds(self, point2Ds: list[PointLike] | None):
+        self.set_path(point2Ds)
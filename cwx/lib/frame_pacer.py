@@ -0,0 +1,104 @@
+"""
+自适应帧率, 根据测得的绘制耗时决定动画的帧率
+Adaptive frame pacing, decide the animation frame rate by the measured paint cost.
+"""
+from collections import deque
+
+from .settings import GlobalSettings
+from ..animation.clock import TheRealClock
+
+
+class FrameStats:
+    """
+    帧统计, 记录实际帧率与掉帧数. 画布以它统计合成的帧率, 每个动画调度器各自以它统计自己的掉帧
+    Frame statistics, records the achieved fps and dropped frames.
+     The canvas counts its composites with it, each animation scheduler counts its own dropped frames.
+    """
+    DROP_THRESHOLD = 1.5  # 实际帧间隔超过计划间隔的倍数时视为掉帧
+
+    def __init__(self, window: float = 1.0):
+        self.window = window  # 统计实际帧率的时间窗口 (秒)
+        self.frame_times: deque[float] = deque()
+        self.total_frames = 0
+        self.dropped_frames = 0
+
+    def record_frame(self, now: float, interval: float | None = None, planned: float | None = None):
+        """
+        记录一帧
+        :param now: 当前时间
+        :param interval: 与上一帧的实际间隔
+        :param planned: 上一帧计划的间隔
+        """
+        self.total_frames += 1
+        self.frame_times.append(now)
+        while self.frame_times and now - self.frame_times[0] > self.window:
+            self.frame_times.popleft()
+        if interval is not None and planned and interval > planned * self.DROP_THRESHOLD:
+            self.dropped_frames += round(interval / planned) - 1
+
+    @property
+    def achieved_fps(self) -> float:
+        """最近时间窗口内的实际帧率"""
+        if len(self.frame_times) < 2:
+            return 0.0
+        span = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / span if span > 0 else 0.0
+
+    def reset(self):
+        self.frame_times.clear()
+        self.total_frames = 0
+        self.dropped_frames = 0
+
+
+class FramePacer:
+    """
+    帧率调节器, 每个顶层窗口画布拥有一个.
+    启用自适应时, 帧率被限制为使绘制耗时不超过CPU预算的值; 窗口失去焦点时, 低优先级动画降至低帧率.
+
+    Frame pacer, each top level canvas owns one.
+    When adaptive, the fps is limited so that painting stays in the CPU budget;
+     low priority animations drop to a low fps when the window is unfocused.
+    """
+    PAINT_COST_SMOOTHING = 0.2  # 绘制耗时的指数平均系数
+
+    def __init__(self):
+        self.adaptive: bool = GlobalSettings.adaptive_frame_rate
+        self.cpu_budget: float = GlobalSettings.frame_cpu_budget  # 绘制可占用的CPU时间比例 (0~1)
+        self.min_fps: float = GlobalSettings.min_frame_rate
+        self.unfocused_fps: float = GlobalSettings.unfocused_frame_rate
+
+        self.is_active: bool = True  # 窗口是否处于激活状态
+        self.paint_cost: float = 0.0  # 平均每帧绘制耗时 (秒)
+        self.stats = FrameStats()  # 画布合成的帧, 每次合成记录一帧
+
+    def record_paint(self, cost: float):
+        """记录一次画布合成及其耗时"""
+        self.stats.record_frame(TheRealClock.now())
+        if self.paint_cost == 0:
+            self.paint_cost = cost
+        else:
+            self.paint_cost += (cost - self.paint_cost) * self.PAINT_COST_SMOOTHING
+
+    @property
+    def budget_fps(self) -> float | None:
+        """使绘制耗时不超过CPU预算的最高帧率, 未启用自适应或尚未测得绘制耗时时为None"""
+        if self.adaptive and self.paint_cost > 0:
+            return self.cpu_budget / self.paint_cost
+        return None
+
+    def target_fps(self, requested_fps: float, low_priority: bool = False) -> float:
+        """根据绘制耗时与窗口状态计算实际使用的帧率"""
+        fps = requested_fps
+        budget_fps = self.budget_fps
+        if budget_fps is not None:
+            fps = max(min(fps, budget_fps), min(self.min_fps, requested_fps))
+        if low_priority and not self.is_active:
+            fps = min(fps, self.unfocused_fps)
+        return fps
+
+    def report(self) -> str:
+        """合成帧率与绘制耗时, 各控件的掉帧见控件的 `frame_stats`"""
+        budget_fps = self.budget_fps
+        budget = f"{budget_fps:.1f}" if budget_fps is not None else "-"
+        return (f"composited fps: {self.stats.achieved_fps:.1f} (budget {budget}), "
+                f"paint: {self.paint_cost * 1000:.2f} ms")
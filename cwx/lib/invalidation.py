@@ -0,0 +1,87 @@
+"""
+合并重绘请求, 一次事件分发中对同一控件的多次Refresh只处理一次, 每帧只请求一次画布重绘
+Coalesced invalidation, repeated Refresh calls on one widget within an event dispatch are handled once,
+ and the canvas is repainted once per frame.
+"""
+from collections import Counter
+from time import perf_counter
+from typing import Callable
+
+import wx
+
+from .settings import GlobalSettings
+
+CONTENT = "content"  # 控件内容, 包含图层
+LAYERS = "layers"  # 只有控件的图层
+
+
+class InvalidationTracker:
+    """
+    重绘请求跟踪器, 每个顶层窗口画布拥有一个.
+    请求按 (控件, 区域) 去重, 直到下一次画布绘制开始; 第一个请求安排在事件处理完后统一刷新一次.
+    启用 `GlobalSettings.debug_invalidation` 时, 每秒打印各控件被去重的冗余请求数量, 用于寻找热点.
+
+    Invalidation tracker, each top level canvas owns one.
+    Requests are deduped per (widget, region) until the next paint starts, the first one schedules a single flush.
+    """
+    REPORT_INTERVAL = 1.0  # 调试报告的间隔 (秒)
+
+    def __init__(self, flush: Callable[[], None]):
+        self.flush_callback = flush
+        self.pending: dict[int, str] = {}  # 窗口句柄 -> 已处理的区域
+        self.scheduled = False
+
+        self.debug: bool = GlobalSettings.debug_invalidation
+        self.requests: Counter[str] = Counter()
+        self.redundant: Counter[str] = Counter()
+        self.report_start = perf_counter()
+
+    def request(self, window: wx.Window, region: str = CONTENT) -> bool:
+        """
+        登记一个重绘请求, 返回是否需要处理.
+        同一批次内已经处理过相同 (或更大) 区域时返回False.
+        """
+        key = window.GetHandle()
+        handled = self.pending.get(key)
+        redundant = handled == CONTENT or handled == region
+        if self.debug:
+            self.record(window, redundant)
+        if redundant:
+            return False
+        self.pending[key] = region
+        if not self.scheduled:
+            self.scheduled = True
+            wx.CallAfter(self.flush)
+        return True
+
+    def flush(self):
+        """事件处理完后调用, 期间画布已经绘制过时不再重复刷新"""
+        self.scheduled = False
+        if self.pending:
+            self.pending.clear()
+            self.flush_callback()
+
+    def on_paint(self):
+        """画布开始绘制, 此前的请求都会在这一帧中完成"""
+        self.pending.clear()
+
+    # 调试
+    # Debugging.
+    def record(self, window: wx.Window, redundant: bool):
+        name = f"{window.__class__.__name__}#{window.GetId()}"
+        self.requests[name] += 1
+        if redundant:
+            self.redundant[name] += 1
+        now = perf_counter()
+        if now - self.report_start >= self.REPORT_INTERVAL:
+            if self.redundant:
+                print(self.report(now - self.report_start))
+            self.requests.clear()
+            self.redundant.clear()
+            self.report_start = now
+
+    def report(self, span: float) -> str:
+        lines = [f"Redundant refreshes per second ({span:.1f}s):"]
+        for name, count in self.redundant.most_common(10):
+            lines.append(f"  {name}: {count / span:.1f}/s ({count} of {self.requests[name]} requests)")
+        return "\n".join(lines)
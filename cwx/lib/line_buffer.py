@@ -0,0 +1,220 @@
+"""
+有界的行环形缓冲区与行搜索索引, 用于持续追加的日志
+Bounded line ring buffers and a line search index for continuously appended logs.
+"""
+import mmap
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class LineBuffer:
+    """
+    内存中的行环形缓冲区. 每行获得一个递增的行号, 超出容量时丢弃最旧的行, 行号不会被重新使用.
+    有效的行号为 [first_id, next_id).
+
+    In-memory line ring buffer. Every line gets an increasing id, the oldest lines are dropped
+     when the capacity is exceeded. Valid ids are [first_id, next_id).
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.first_id = 0
+        self.next_id = 0
+        self.slots: list[str | None] = [None] * capacity
+
+    def __len__(self) -> int:
+        return self.next_id - self.first_id
+
+    def __contains__(self, line_id: int) -> bool:
+        return self.first_id <= line_id < self.next_id
+
+    def append(self, text: str) -> int:
+        """追加一行, 返回行号"""
+        if len(self) == self.capacity:
+            self.drop_oldest()
+        line_id = self.next_id
+        self.slots[line_id % self.capacity] = text
+        self.next_id += 1
+        return line_id
+
+    def drop_oldest(self):
+        self.slots[self.first_id % self.capacity] = None
+        self.first_id += 1
+
+    def get(self, line_id: int) -> str | None:
+        """获取一行, 已被丢弃或不存在的行返回None"""
+        if line_id not in self:
+            return None
+        return self.slots[line_id % self.capacity]
+
+    def clear(self):
+        """清空缓冲区, 行号继续递增"""
+        self.slots = [None] * self.capacity
+        self.first_id = self.next_id
+
+
+class MappedLineBuffer(LineBuffer):
+    """
+    文字保存在内存映射文件中的行环形缓冲区, 内存中只保存每行的位置.
+    文字以UTF-8依次写入文件中的字节环, 写入位置追上最旧的行时丢弃该行, 因此同时受行数与字节数限制.
+
+    Line ring buffer whose text lives in a memory-mapped file, only the offsets stay in memory.
+     Lines are written into a byte ring, catching up with the oldest line drops it.
+    """
+
+    def __init__(self, capacity: int, data_size: int = 64 * 1024 * 1024, path: str | None = None):
+        """
+        :param capacity: 最大行数
+        :param data_size: 文字区域的字节数
+        :param path: 映射的文件, 默认为临时文件
+        """
+        super().__init__(capacity)
+        self.slots = None
+        self.data_size = data_size
+        self.file = open(path, "w+b") if path is not None else tempfile.TemporaryFile()
+        self.file.truncate(data_size)
+        self.data = mmap.mmap(self.file.fileno(), data_size)
+        self.offsets = array("q", bytes(8 * capacity))
+        self.lengths = array("q", bytes(8 * capacity))
+        self.write_pos = 0
+
+    def append(self, text: str) -> int:
+        raw = text.encode("utf-8")
+        if len(raw) > self.data_size:  # 超长的行截断
+            raw = raw[:self.data_size].decode("utf-8", "ignore").encode("utf-8")
+        size = len(raw)
+        start = self.write_pos
+        if start + size > self.data_size:  # 文件末尾放不下, 从头写入, 末尾的空隙 (包括位于末尾的空行) 同样被占用
+            self.drop_overlapping(start, self.data_size + 1)
+            start = 0
+        self.drop_overlapping(start, start + size)
+        if len(self) == self.capacity:
+            self.drop_oldest()
+
+        line_id = self.next_id
+        slot = line_id % self.capacity
+        self.data[start:start + size] = raw
+        self.offsets[slot] = start
+        self.lengths[slot] = size
+        self.write_pos = start + size
+        self.next_id += 1
+        return line_id
+
+    def drop_overlapping(self, start: int, end: int):
+        """丢弃与字节区间 [start, end) 重叠的最旧的行. 行按写入顺序排列, 最旧的行不重叠时后面的行也不会重叠"""
+        while len(self):
+            slot = self.first_id % self.capacity
+            offset, length = self.offsets[slot], self.lengths[slot]
+            if not (start <= offset < end or offset < start < offset + length):
+                return
+            self.first_id += 1
+
+    def drop_oldest(self):
+        self.first_id += 1
+
+    def get(self, line_id: int) -> str | None:
+        if line_id not in self:
+            return None
+        slot = line_id % self.capacity
+        offset = self.offsets[slot]
+        return self.data[offset:offset + self.lengths[slot]].decode("utf-8", "replace")
+
+    def clear(self):
+        self.first_id = self.next_id
+        self.write_pos = 0
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+class LineSearchIndex:
+    """
+    行搜索索引. 行的casefold文字按块连接为一个字符串, 并记录每行在块中的起始位置,
+     搜索时对整个块调用 `str.find`, 再通过二分查找将位置换算为行号, 不需要逐行比较.
+    已经被缓冲区丢弃的行在所在的块完全过期后一并移除.
+
+    Line search index. Case-folded lines are joined per chunk with their start offsets recorded,
+     a search runs `str.find` over whole chunks and bisects the hit positions back to line ids.
+    """
+    CHUNK_LINES = 4096
+    SEPARATOR = "\n"  # 查询中不会出现, 匹配不会跨越两行
+
+    def __init__(self):
+        self.chunk_starts: list[int] = []  # 每块第一行的行号
+        self.chunk_parts: list[list[str]] = []
+        self.chunk_offsets: list[array] = []  # 每块中各行的起始位置
+        self.chunk_texts: list[str | None] = []  # 连接后的块, 追加后失效
+        self.first_id = 0
+
+    def append(self, line_id: int, text: str) -> str:
+        """追加一行, 行号必须连续递增. 返回casefold后的文字"""
+        folded = text.casefold()
+        if not self.chunk_starts or len(self.chunk_parts[-1]) >= self.CHUNK_LINES:
+            self.chunk_starts.append(line_id)
+            self.chunk_parts.append([])
+            self.chunk_offsets.append(array("q"))
+            self.chunk_texts.append(None)
+        parts, offsets = self.chunk_parts[-1], self.chunk_offsets[-1]
+        offsets.append(offsets[-1] + len(parts[-1]) + 1 if parts else 0)
+        parts.append(folded)
+        self.chunk_texts[-1] = None
+        return folded
+
+    def evict_before(self, first_id: int):
+        """行号小于first_id的行已被丢弃"""
+        self.first_id = first_id
+        while len(self.chunk_starts) > 1 and self.chunk_starts[1] <= first_id:
+            del self.chunk_starts[0], self.chunk_parts[0], self.chunk_offsets[0], self.chunk_texts[0]
+
+    def clear(self):
+        self.chunk_starts.clear()
+        self.chunk_parts.clear()
+        self.chunk_offsets.clear()
+        self.chunk_texts.clear()
+
+    def chunk_text(self, index: int) -> str:
+        text = self.chunk_texts[index]
+        if text is None:
+            text = self.chunk_texts[index] = self.SEPARATOR.join(self.chunk_parts[index])
+        return text
+
+    def find(self, query: str, start_id: int = 0) -> list[int]:
+        """返回包含query (不区分大小写) 且行号不小于start_id的所有行号"""
+        query = query.casefold()
+        start_id = max(start_id, self.first_id)
+        result = []
+        first_chunk = max(0, bisect_right(self.chunk_starts, start_id) - 1)
+        for index in range(first_chunk, len(self.chunk_starts)):
+            chunk_start, offsets = self.chunk_starts[index], self.chunk_offsets[index]
+            skip = start_id - chunk_start
+            if skip >= len(offsets):
+                continue
+            text = self.chunk_text(index)
+            pos = text.find(query, offsets[skip] if skip > 0 else 0)
+            while pos != -1:
+                line = bisect_right(offsets, pos) - 1
+                result.append(chunk_start + line)
+                if line + 1 >= len(offsets):
+                    break
+                pos = text.find(query, offsets[line + 1])  # 每行只记录一次
+        return result
+
+    def contains(self, line_id: int, query: str) -> bool:
+        """单独检查一行是否包含已经casefold的query"""
+        if line_id < self.first_id:
+            return False
+        index = bisect_right(self.chunk_starts, line_id) - 1
+        if index < 0:
+            return False
+        line = line_id - self.chunk_starts[index]
+        parts = self.chunk_parts[index]
+        return line < len(parts) and query in parts[line]
+
+    @staticmethod
+    def trim(matches: list[int], first_id: int):
+        """从已排序的匹配列表中移除已被丢弃的行"""
+        del matches[:bisect_left(matches, first_id)]
@@ -1,3 +1,6 @@
+import json
+import tracemalloc
+from contextlib import contextmanager
 from time import perf_counter
 from typing import Union
 
@@ -48,3 +51,136 @@ class Counter:
         return "\n".join(
             f"{n}: {v * 1000:.3f} ms" for n, v in {**self.results, "##Local##": self.local_timer}.items()
         )
+
+
+class AllocationProfiler:
+    """
+    基于tracemalloc的逐帧内存分配统计, 默认关闭, 通过 `GlobalSettings.profile_allocations` 启用.
+    - 每帧前后各取一次快照, 比较得到该帧结束时仍存活的分配及其位置, 累计N帧后输出分配最多的位置
+    - 每个控件的 `draw_content` 记录分配峰值, 包含绘制过程中创建又释放的临时对象
+    tracemalloc无法按位置统计已经释放的分配, 临时对象只能体现在峰值中.
+
+    Per frame allocation profiling with tracemalloc, opt-in.
+    Snapshots around each composite frame give the allocation sites that survive the frame,
+     the peak around each widget's `draw_content` also covers short-lived objects.
+    """
+
+    def __init__(self, frames: int = 120, top: int = 15, traceback_limit: int = 1, export_path: str | None = None):
+        """
+        :param frames: 每累计多少帧输出一次报告
+        :param top: 报告中列出的分配位置数量
+        :param traceback_limit: 记录的调用栈深度, 大于1时按调用栈聚合
+        :param export_path: 报告同时以JSON导出到该路径
+        """
+        self.frames = frames
+        self.top = top
+        self.traceback_limit = traceback_limit
+        self.export_path = export_path
+
+        self.frame_count = 0
+        self.frame_peak = 0
+        self.frame_net: list[int] = []  # 每帧结束时新增的内存
+        self.frame_peaks: list[int] = []  # 每帧的分配峰值
+        self.sites: dict[str, list[int]] = {}  # 分配位置 -> [大小, 数量]
+        self.widgets: dict[str, list[int]] = {}  # 控件类名 -> [绘制次数, 峰值总和, 新增总和]
+
+    def ensure_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.traceback_limit)
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def frame(self):
+        """包裹一次画布合成"""
+        self.ensure_tracing()
+        tracemalloc.reset_peak()
+        self.frame_peak = 0
+        start_size = tracemalloc.get_traced_memory()[0]
+        before = tracemalloc.take_snapshot()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            self.record_frame(before, after, current - start_size, max(self.frame_peak, peak) - start_size)
+
+    @contextmanager
+    def measure(self, widget):
+        """包裹一个控件的 `draw_content`"""
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        start, peak = tracemalloc.get_traced_memory()
+        self.frame_peak = max(self.frame_peak, peak)
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            self.frame_peak = max(self.frame_peak, peak)
+            stats = self.widgets.setdefault(widget.__class__.__name__, [0, 0, 0])
+            stats[0] += 1
+            stats[1] += peak - start
+            stats[2] += current - start
+
+    def record_frame(self, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, net: int, peak: int):
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        key_type = "traceback" if self.traceback_limit > 1 else "lineno"
+        for stat in after.filter_traces(filters).compare_to(before.filter_traces(filters), key_type):
+            if stat.size_diff <= 0:
+                continue
+            site = self.sites.setdefault(" <- ".join(str(frame) for frame in stat.traceback), [0, 0])
+            site[0] += stat.size_diff
+            site[1] += max(0, stat.count_diff)
+        self.frame_net.append(net)
+        self.frame_peaks.append(peak)
+        self.frame_count += 1
+        if self.frame_count >= self.frames:
+            print(self.report())
+            if self.export_path:
+                self.export(self.export_path)
+            self.reset()
+
+    def reset(self):
+        self.frame_count = 0
+        self.frame_net.clear()
+        self.frame_peaks.clear()
+        self.sites.clear()
+        self.widgets.clear()
+
+    def summary(self) -> dict:
+        """报告数据, 可作为回归指标保存"""
+        frames = max(1, self.frame_count)
+        top_sites = sorted(self.sites.items(), key=lambda item: item[1][0], reverse=True)[:self.top]
+        return {
+            "frames": self.frame_count,
+            "net_bytes_per_frame": sum(self.frame_net) / frames,
+            "peak_bytes_per_frame": sum(self.frame_peaks) / frames,
+            "sites": [{"site": site, "bytes_per_frame": size / frames, "blocks_per_frame": count / frames}
+                      for site, (size, count) in top_sites],
+            "widgets": {name: {"draws": draws, "peak_bytes_per_draw": peak / draws, "net_bytes_per_draw": net / draws}
+                        for name, (draws, peak, net) in self.widgets.items()},
+        }
+
+    def report(self) -> str:
+        data = self.summary()
+        lines = [f"Allocations over {data['frames']} frames: "
+                 f"net {data['net_bytes_per_frame'] / 1024:.1f} KiB/frame, "
+                 f"peak {data['peak_bytes_per_frame'] / 1024:.1f} KiB/frame",
+                 "Top allocation sites (surviving the frame):"]
+        for site in data["sites"]:
+            lines.append(f"  {site['bytes_per_frame'] / 1024:8.2f} KiB/frame "
+                         f"{site['blocks_per_frame']:8.1f} blocks/frame  {site['site']}")
+        lines.append("Widgets (draw_content):")
+        for name, stats in sorted(data["widgets"].items(), key=lambda item: item[1]["peak_bytes_per_draw"],
+                                  reverse=True):
+            lines.append(f"  {name}: peak {stats['peak_bytes_per_draw'] / 1024:.2f} KiB/draw, "
+                         f"net {stats['net_bytes_per_draw'] / 1024:.2f} KiB/draw ({stats['draws']} draws)")
+        return "\n".join(lines)
+
+    def export(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
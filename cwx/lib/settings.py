@@ -6,3 +6,14 @@ class GlobalSettings:
     default_caption_theme: FrameTheme = FrameTheme.AUTO
     default_frame_accent: AccentState = AccentState.DONT_SET
     default_backdrop_type: BackdropType = BackdropType.DONT_SET
+
+    adaptive_frame_rate: bool = False  # 根据绘制耗时自动降低动画帧率
+    frame_cpu_budget: float = 0.5  # 自适应帧率时, 绘制可占用的CPU时间比例 (0~1)
+    min_frame_rate: float = 15  # 自适应帧率的最低帧率
+    unfocused_frame_rate: float = 20  # 窗口失去焦点时, 低优先级动画的帧率
+    state_bitmap_cache: bool = False  # 预渲染控件各状态的画面, 状态动画改为位图之间的淡入淡出
+    debug_invalidation: bool = False  # 每秒打印各控件被合并掉的冗余重绘请求数量
+    profile_allocations: bool = False  # 用tracemalloc统计每帧与每个控件绘制的内存分配 (很慢, 仅用于分析)
+    allocation_profile_frames: int = 120  # 每累计多少帧输出一次分配报告
+    allocation_profile_export: str | None = None  # 分配报告同时以JSON导出到该路径
+    theme_snapshot: str | None = None  # 预编译主题快照的路径, 默认主题从快照读取, 快照过期时实时计算并重新写入
@@ -1,12 +1,25 @@
 import wx
 
-from ..dpi import SCALE
+from ..dpi import DEFAULT_SCALE_CONTEXT, get_scale_context
+
+
+def sizer_scale(sizer: wx.Sizer, window: wx.Window | None) -> float:
+    """
+    布局器添加间隔时使用的缩放: 指定的窗口或布局器所属窗口的顶层窗口的缩放, 都没有时使用默认缩放.
+    窗口缩放改变时, 已添加的间隔由 `rescale_sizer` 按比例调整
+    """
+    window = window or sizer.GetContainingWindow()
+    return get_scale_context(window).scale if window else DEFAULT_SCALE_CONTEXT.scale
 
 
 class ScaledBoxSizer(wx.BoxSizer):
-    def __init__(self, orient: int = wx.HORIZONTAL, out_spacer: int = 0):
+    def __init__(self, orient: int = wx.HORIZONTAL, out_spacer: int = 0, window: wx.Window | None = None):
+        """
+        :param window: 布局器所属的窗口, 间隔按其顶层窗口的缩放转换; 未指定时使用SetSizer设置的所属窗口
+        """
         super().__init__(orient)
         self.out_spacer = out_spacer
+        self.window = window
 
     def __enter__(self):
         if self.out_spacer != 0:
@@ -18,16 +31,20 @@ class ScaledBoxSizer(wx.BoxSizer):
             self.AddSpacer(self.out_spacer)
 
     def AddSpacer(self, size):
-        super().AddSpacer(round(size * SCALE))
+        super().AddSpacer(round(size * sizer_scale(self, self.window)))
 
 
 class PaddedBoxSizer(wx.BoxSizer):
-    def __init__(self, orient: int = wx.HORIZONTAL, padx: int = 0, pady: int = 0):
+    def __init__(self, orient: int = wx.HORIZONTAL, padx: int = 0, pady: int = 0, window: wx.Window | None = None):
+        """
+        :param window: 布局器所属的窗口, 间隔按其顶层窗口的缩放转换; 未指定时使用SetSizer设置的所属窗口
+        """
         super().__init__(wx.VERTICAL if orient == wx.HORIZONTAL else wx.HORIZONTAL)
         self.orient = orient
         self.real_sizer = wx.BoxSizer(orient)
         self.padx = padx
         self.pady = pady
+        self.window = window
 
         if orient == wx.HORIZONTAL:
             self.add_pad(super(), self.padx)
@@ -39,14 +56,13 @@ class PaddedBoxSizer(wx.BoxSizer):
         elif orient == wx.VERTICAL:
             self.add_pad(super(), self.pady)
 
-    @staticmethod
-    def add_pad(sizer: wx.BoxSizer, abs_size: int):
+    def add_pad(self, sizer: wx.BoxSizer, abs_size: int):
         if abs_size == 0:
             return
         if abs_size == -1:
             sizer.AddStretchSpacer(1)
         else:
-            sizer.AddSpacer(round(abs_size * SCALE))
+            sizer.AddSpacer(round(abs_size * sizer_scale(self, self.window)))
 
     def __enter__(self):
         if self.orient == wx.HORIZONTAL:
@@ -71,4 +87,4 @@ class PaddedBoxSizer(wx.BoxSizer):
         self.real_sizer.AddStretchSpacer(prop)
 
     def AddSpacer(self, size):
-        self.real_sizer.AddSpacer(round(size * SCALE))
+        self.real_sizer.AddSpacer(round(size * sizer_scale(self, self.window)))
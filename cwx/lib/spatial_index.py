@@ -0,0 +1,184 @@
+"""
+空间索引与命中测试, 用于在大量可交互区域中快速找到某一点下的元素
+Spatial index and hit testing, finds the element under a point quickly among many interactive regions.
+"""
+import math
+from typing import Callable, Generic, Hashable, Iterator, NamedTuple, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+Rect = tuple[float, float, float, float]  # x, y, 宽, 高
+
+
+def rect_contains(rect: Rect, x: float, y: float) -> bool:
+    return rect[0] <= x < rect[0] + rect[2] and rect[1] <= y < rect[1] + rect[3]
+
+
+def rect_intersects(a: Rect, b: Rect) -> bool:
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+class GridIndex(Generic[T]):
+    """
+    均匀网格空间索引, 元素登记在其矩形覆盖的所有网格单元中, 点查询只检查所在单元内的元素.
+    元素重叠时, Z序大的 (后插入的) 在上层.
+
+    Uniform grid spatial index, an element is registered in every cell its rectangle covers,
+     a point query only checks the elements of one cell. Overlapping elements are ordered by z, later ones on top.
+    """
+
+    def __init__(self, cell_size: float = 64):
+        self.cell_size = max(1.0, float(cell_size))
+        self.cells: dict[tuple[int, int], list[T]] = {}
+        self.rects: dict[T, Rect] = {}
+        self.z_order: dict[T, int] = {}
+        self.next_z = 0
+
+    def __len__(self):
+        return len(self.rects)
+
+    def __contains__(self, item: T) -> bool:
+        return item in self.rects
+
+    def cells_of(self, rect: Rect) -> Iterator[tuple[int, int]]:
+        """矩形覆盖的网格单元, 空矩形不覆盖任何单元"""
+        x, y, w, h = rect
+        if w <= 0 or h <= 0:
+            return
+        size = self.cell_size
+        # 右、下边界不属于矩形, 刚好落在网格线上时不应登记到下一个单元
+        for cx in range(math.floor(x / size), math.ceil((x + w) / size)):
+            for cy in range(math.floor(y / size), math.ceil((y + h) / size)):
+                yield cx, cy
+
+    def insert(self, item: T, rect: Rect, z: int | None = None):
+        """插入元素, 已存在时更新其矩形, 未指定Z序时保留原来的Z序 (新元素置于最上层)"""
+        if item in self.rects:
+            if z is None:
+                z = self.z_order[item]
+            self.remove(item)
+        if z is None:
+            z = self.next_z
+        self.next_z = max(self.next_z, z + 1)
+        self.rects[item] = rect
+        self.z_order[item] = z
+        for cell in self.cells_of(rect):
+            self.cells.setdefault(cell, []).append(item)
+
+    def update(self, item: T, rect: Rect):
+        """更新元素的矩形, 矩形不变时不做任何事"""
+        if self.rects.get(item) != rect:
+            self.insert(item, rect)
+
+    def remove(self, item: T):
+        rect = self.rects.pop(item, None)
+        if rect is None:
+            return
+        self.z_order.pop(item)
+        for cell in self.cells_of(rect):
+            items = self.cells[cell]
+            items.remove(item)
+            if not items:
+                del self.cells[cell]
+
+    def clear(self):
+        self.cells.clear()
+        self.rects.clear()
+        self.z_order.clear()
+        self.next_z = 0
+
+    def get_rect(self, item: T) -> Rect | None:
+        return self.rects.get(item)
+
+    def query_point(self, x: float, y: float, predicate: Callable[[T], bool] | None = None) -> T | None:
+        """
+        返回包含该点的最上层元素, 没有时返回None
+        :param predicate: 过滤元素, 返回False的元素视为不存在 (如隐藏的元素)
+        """
+        size = self.cell_size
+        items = self.cells.get((math.floor(x / size), math.floor(y / size)))
+        if not items:
+            return None
+        rects, z_order = self.rects, self.z_order
+        best, best_z = None, -1
+        for item in items:
+            z = z_order[item]
+            if z > best_z and rect_contains(rects[item], x, y) and (predicate is None or predicate(item)):
+                best, best_z = item, z
+        return best
+
+    def query_rect(self, rect: Rect) -> list[T]:
+        """返回与矩形相交的所有元素, 按Z序从下到上排列"""
+        found: set[T] = set()
+        for cell in self.cells_of(rect):
+            for item in self.cells.get(cell, ()):
+                if item not in found and rect_intersects(self.rects[item], rect):
+                    found.add(item)
+        return sorted(found, key=self.z_order.__getitem__)
+
+
+class HoverChange(NamedTuple):
+    left: object | None  # 鼠标离开的元素
+    entered: object | None  # 鼠标进入的元素
+
+
+class HitTester(Generic[T]):
+    """
+    命中测试器, 用空间索引登记可交互区域, 并记录鼠标当前悬停的区域.
+    鼠标移动时只在命中的区域改变时返回离开/进入的变化, 在同一区域内移动不产生任何变化.
+
+    Hit tester, interactive regions are registered in a spatial index and the hovered region is tracked.
+     A pointer move reports a leave/enter transition only when the hit region actually changes.
+    """
+
+    def __init__(self, cell_size: float = 64):
+        self.index: GridIndex[T] = GridIndex(cell_size)
+        self.hovered: T | None = None
+        self.pointer: tuple[float, float] | None = None  # 最后一次已知的鼠标位置, 鼠标不在窗口中时为None
+
+    def set_region(self, item: T, rect: Rect):
+        """登记或更新一个区域, 应在布局改变时调用"""
+        self.index.update(item, rect)
+
+    def remove_region(self, item: T):
+        self.index.remove(item)
+        if self.hovered == item:
+            self.hovered = None
+
+    def clear(self):
+        self.index.clear()
+        self.hovered = None
+
+    def hit(self, x: float, y: float, predicate: Callable[[T], bool] | None = None) -> T | None:
+        return self.index.query_point(x, y, predicate)
+
+    def move_pointer(self, x: float, y: float, predicate: Callable[[T], bool] | None = None) -> HoverChange | None:
+        """更新鼠标位置, 悬停的区域改变时返回变化"""
+        self.pointer = (x, y)
+        return self.set_hovered(self.hit(x, y, predicate))
+
+    def leave(self) -> HoverChange | None:
+        """鼠标离开窗口"""
+        self.pointer = None
+        return self.set_hovered(None)
+
+    def refresh_hover(self, predicate: Callable[[T], bool] | None = None) -> HoverChange | None:
+        """区域移动后, 以最后一次已知的鼠标位置重新计算悬停的区域"""
+        if self.pointer is None:
+            return None
+        return self.move_pointer(*self.pointer, predicate)
+
+    def track(self, event, predicate: Callable[[T], bool] | None = None) -> HoverChange | None:
+        """
+        根据鼠标事件 (wx.MouseEvent) 更新悬停的区域, 同一事件重复调用时不会产生变化
+        Update the hovered region from a mouse event, calling it again with the same event reports no change.
+        """
+        if event.Leaving():
+            return self.leave()
+        return self.move_pointer(*event.GetPosition(), predicate)
+
+    def set_hovered(self, item: T | None) -> HoverChange | None:
+        if item == self.hovered:
+            return None
+        change = HoverChange(self.hovered, item)
+        self.hovered = item
+        return change
@@ -0,0 +1,140 @@
+"""
+视口缓存, 将可滚动内容的可见部分保存为一张图片.
+滚动时平移已有的像素, 只绘制新露出的条带; 内容局部改变时只重新绘制失效的区域.
+
+Viewport cache, the visible part of scrollable content is kept as one image.
+ Scrolling shifts the cached pixels and only renders the newly exposed strip,
+ a local content change only re-renders the invalidated rectangles.
+"""
+from typing import Callable, Hashable
+
+import wx
+
+from .spatial_index import Rect
+from ..render import CustomGraphicsContext
+
+# 绘制函数, 在内容坐标系中绘制矩形区域 (x, y, 宽, 高) 内的内容
+Painter = Callable[[CustomGraphicsContext, Rect], None]
+
+
+class ViewportCache:
+    """
+    视口缓存. 图片以RGB与Alpha两段字节保存, 平移只是字节的切片与拼接, 不需要重新绘制.
+    坐标均为像素, 视口原点为视口左上角在内容中的位置.
+    """
+
+    def __init__(self):
+        self.size: tuple[int, int] | None = None  # 视口大小
+        self.origin: tuple[int, int] = (0, 0)  # 视口原点
+        self.key: Hashable = None  # 影响全部内容的参数 (缩放、样式等), 改变时整个视口重新绘制
+        self.rgb: bytearray | None = None
+        self.alpha: bytearray | None = None
+        self.bitmap: wx.GraphicsBitmap | None = None
+        self.dirty: list[Rect] = []  # 失效的区域 (内容坐标)
+
+    def invalidate(self):
+        """丢弃缓存, 下一次获取时重新绘制整个视口"""
+        self.rgb = self.alpha = self.bitmap = None
+        self.dirty.clear()
+
+    def invalidate_rect(self, rect: Rect):
+        """使内容中的一个区域失效, 下一次获取时只重新绘制视口中与之相交的部分"""
+        if self.rgb is not None:
+            self.dirty.append(rect)
+
+    def get_bitmap(self, window: wx.Window, size: tuple[int, int], origin: tuple[int, int], key: Hashable,
+                   painter: Painter) -> wx.GraphicsBitmap | None:
+        """
+        获取视口的位图, 视口大小为0时返回None
+        :param window: 绘制的控件, 用于初始化绘制上下文的字体与缩放
+        :param size: 视口大小
+        :param origin: 视口原点, 与上一次不同时平移缓存的像素
+        :param key: 影响全部内容的参数
+        :param painter: 绘制函数, 只会被要求绘制视口内需要更新的区域
+        """
+        w, h = size
+        if w <= 0 or h <= 0:
+            return None
+        dx, dy = origin[0] - self.origin[0], origin[1] - self.origin[1]
+        if self.rgb is None or size != self.size or key != self.key or abs(dx) >= w or abs(dy) >= h:
+            self.size, self.origin, self.key = size, origin, key
+            self.dirty.clear()
+            self.rgb, self.alpha = self.render(window, painter, (origin[0], origin[1], w, h))
+            self.bitmap = None
+        else:
+            if dx or dy:
+                self.shift(dx, dy)
+                self.origin = origin
+                # 新露出的条带
+                ox, oy = origin
+                if dy > 0:
+                    self.dirty.append((ox, oy + h - dy, w, dy))
+                elif dy < 0:
+                    self.dirty.append((ox, oy, w, -dy))
+                if dx > 0:
+                    self.dirty.append((ox + w - dx, oy, dx, h))
+                elif dx < 0:
+                    self.dirty.append((ox, oy, -dx, h))
+            if self.dirty:
+                for rect in self.dirty:
+                    self.repaint(window, painter, rect)
+                self.dirty.clear()
+                self.bitmap = None
+
+        if self.bitmap is None:
+            image = wx.Image(w, h, bytes(self.rgb), bytes(self.alpha))
+            self.bitmap = wx.GraphicsRenderer.GetDefaultRenderer().CreateBitmapFromImage(image)
+        return self.bitmap
+
+    @staticmethod
+    def render(window: wx.Window, painter: Painter, rect: Rect) -> tuple[bytearray, bytearray]:
+        """将内容中的一个区域绘制到透明图片上, 返回图片的RGB与Alpha字节"""
+        x, y, w, h = rect
+        image = wx.Image(w, h, clear=True)
+        image.SetAlpha(bytes(w * h))
+        gc = CustomGraphicsContext(wx.GraphicsContext.Create(image), window)
+        gc.Translate(-x, -y)
+        painter(gc, rect)
+        gc.Destroy()
+        return bytearray(image.GetData()), bytearray(image.GetAlpha())
+
+    def shift(self, dx: int, dy: int):
+        """将缓存的像素平移 (-dx, -dy), 空出的部分为透明"""
+        w, h = self.size
+        src_x, dst_x = (dx, 0) if dx >= 0 else (0, -dx)
+        src_y, dst_y = (dy, 0) if dy >= 0 else (0, -dy)
+        copy_w, copy_h = w - abs(dx), h - abs(dy)
+        rgb, alpha = self.rgb, self.alpha
+        new_rgb, new_alpha = bytearray(w * h * 3), bytearray(w * h)
+        if dx == 0:  # 整行连续, 一次切片即可
+            start, end, dst = src_y * w, (src_y + copy_h) * w, dst_y * w
+            new_rgb[dst * 3:(dst + end - start) * 3] = rgb[start * 3:end * 3]
+            new_alpha[dst:dst + end - start] = alpha[start:end]
+        else:
+            for row in range(copy_h):
+                src = (src_y + row) * w + src_x
+                dst = (dst_y + row) * w + dst_x
+                new_rgb[dst * 3:(dst + copy_w) * 3] = rgb[src * 3:(src + copy_w) * 3]
+                new_alpha[dst:dst + copy_w] = alpha[src:src + copy_w]
+        self.rgb, self.alpha = new_rgb, new_alpha
+
+    def repaint(self, window: wx.Window, painter: Painter, rect: Rect):
+        """重新绘制失效区域与视口相交的部分, 并替换缓存中对应的像素"""
+        (ox, oy), (w, h) = self.origin, self.size
+        x0, y0 = max(int(rect[0]), ox), max(int(rect[1]), oy)
+        x1 = min(int(rect[0] + rect[2] + 0.999), ox + w)
+        y1 = min(int(rect[1] + rect[3] + 0.999), oy + h)
+        if x1 <= x0 or y1 <= y0:
+            return
+        part_w, part_h = x1 - x0, y1 - y0
+        part_rgb, part_alpha = self.render(window, painter, (x0, y0, part_w, part_h))
+        left, top = x0 - ox, y0 - oy
+        if part_w == w:
+            self.rgb[top * w * 3:(top + part_h) * w * 3] = part_rgb
+            self.alpha[top * w:(top + part_h) * w] = part_alpha
+            return
+        for row in range(part_h):
+            src = row * part_w
+            dst = (top + row) * w + left
+            self.rgb[dst * 3:(dst + part_w) * 3] = part_rgb[src * 3:(src + part_w) * 3]
+            self.alpha[dst:dst + part_w] = part_alpha[src:src + part_w]
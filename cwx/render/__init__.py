@@ -11,7 +11,7 @@ from PIL import ImageFont
 from win32.lib.win32con import GDI_ERROR
 from win32gui import CreateCompatibleDC, SelectObject, DeleteDC
 
-from cwx.dpi import SCALE
+from cwx.dpi import get_scale_context
 from cwx.render.constants import CenterAlign
 from cwx.render.text_render import TextAttr, TextParagraph, AdvancedText, TextRender
 
@@ -62,6 +62,7 @@ class CustomGraphicsContext(JumpSubClassCheck.GCType):
     current_font: wx.Font
     current_font_color: wx.Colour
     is_dark: bool
+    scale: float  # 绘制目标窗口的DPI缩放
 
     def __new__(cls, *args, **kwargs):
         if cls.TRANSPARENT_BRUSH is None:
@@ -88,6 +89,7 @@ class CustomGraphicsContext(JumpSubClassCheck.GCType):
         self.current_font: wx.Font = window.GetFont()
         self.current_font_color: wx.Colour = window.GetForegroundColour()
         self.is_dark = getattr(window, "gen_style").is_dark if hasattr(window, "gen_style") else False
+        self.scale = get_scale_context(window).scale
 
     # 为日常调用提供重定向
     def __getattr__(self, name):
@@ -139,7 +141,7 @@ class CustomGraphicsContext(JumpSubClassCheck.GCType):
 
         # 渲染文本
         color = self.current_font_color if color is None else color
-        text_bitmap = TextRender.render(self, text, color, SCALE)
+        text_bitmap = TextRender.render(self, text, color, self.scale)
 
         # 计算坐标偏移
         center_align = CenterAlign.format(center_align)
@@ -165,17 +167,27 @@ class CustomGraphicsContext(JumpSubClassCheck.GCType):
         """获取文字的边缘框, 格式为(width, height, x, y)"""
         text = self.ConvertText(string, attr)
         logical_rect, ink_rect = TextRender.get_text_bbox(text)
-        return ink_rect.width * SCALE, ink_rect.height * SCALE, ink_rect.x * SCALE, ink_rect.y * SCALE
+        scale = self.scale
+        return ink_rect.width * scale, ink_rect.height * scale, ink_rect.x * scale, ink_rect.y * scale
 
     def GetTextExtent(self, string: str | AdvancedText, attr: TextAttr | None = None):
         """获取文字的边缘框, 宽度和高度"""
         w, h, x, y = self.GetFullTextExtent(string, attr)
         return w, h
 
+    def GetTextWidths(self, strings: list[str], attr: TextAttr | None = None) -> list[float]:
+        """以当前字体批量获取多段文字的逻辑宽度, 用于测量大量单元格等场景"""
+        self.ensure_font()
+        text_attr = TextAttr.from_wx_font(self.current_font)
+        if attr is not None:
+            text_attr.merge(attr)
+        scale = self.scale
+        return [w * scale for w, h in TextRender.measure_texts(strings, text_attr)]
+
     def GetPartialTextExtents(self, string: str | AdvancedText, attr: TextAttr | None = None):
         """获取每个字符的渲染x坐标列表"""
         text = self.ConvertText(string, attr)
-        return list(map(lambda x: x * SCALE, TextRender.get_partial_text_extents(text)))
+        return list(map(lambda x: x * self.scale, TextRender.get_partial_text_extents(text)))
 
     # endregion
 
@@ -185,6 +197,32 @@ class CustomGraphicsContext(JumpSubClassCheck.GCType):
             self.Translate(x, y)
             GCRender.RenderInnerRoundedRect(self.gc, border_width, radius, w, h)
 
+    def DrawChrome(self, x: float, y: float, w: float, h: float, radius: float, border_width: float,
+                   fill: wx.Colour, stroke: wx.Colour | None, pen_style: int = wx.PENSTYLE_SOLID,
+                   pen_width: float | None = None, cached: bool = True):
+        """
+        绘制控件的外框 (纯色背景与边框), 与DrawInnerRoundedRect的形状相同, 但使用九宫格缓存拼接.
+        大小不是整数时回退到直接绘制路径.
+        Draw control chrome (solid fill and border), same shape as DrawInnerRoundedRect but assembled from
+         cached nine-slice bitmaps, falls back to path drawing for non-integer sizes.
+        :param cached: 颜色每帧都在改变 (如颜色动画播放中) 时应传入False, 直接绘制路径,
+         避免为只使用一次的颜色栅格化九宫格并挤出静态控件的缓存
+        """
+        if w <= 0 or h <= 0:
+            return
+        if not cached or w != int(w) or h != int(h):
+            if stroke is None:
+                self.SetPen(self.TRANSPARENT_PEN)
+            else:
+                pen_width = border_width if pen_width is None else pen_width
+                self.SetPen(self.CreatePen(wx.GraphicsPenInfo(stroke, pen_width, pen_style)))
+            self.SetBrush(self.CreateBrush(wx.Brush(fill)))
+            self.DrawInnerRoundedRect(x, y, w, h, radius, border_width)
+            return
+        from .nine_slice import get_nine_slice
+        get_nine_slice(int(w), int(h), radius, border_width, fill, stroke, self.scale, pen_style, pen_width) \
+            .draw(self.gc, x, y, int(w), int(h))
+
     def DrawCircle(self, x: float, y: float, r: float):
         """绘制一个圆形"""
         with self.State:
@@ -237,13 +275,11 @@ GetFontData.restype = wintypes.DWORD
 
 class GCRender:
     FONT_CVT_CACHE: dict[tuple[int, float], ImageFont.FreeTypeFont] = {}
-    SPACING = int(6 * SCALE)
-    OFFSET = int(3 * SCALE)
 
     @staticmethod
-    def GetFontByHandle(wx_font: wx.Font) -> ImageFont.FreeTypeFont:
+    def GetFontByHandle(wx_font: wx.Font, scale: float) -> ImageFont.FreeTypeFont:
         font_size = (wx_font.GetPointSize() if hasattr(wx_font,
-                                                       "CWX_RAW_SIZE") else wx_font.GetPointSize() * SCALE) / 0.75
+                                                       "CWX_RAW_SIZE") else wx_font.GetPointSize() * scale) / 0.75
         cache_key = (int(typing.cast(int, wx_font.GetHFONT())), font_size)
         if cache_key in GCRender.FONT_CVT_CACHE:
             return GCRender.FONT_CVT_CACHE[cache_key]
@@ -0,0 +1,120 @@
+"""
+九宫格控件外框缓存, 圆角矩形的背景与边框按参数光栅化一次, 任意大小由角、边与中心切片拼接而成
+Nine-slice chrome cache, the fill and border of a rounded rectangle are rasterized once per parameter set,
+ any size is assembled from corner, edge and centre slices.
+"""
+import math
+from collections import OrderedDict
+from typing import NamedTuple
+
+import wx
+
+MAX_CHROME_CACHE = 256  # 最多缓存的外框数量
+
+
+class ChromeKey(NamedTuple):
+    radius: float
+    border_width: float
+    pen_width: float
+    fill: int  # RGBA
+    stroke: int | None  # RGBA, None为无边框
+    pen_style: int
+    tile_width: int
+    tile_height: int
+    scale: float
+
+
+def corner_size(radius: float, border_width: float) -> int:
+    """角切片的大小, 圆角只会出现在该范围内, 之外的每一行(列)像素都相同"""
+    offset = 0 if border_width == 1.0 else border_width / 2
+    return math.ceil(max(offset, border_width - offset) + radius)
+
+
+def axis_slices(length: int, tile: int, corner: int) -> list[tuple[int, int, int, int]]:
+    """
+    计算一个方向上的切片, 返回 (源起点, 源长度, 目标起点, 目标长度) 列表.
+    原图不足 两个角 + 一像素 时 (此时原图与控件等长), 直接使用整条原图, 否则中间的一像素会被拉伸.
+    """
+    if tile <= corner * 2:
+        return [(0, tile, 0, length)]
+    return [(0, corner, 0, corner),
+            (corner, 1, corner, length - corner * 2),
+            (corner + 1, corner, length - corner, corner)]
+
+
+class NineSlice:
+    """一组已光栅化的外框切片"""
+
+    def __init__(self, key: ChromeKey):
+        self.key = key
+        self.corner = corner_size(key.radius, key.border_width)
+        self.bitmap = self.rasterize(key)
+
+        renderer = wx.GraphicsRenderer.GetDefaultRenderer()
+        cols = axis_slices(key.tile_width, key.tile_width, self.corner)
+        rows = axis_slices(key.tile_height, key.tile_height, self.corner)
+        self.slices: list[list[wx.GraphicsBitmap]] = [
+            [renderer.CreateSubBitmap(self.bitmap, sx, sy, sw, sh) for sy, sh, _, _ in rows]
+            for sx, sw, _, _ in cols
+        ]
+
+    @staticmethod
+    def rasterize(key: ChromeKey) -> wx.GraphicsBitmap:
+        from cwx.render import GCRender
+
+        image = wx.Image(key.tile_width, key.tile_height, clear=True)
+        image.SetAlpha(bytes(key.tile_width * key.tile_height))
+        gc = wx.GraphicsContext.Create(image)
+        if key.stroke is None:
+            gc.SetPen(wx.TRANSPARENT_PEN)
+        else:
+            stroke = wx.Colour()
+            stroke.SetRGBA(key.stroke)
+            gc.SetPen(gc.CreatePen(wx.GraphicsPenInfo(stroke, key.pen_width, key.pen_style)))
+        fill = wx.Colour()
+        fill.SetRGBA(key.fill)
+        gc.SetBrush(gc.CreateBrush(wx.Brush(fill)))
+        GCRender.RenderInnerRoundedRect(gc, key.border_width, key.radius, key.tile_width, key.tile_height)
+        gc.Destroy()
+        return wx.GraphicsRenderer.GetDefaultRenderer().CreateBitmapFromImage(image)
+
+    def draw(self, gc: wx.GraphicsContext, x: float, y: float, w: int, h: int):
+        cols = axis_slices(w, self.key.tile_width, self.corner)
+        rows = axis_slices(h, self.key.tile_height, self.corner)
+        quality = gc.GetInterpolationQuality()
+        gc.SetInterpolationQuality(wx.INTERPOLATION_NONE)  # 拉伸单像素切片时不与相邻像素混合
+        for col_slices, (_, _, dx, dw) in zip(self.slices, cols):
+            if dw <= 0:
+                continue
+            for bitmap, (_, _, dy, dh) in zip(col_slices, rows):
+                if dh > 0:
+                    gc.DrawBitmap(bitmap, x + dx, y + dy, dw, dh)
+        gc.SetInterpolationQuality(quality)
+
+
+CHROME_CACHE: OrderedDict[ChromeKey, NineSlice] = OrderedDict()
+
+
+def tile_length(length: int, corner: int) -> int:
+    """原图在一个方向上的长度, 控件足够大时为 两个角 + 一像素"""
+    return min(length, corner * 2 + 1)
+
+
+def get_nine_slice(w: int, h: int, radius: float, border_width: float, fill: wx.Colour, stroke: wx.Colour | None,
+                   scale: float, pen_style: int = wx.PENSTYLE_SOLID, pen_width: float | None = None) -> NineSlice:
+    """
+    获取绘制指定大小外框的九宫格, 缓存按最近使用淘汰
+    :param scale: 目标窗口的DPI缩放, 不同缩放的窗口使用各自的切片
+    """
+    corner = corner_size(radius, border_width)
+    key = ChromeKey(radius, border_width, border_width if pen_width is None else pen_width,
+                    fill.GetRGBA(), None if stroke is None else stroke.GetRGBA(), pen_style,
+                    tile_length(w, corner), tile_length(h, corner), scale)
+    chrome = CHROME_CACHE.get(key)
+    if chrome is None:
+        chrome = CHROME_CACHE[key] = NineSlice(key)
+        if len(CHROME_CACHE) > MAX_CHROME_CACHE:
+            CHROME_CACHE.popitem(last=False)
+    else:
+        CHROME_CACHE.move_to_end(key)
+    return chrome
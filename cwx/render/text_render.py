@@ -2,7 +2,7 @@ from collections import namedtuple
 from dataclasses import dataclass
 from io import BytesIO
 from math import ceil
-from typing import Union
+from typing import Iterable, Union
 
 from PIL import Image, ImageEnhance
 
@@ -139,6 +139,8 @@ class TextRender:
     """Text Render of CustomWxpython"""
     MAX_CACHE_SIZE = 1000
     FONT_CACHE: dict[int, TextBitmap] = {}
+    MAX_MEASURE_CACHE_SIZE = 20000
+    MEASURE_CACHE: dict[tuple[str, int], tuple[float, float]] = {}  # (文字, 属性哈希) -> 逻辑宽高
 
     enable_text_enhance = True
     enhance_factor = 0.25
@@ -176,6 +178,39 @@ class TextRender:
         return (SimpleRect(log_r.x / P_SCALE, log_r.y / P_SCALE, log_r.width / P_SCALE, log_r.height / P_SCALE),
                 SimpleRect(ink_r.x / P_SCALE, ink_r.y / P_SCALE, ink_r.width / P_SCALE, ink_r.height / P_SCALE))
 
+    @classmethod
+    def measure_texts(cls, texts: Iterable[str], attr: TextAttr | None = None) -> list[tuple[float, float]]:
+        """
+        批量测量文字的逻辑宽高, 未经过dpi换算. 所有文字共用一个布局, 不为每段文字创建cairo表面与布局.
+        结果按 (文字, 属性) 缓存.
+        Measure many strings with one shared layout, results are memoized by (text, attr).
+        """
+        attr = attr if attr is not None else TextAttr()
+        attr_hash = hash(attr)
+        cache = cls.MEASURE_CACHE
+        results: list[tuple[float, float] | None] = []
+        missing: list[int] = []
+        for i, text in enumerate(texts):
+            size = cache.get((text, attr_hash))
+            results.append(size)
+            if size is None:
+                missing.append(i)
+        if not missing:
+            return results
+
+        template = AdvancedText(global_attr=attr)
+        layout = cls.create_test_layout(template)
+        texts = texts if isinstance(texts, list) else list(texts)
+        for i in missing:
+            template.text = texts[i]
+            layout.apply_markup(template.as_html())
+            log_r, _ = layout.get_extents()
+            size = results[i] = (log_r.width / P_SCALE, log_r.height / P_SCALE)
+            if len(cache) >= cls.MAX_MEASURE_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            cache[(texts[i], attr_hash)] = size
+        return results
+
     @classmethod
     def get_partial_text_extents(cls, text: AdvancedText) -> list[float]:
         """获取每个字符的渲染x"""
@@ -192,11 +227,16 @@ class TextRender:
 
     @classmethod
     def render(cls, gc: wx.GraphicsContext, text: AdvancedText, color: wx.Colour,
-               render_scale: float = 1) -> TextBitmap:
-        # 测试缓存
-        text_hash = hash(text) + hash(color.Get())
-        if text_hash in TextRender.FONT_CACHE:
-            return TextRender.FONT_CACHE[text_hash]
+               render_scale: float = 1, cache: bool = True) -> TextBitmap:
+        """
+        :param cache: 是否使用全局文字缓存. 自行缓存结果的调用者 (如日志视图的逐行缓存) 应传入False,
+         避免大量只绘制一次的文字挤出其他控件的缓存
+        """
+        # 测试缓存, 不同缩放的窗口使用各自的文字位图
+        if cache:
+            text_hash = hash((hash(text), color.Get(), render_scale))
+            if text_hash in TextRender.FONT_CACHE:
+                return TextRender.FONT_CACHE[text_hash]
 
         logical_rect, ink_rect = TextRender.get_text_bbox(text)
 
@@ -246,6 +286,8 @@ class TextRender:
             logical_rect=logical_rect,
             ink_rect=ink_rect
         )
+        if not cache:
+            return result
         if len(TextRender.FONT_CACHE) >= TextRender.MAX_CACHE_SIZE:
             # 移除最旧的缓存项
             oldest_key = next(iter(TextRender.FONT_CACHE))
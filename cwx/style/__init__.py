@@ -1,4 +1,4 @@
-from typing import TypeVar
+from typing import Hashable, TypeVar
 
 from cwx.style.frame.dwm import DWM_SYSTEMBACKDROP_TYPE, ACCENT_STATE
 from .color import *
@@ -18,15 +18,26 @@ class Style:
         """注册一个样式类, 应当在WidgetStyle子类定义时调用"""
         cls.REGISTERED_STYLES[style_cls.__name__] = style_cls
 
-    styles: dict[str, 'WidgetStyle'] = {}
+    styles: dict[str, 'WidgetStyle']  # 已生成的组件样式, 每个主题实例独有
+    frozen: bool = False  # 缓存的共享主题不可修改
 
     def as_type(self, cls: type[WS_T]) -> WS_T | None:
-        """指定要获取的样式类并尝试返回对应的样式类"""
-        return self.styles[cls.__name__]
+        """指定要获取的样式类并尝试返回对应的样式类, 组件样式在第一次获取时生成"""
+        widget_style = self.styles.get(cls.__name__)
+        if widget_style is None:
+            widget_style = self.styles[cls.__name__] = cls.load(self)
+            if self.frozen:
+                widget_style.freeze()
+        return widget_style
 
     def as_type_str(self, name: str):
-        """指定要获取的样式类并尝试返回对应的样式类"""
-        return self.styles[name]
+        """指定要获取的样式类并尝试返回对应的样式类, 组件样式在第一次获取时生成"""
+        widget_style = self.styles.get(name)
+        if widget_style is None:
+            widget_style = self.styles[name] = self.REGISTERED_STYLES[name].load(self)
+            if self.frozen:
+                widget_style.freeze()
+        return widget_style
 
     frame_style: 'TopLevelStyle'
     btn_style: 'BtnStyle'
@@ -40,6 +51,7 @@ class Style:
         if colors is None:
             colors = Colors.default(self.is_dark)
         self.colors = colors
+        self.styles = {}
 
         self.load()
 
@@ -68,11 +80,26 @@ class Style:
         return self.as_type_str("ToggleSwitchStyle")
 
     def load(self):
-        """初始化各种组件主题"""
+        """
+        初始化各种组件主题, 已生成的组件样式被丢弃, 之后在第一次获取时以当前颜色重新生成
+        Reset widget styles, they are materialized again on first access with the current colors.
+        """
+        self.check_writable()
         self.default_style = EmptyStyle.load(self)
-        for style_cls in self.REGISTERED_STYLES.values():
-            print(style_cls)
-            self.styles[style_cls.__name__] = style_cls.load(self)
+        self.styles.clear()
+
+    def freeze(self) -> 'Style':
+        """冻结主题, 之后主题与其组件样式都不可修改, 用于多个窗口共享的缓存主题"""
+        self.frozen = True
+        freeze_color_value(self.colors)
+        self.default_style.freeze()
+        for widget_style in self.styles.values():
+            widget_style.freeze()
+        return self
+
+    def check_writable(self):
+        if self.frozen:
+            raise TypeError("This Style is a cached shared theme and is read-only, modify a copy() of it instead")
 
     @staticmethod
     def sys_is_dark():
@@ -81,6 +108,7 @@ class Style:
 
     def set_as_light(self):
         """设置主题为亮色模式, 将会以变更过后的颜色重新加载组件主题, 建议直接使用Style(False)"""
+        self.check_writable()
         self.colors = Colors.default(False)
         self.is_dark = False
 
@@ -90,6 +118,7 @@ class Style:
 
     def set_as_dark(self):
         """设置主题为暗色模式, 将会以变更过后的颜色重新加载组件主题, 建议直接使用Style(True)"""
+        self.check_writable()
         self.colors = Colors.default(True)
         self.is_dark = True
 
@@ -97,28 +126,53 @@ class Style:
         # self.frame_style.caption_theme = FrameTheme.DARK
         return self
 
-    def copy(self):
-        """创建主题的副本"""
-        from copy import deepcopy
-        return deepcopy(self)
+    def copy(self) -> 'Style':
+        """
+        创建可修改的主题副本. 颜色表与已生成的组件样式中的颜色都被复制, 修改副本不影响原主题;
+         原主题中共享的颜色在副本中同样共享. 尚未生成的组件样式在第一次获取时以副本的颜色生成.
+        Create a writable copy, the colors and the materialized widget styles are copied with their colour values.
+        """
+        memo = {}
+        new = object.__new__(type(self))
+        new.is_dark = self.is_dark
+        new.colors = self.colors.copy(memo)
+        new.default_style = self.default_style.copy(memo)
+        new.styles = {name: widget_style.copy(memo) for name, widget_style in self.styles.items()}
+        return new
 
 
 class DefaultStyleCls:
     """
-    默认主题, 包含亮色+暗色
+    默认主题, 包含亮色+暗色. 主题只创建一次并被冻结, 需要修改时请使用 `copy()`
     """
 
+    def __init__(self):
+        self.cache: dict[bool, Style] = {}
+
+    def get(self, is_dark: bool) -> Style:
+        style = self.cache.get(is_dark)
+        if style is None:
+            from ..lib.settings import GlobalSettings
+
+            if GlobalSettings.theme_snapshot:
+                from .snapshot import snapshot_or_live
+                style = snapshot_or_live(GlobalSettings.theme_snapshot, is_dark)
+            else:
+                style = Style(is_dark)
+            style = self.cache[is_dark] = style.freeze()
+        return style
+
     @property
     def LIGHT(self) -> Style:
-        return Style().set_as_light()
+        return self.get(False)
 
     @property
     def DARK(self) -> Style:
-        return Style().set_as_dark()
+        return self.get(True)
 
     @property
     def DEFAULT(self) -> Style:
-        return self.DARK if wx.SystemSettings.GetAppearance().IsDark() else self.LIGHT
+        return self.get(Style.sys_is_dark())
 
 
 DefaultStyle = DefaultStyleCls()
@@ -162,6 +216,10 @@ class MixedStateColor(wx.Colour):
     def from_colors(cls, state_color: Colors.StateColor):
         return cls(state_color.st_default, state_color.st_hover, state_color.st_pressed, state_color.st_disabled)
 
+    def with_normal(self, normal: wx.Colour):
+        """返回普通状态颜色替换后的新颜色, 其他状态不变"""
+        return type(self)(wx.Colour(normal), self.hover, self.pressed, self.disabled)
+
 
 class Foreground(MixedStateColor):
     pass
@@ -179,6 +237,34 @@ class Border(MixedStateColor):
     pass
 
 
+def style_value_key(value, _path: set[int] | None = None) -> Hashable:
+    """
+    将样式中的值转换为可比较的键, 颜色按RGBA比较, 普通对象按其属性递归比较.
+    无法比较的原生对象 (画刷、字体等) 按对象本身比较, 即视为总是改变.
+    """
+    if value is None or isinstance(value, (bool, int, float, str, Enum)):
+        return value
+    if _path is None:
+        _path = set()
+    if id(value) in _path:  # 循环引用, 如渐变色的终止色为自身
+        return "<cycle>"
+    _path.add(id(value))
+    try:
+        if isinstance(value, (tuple, list)):
+            return tuple(style_value_key(item, _path) for item in value)
+        if isinstance(value, dict):
+            return tuple(sorted((str(k), style_value_key(v, _path)) for k, v in value.items()))
+        if isinstance(value, wx.GraphicsGradientStops):
+            return tuple((stop.GetColour().GetRGBA(), stop.GetPosition())
+                         for stop in (value.Item(i) for i in range(value.GetCount())))
+        base = value.GetRGBA() if isinstance(value, wx.Colour) else type(value).__name__
+        if hasattr(value, "__dict__"):
+            return base, tuple(sorted((k, style_value_key(v, _path)) for k, v in color_attrs(value).items()))
+        return base if isinstance(value, wx.Colour) else id(value)
+    finally:
+        _path.discard(id(value))
+
+
 class WidgetStyle:
     """
     用于记录组件绘制的颜色、边框等信息, 注意样式信息应当不经过DPI转换
@@ -188,6 +274,9 @@ class WidgetStyle:
     fg: Foreground
     bg: Background
 
+    _base: 'WidgetStyle | None' = None  # 派生样式的原样式, 未覆盖的属性从原样式读取
+    frozen: bool = False  # 缓存主题中的样式不可修改
+
     def __init__(self, fg: Foreground | wx.Colour = wx.WHITE, bg: Background | wx.Colour = wx.BLACK):
         if not isinstance(fg, Foreground):
             fg = Foreground(fg)
@@ -196,6 +285,59 @@ class WidgetStyle:
         self.fg = fg
         self.bg = bg
 
+    def __setattr__(self, name, value):
+        if self.frozen:
+            raise TypeError(f"{type(self).__name__} belongs to a cached shared theme and is read-only, "
+                            f"use derive() to override it")
+        super().__setattr__(name, value)
+
+    def __getattr__(self, name: str):
+        # 只在实例上找不到属性时调用, 派生样式从原样式读取未覆盖的属性
+        base = self._base
+        if base is None or name.startswith("__"):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        return getattr(base, name)
+
+    def freeze(self) -> 'WidgetStyle':
+        """冻结样式, 之后不能设置属性, 其中的颜色与渐变也不能修改"""
+        object.__setattr__(self, "frozen", True)
+        for value in vars(self).values():
+            freeze_color_value(value)
+        return self
+
+    def derive(self: WS_T, **changes) -> WS_T:
+        """
+        写时复制, 创建一个只记录修改属性的派生样式, 其他属性与原样式共享. 开销与修改的属性数量成正比.
+        传入的颜色值会被复制, 之后修改派生样式的颜色不会影响传入的 (可能属于共享主题的) 颜色对象.
+        Copy-on-write, create a derived style recording only the overridden fields, the rest is shared with this one.
+        """
+        derived = object.__new__(type(self))
+        object.__setattr__(derived, "_base", self)
+        for name, value in changes.items():
+            setattr(derived, name, copy_color_value(value))
+        return derived
+
+    def copy(self: WS_T, memo: dict[int, object] | None = None) -> WS_T:
+        """复制为独立的可修改样式, 包括从原样式继承的属性与其中的颜色值"""
+        memo = {} if memo is None else memo
+        new = object.__new__(type(self))
+        for name, value in self.fields().items():
+            object.__setattr__(new, name, copy_color_value(value, memo))
+        return new
+
+    def fields(self) -> dict:
+        """样式的所有属性, 包括从原样式继承的属性"""
+        own = {name: value for name, value in vars(self).items() if name not in ("_base", "frozen")}
+        return own if self._base is None else {**self._base.fields(), **own}
+
+    def signature(self, gen_style: Style | None = None) -> Hashable:
+        """
+        样式解析后的值, 两个样式的签名相同时绘制结果相同.
+        文字渲染还取决于主题的明暗, 提供主题时一并计入.
+        Resolved values of the style, two styles with the same signature draw the same.
+        """
+        return type(self).__name__, None if gen_style is None else gen_style.is_dark, style_value_key(self.fields())
+
     @staticmethod
     def load(style: Style) -> 'WidgetStyle':
         """
@@ -210,3 +352,11 @@ class WidgetStyle:
 
 class EmptyStyle(WidgetStyle):
     pass
+
+
+def __getattr__(name: str):
+    # EasyColor依赖colour库, 只在使用时导入
+    if name == "EasyColor":
+        from .easy_color import EasyColor
+        return EasyColor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,10 +3,9 @@ from ctypes import wintypes
 from dataclasses import dataclass
 from enum import Enum
 
-import colour
 import wx
 
-from ..dpi import SCALE
+from . import fast_color
 from ..lib.delay_init import DelayInitWrapper
 
 dwmapi = ctypes.WinDLL('dwmapi.dll')
@@ -33,53 +32,41 @@ def get_windows_theme_color():  # 蓝色
         return 0, 111, 196  # 如果获取颜色失败, 返回默认颜色 (蓝色)
 
 
-class EasyColor(colour.Color):
-    """colour.Color的更易于使用的版本"""
-
-    def __init__(self, color: tuple):
-        super().__init__(rgb=(color[0] / 255, color[1] / 255, color[2] / 255))
-
-    def add_luminance(self, value: float):
-        self.set_luminance(max(min(self.get_luminance() + value, 1), 0))
-
-    def add_saturation(self, value: float):
-        self.set_saturation(max(min(self.get_saturation() + value, 1), 0))
-
-    @property
-    def rgb_tuple(self) -> tuple[int, int, int]:
-        return int(self.get_red() * 255), int(self.get_green() * 255), int(self.get_blue() * 255)
-
-    @property
-    def int_rgb(self) -> int:
-        color = self.rgb_tuple
-        return (color[0] << 16) | (color[1] << 8) | color[2]
-
-
 class TransformableColor(wx.Colour):
     """一个颜色类, 定义一个可以快捷调节的颜色"""
-    color: EasyColor
 
     def __init__(self, color: tuple[int, int, int] | tuple[int, int, int, int] | wx.Colour):
         super().__init__(color)
         if isinstance(color, wx.Colour):
             color = (color.GetRed(), color.GetGreen(), color.GetBlue(), color.GetAlpha())
         self.base_rgba = color
-        self.color = EasyColor(color[:3])
-        self.base_color = self.color.get_rgb()
+        self.base_hsl = fast_color.rgb_to_hsl(color[0] / 255, color[1] / 255, color[2] / 255)
+        self.hsl = self.base_hsl  # 以浮点数保存的当前HSL, 连续变换时不会因取整而漂移
+
+    @property
+    def color(self) -> 'EasyColor':
+        """当前颜色的colour.Color副本, 修改它不会影响本颜色"""
+        from .easy_color import EasyColor
+        return EasyColor((self.GetRed(), self.GetGreen(), self.GetBlue()))
 
     def reset(self):
-        self.color.set_rgb(self.base_color)
+        self.hsl = self.base_hsl
         self.Set(*self.base_rgba)
         return self
 
+    def set_hsl(self, hue: float, sat: float, lum: float):
+        r, g, b = fast_color.hsl_to_rgb(hue, sat, lum)
+        self.Set(int(r * 255), int(g * 255), int(b * 255), self.GetAlpha())
+        self.hsl = hue, sat, lum
+
     def add_luminance(self, value: float):
-        self.color.add_luminance(value)
-        self.Set(*self.color.rgb_tuple, self.GetAlpha())
+        hue, sat, lum = self.hsl
+        self.set_hsl(hue, sat, fast_color.clamp(lum + value))
         return self
 
     def add_saturation(self, value: float):
-        self.color.add_saturation(value)
-        self.Set(*self.color.rgb_tuple, self.GetAlpha())
+        hue, sat, lum = self.hsl
+        self.set_hsl(hue, fast_color.clamp(sat + value), lum)
         return self
 
     def light1(self):
@@ -127,18 +114,11 @@ class ColorTransformer:
     @staticmethod
     def add_luminance(wx_color: wx.Colour, luminance: float):
         """增加颜色"""
-        color = colour.Color(rgb=(wx_color.GetRed() / 255, wx_color.GetGreen() / 255, wx_color.GetBlue() / 255))
-        base = color.get_luminance()
-        color.set_luminance(max(min(base + luminance, 1), 0))
-        color_tup: tuple[int, int, int] = color.get_rgb()
-        return wx.Colour(int(color_tup[0] * 255), int(color_tup[1] * 255), int(color_tup[2] * 255), wx_color.GetAlpha())
+        return fast_color.to_colour(fast_color.add_luminance(wx_color.GetRGBA(), luminance))
 
     @staticmethod
     def set_lum(wx_color: wx.Colour, luminance: float):
-        color = colour.Color(rgb=(wx_color.GetRed() / 255, wx_color.GetGreen() / 255, wx_color.GetBlue() / 255))
-        color.set_luminance(luminance)
-        color_tup: tuple[int, int, int] = color.get_rgb()
-        return wx.Colour(int(color_tup[0] * 255), int(color_tup[1] * 255), int(color_tup[2] * 255), wx_color.GetAlpha())
+        return fast_color.to_colour(fast_color.set_luminance(wx_color.GetRGBA(), luminance))
 
     @staticmethod
     def highlight(color: wx.Colour):
@@ -176,6 +156,90 @@ class CT(ColorTransformer):
     pass
 
 
+# 冻结后被禁止的修改方法
+COLOUR_MUTATORS = ("Set", "SetRGB", "SetRGBA", "MakeDisabled", "MakeGrey", "MakeMono")
+STOPS_MUTATORS = ("Add", "SetStartColour", "SetEndColour")
+
+
+def read_only_colour(*_args, **_kwargs):
+    raise TypeError("This colour belongs to a cached shared theme and is read-only, "
+                    "use WidgetStyle.derive() or Style.copy() to override it")
+
+
+def color_attrs(obj) -> dict:
+    """对象的实例属性, 不包括冻结时添加的只读方法"""
+    return {name: value for name, value in vars(obj).items() if value is not read_only_colour}
+
+
+def is_color_container(value) -> bool:
+    """颜色表与其中的状态颜色, 复制与冻结时递归处理其属性"""
+    return isinstance(value, (Colors, Colors.StateColor))
+
+
+def copy_color_value(value, memo: dict[int, object] | None = None):
+    """
+    复制样式中可修改的颜色值: wx.Colour (包括带有额外属性的子类)、渐变停止点、颜色表与其中的状态颜色,
+     其他值原样返回. memo记录已复制的对象, 原来共享的颜色在副本中同样共享
+    """
+    if memo is None:
+        memo = {}
+    if id(value) in memo:
+        return memo[id(value)]
+    if isinstance(value, wx.Colour):
+        if type(value) is wx.Colour:
+            result = memo[id(value)] = wx.Colour(value)
+            return result
+        # 不经过子类的__init__, 渐变色的SetRGBA依赖尚未复制的属性
+        result = memo[id(value)] = type(value).__new__(type(value))
+        wx.Colour.__init__(result, wx.Colour(value))
+    elif isinstance(value, wx.GraphicsGradientStops):
+        count = value.GetCount()
+        result = memo[id(value)] = wx.GraphicsGradientStops(wx.Colour(value.GetStartColour()),
+                                                            wx.Colour(value.GetEndColour()))
+        for i in range(1, count - 1):
+            stop = value.Item(i)
+            result.Add(wx.Colour(stop.GetColour()), stop.GetPosition())
+        return result
+    elif isinstance(value, (list, tuple)):
+        return type(value)(copy_color_value(item, memo) for item in value)
+    elif isinstance(value, dict):
+        return {key: copy_color_value(item, memo) for key, item in value.items()}
+    elif is_color_container(value):
+        result = memo[id(value)] = object.__new__(type(value))
+    else:
+        return value
+    result.__dict__.update((name, copy_color_value(item, memo)) for name, item in color_attrs(value).items())
+    return result
+
+
+def freeze_color_value(value, _seen: set[int] | None = None):
+    """冻结样式中的颜色值, 之后调用其修改方法 (SetRGBA、SetStartColour等) 会抛出TypeError"""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return
+    _seen.add(id(value))
+    if isinstance(value, wx.Colour):
+        for name in COLOUR_MUTATORS:
+            setattr(value, name, read_only_colour)
+    elif isinstance(value, wx.GraphicsGradientStops):
+        for name in STOPS_MUTATORS:
+            setattr(value, name, read_only_colour)
+        return
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            freeze_color_value(item, _seen)
+        return
+    elif isinstance(value, dict):
+        for item in value.values():
+            freeze_color_value(item, _seen)
+        return
+    elif not is_color_container(value):
+        return
+    for item in color_attrs(value).values():
+        freeze_color_value(item, _seen)
+
+
 class DefaultColors:
     """
     系统默认颜色, 需要在wx.App初始化后使用, 使用已创建实例 TheDefaultColors
@@ -305,11 +369,12 @@ class Colors:
         disabled: wx.Colour
 
         @classmethod
-        def load(cls, for_dark: bool):
+        def load(cls, for_dark: bool, accent: wx.Colour | None = None):
+            accent = TheDefaultColors.PRIMARY if accent is None else accent
             return cls(
-                primary=TheDefaultColors.PRIMARY,
-                secondary=TheDefaultColors.PRIMARY,
-                tertiary=TheDefaultColors.PRIMARY,
+                primary=accent,
+                secondary=accent,
+                tertiary=accent,
                 disabled=wx.Colour(113, 113, 113) if for_dark else wx.Colour(155, 155, 155),
             )
 
@@ -322,11 +387,12 @@ class Colors:
         disabled: wx.Colour
 
         @classmethod
-        def load(cls, for_dark: bool):
+        def load(cls, for_dark: bool, accent: wx.Colour | None = None):
+            accent = TheDefaultColors.PRIMARY if accent is None else accent
             return cls(
-                default=CT.set_lum(TheDefaultColors.PRIMARY, 0.55),
-                secondary=CT.set_lum(TheDefaultColors.PRIMARY, 0.45),
-                tertiary=CT.set_lum(TheDefaultColors.PRIMARY, 0.3),
+                default=CT.set_lum(accent, 0.55),
+                secondary=CT.set_lum(accent, 0.45),
+                tertiary=CT.set_lum(accent, 0.3),
                 disabled=wx.Colour(0, 0, 0, 0x37)
             )
 
@@ -408,19 +474,29 @@ class Colors:
     def input_bg(self):
         return ColorTransformer.with_alpha(self.bg, 40)
 
+    def copy(self, memo: dict[int, object] | None = None) -> 'Colors':
+        """深拷贝颜色表, 所有状态颜色与颜色对象都是新的, 修改副本不影响原颜色表"""
+        return copy_color_value(self, memo)
+
     @staticmethod
-    def default(for_dark: bool):
+    def default(for_dark: bool, accent: wx.Colour | None = None):
+        """
+        :param for_dark: 是否为暗色
+        :param accent: 自定义强调色, 默认使用系统主题色
+        """
+        if accent is None:
+            accent = TheDefaultColors.PRIMARY
         colors = Colors(
             is_dark=for_dark,
             text=Colors.Text.load(for_dark),
-            accent_text=Colors.AccentText.load(for_dark),
+            accent_text=Colors.AccentText.load(for_dark, accent),
             control_fill=Colors.ControlFill.load(for_dark),
             control_strong=Colors.ControlStrong.load(for_dark),
             neutral_strong=Colors.NeutralStrong.load(for_dark),
-            accent_fill=Colors.AccentFill.load(for_dark),
+            accent_fill=Colors.AccentFill.load(for_dark, accent),
             control_stroke=Colors.ControlStroke.load(for_dark),
             control_strong_stroke=Colors.ControlStrongStroke.load(for_dark),
-            primary=TheDefaultColors.PRIMARY,
+            primary=accent,
             secondary=wx.Colour(85, 85, 85, 128),
             fg=wx.Colour(255, 255, 255),
             bg=wx.BLACK,
@@ -543,11 +619,11 @@ class GradientPen(GradientColor):
         以渐变颜色创建一个笔,
         Create a pen with gradient color.
 
-        :param gc: `wx.GraphicsContext`
+        :param gc: `CustomGraphicsContext`, 笔宽按其绘制目标窗口的缩放 (`gc.scale`) 转换
         :param size: 控件的大小
-        :param dpi_active: 是否自动进行DPI转换
+        :param dpi_active: 是否自动进行DPI转换, 使用绘制目标窗口的缩放
         """
-        width = self.width * SCALE if dpi_active else self.width
+        width = self.width * gc.scale if dpi_active else self.width
         pen = wx.GraphicsPenInfo(self, width, self.pen_style).Width(width)
         if self.gradient_type == wx.GRADIENT_LINEAR:
             from_pt = (0, 0)
@@ -687,3 +763,11 @@ class GradientBrush(GradientColor):
 
 
 TRANSPARENT_COLOR = wx.Colour(0, 0, 0, 0)
+
+
+def __getattr__(name: str):
+    # EasyColor依赖colour库, 只在使用时导入
+    if name == "EasyColor":
+        from .easy_color import EasyColor
+        return EasyColor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,27 @@
+"""
+colour.Color的包装, 只在需要时导入, 加载主题与绘制不依赖colour库
+A wrapper of colour.Color, imported on demand so loading themes and painting don't need the colour package.
+"""
+import colour
+
+
+class EasyColor(colour.Color):
+    """colour.Color的更易于使用的版本"""
+
+    def __init__(self, color: tuple):
+        super().__init__(rgb=(color[0] / 255, color[1] / 255, color[2] / 255))
+
+    def add_luminance(self, value: float):
+        self.set_luminance(max(min(self.get_luminance() + value, 1), 0))
+
+    def add_saturation(self, value: float):
+        self.set_saturation(max(min(self.get_saturation() + value, 1), 0))
+
+    @property
+    def rgb_tuple(self) -> tuple[int, int, int]:
+        return int(self.get_red() * 255), int(self.get_green() * 255), int(self.get_blue() * 255)
+
+    @property
+    def int_rgb(self) -> int:
+        color = self.rgb_tuple
+        return (color[0] << 16) | (color[1] << 8) | color[2]
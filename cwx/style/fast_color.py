@@ -0,0 +1,189 @@
+"""
+快速颜色计算, 颜色以与 `wx.Colour.GetRGBA()` 相同的整数 (0xAABBGGRR) 表示, HSL转换直接内联实现, 不依赖colour库.
+变换结果按 (颜色, 操作, 数值) 缓存, 整个调色板可以通过NumPy批量变换.
+计算结果与colour库 (`colour.Color.set_luminance` 等) 相同.
+
+Fast color math. Colors are packed RGBA integers as returned by `wx.Colour.GetRGBA()`, HSL conversions are inlined
+ without the colour package. Transform results are memoized by (rgba, op, amount),
+ whole palettes can be transformed in batch with NumPy.
+"""
+from functools import lru_cache
+
+import wx
+
+FLOAT_ERROR = 0.0000005  # 与colour库判断灰色的误差相同
+
+ADD_LUMINANCE = "add_lum"
+SET_LUMINANCE = "set_lum"
+ADD_SATURATION = "add_sat"
+SET_SATURATION = "set_sat"
+
+
+def pack_rgba(r: int, g: int, b: int, a: int = 255) -> int:
+    return r | g << 8 | b << 16 | a << 24
+
+
+def unpack_rgba(rgba: int) -> tuple[int, int, int, int]:
+    return rgba & 0xFF, rgba >> 8 & 0xFF, rgba >> 16 & 0xFF, rgba >> 24 & 0xFF
+
+
+def to_colour(rgba: int) -> wx.Colour:
+    colour = wx.Colour()
+    colour.SetRGBA(rgba)
+    return colour
+
+
+def rgb_to_hsl(r: float, g: float, b: float) -> tuple[float, float, float]:
+    """rgb (0~1) 转换为 hsl (0~1)"""
+    v_min = min(r, g, b)
+    v_max = max(r, g, b)
+    diff = v_max - v_min
+    v_sum = v_min + v_max
+    lum = v_sum / 2
+    if diff < FLOAT_ERROR:  # 灰色
+        return 0.0, 0.0, lum
+
+    sat = diff / v_sum if lum < 0.5 else diff / (2.0 - v_sum)
+    dr = ((v_max - r) / 6 + diff / 2) / diff
+    dg = ((v_max - g) / 6 + diff / 2) / diff
+    db = ((v_max - b) / 6 + diff / 2) / diff
+    if r == v_max:
+        hue = db - dg
+    elif g == v_max:
+        hue = 1.0 / 3 + dr - db
+    else:
+        hue = 2.0 / 3 + dg - dr
+    if hue < 0:
+        hue += 1
+    if hue > 1:
+        hue -= 1
+    return hue, sat, lum
+
+
+def hue_to_rgb(v1: float, v2: float, hue: float) -> float:
+    while hue < 0:
+        hue += 1
+    while hue > 1:
+        hue -= 1
+    if 6 * hue < 1:
+        return v1 + (v2 - v1) * 6 * hue
+    if 2 * hue < 1:
+        return v2
+    if 3 * hue < 2:
+        return v1 + (v2 - v1) * (2.0 / 3 - hue) * 6
+    return v1
+
+
+def hsl_to_rgb(hue: float, sat: float, lum: float) -> tuple[float, float, float]:
+    """hsl (0~1) 转换为 rgb (0~1)"""
+    if sat == 0:
+        return lum, lum, lum
+    v2 = lum * (1.0 + sat) if lum < 0.5 else lum + sat - sat * lum
+    v1 = 2.0 * lum - v2
+    return hue_to_rgb(v1, v2, hue + 1.0 / 3), hue_to_rgb(v1, v2, hue), hue_to_rgb(v1, v2, hue - 1.0 / 3)
+
+
+def clamp(value: float) -> float:
+    return max(min(value, 1), 0)
+
+
+@lru_cache(maxsize=4096)
+def transform(rgba: int, op: str, amount: float) -> int:
+    """
+    变换颜色的亮度或饱和度, 透明度不变. 结果按参数缓存
+    :param op: ADD_LUMINANCE, SET_LUMINANCE, ADD_SATURATION 或 SET_SATURATION
+    """
+    r, g, b, a = unpack_rgba(rgba)
+    hue, sat, lum = rgb_to_hsl(r / 255, g / 255, b / 255)
+    if op == ADD_LUMINANCE:
+        lum = clamp(lum + amount)
+    elif op == SET_LUMINANCE:
+        lum = amount
+    elif op == ADD_SATURATION:
+        sat = clamp(sat + amount)
+    elif op == SET_SATURATION:
+        sat = amount
+    else:
+        raise ValueError(f"Unknown color transform: {op}")
+    r, g, b = hsl_to_rgb(hue, sat, lum)
+    return pack_rgba(int(r * 255), int(g * 255), int(b * 255), a)
+
+
+def add_luminance(rgba: int, amount: float) -> int:
+    return transform(rgba, ADD_LUMINANCE, amount)
+
+
+def set_luminance(rgba: int, luminance: float) -> int:
+    return transform(rgba, SET_LUMINANCE, luminance)
+
+
+def add_saturation(rgba: int, amount: float) -> int:
+    return transform(rgba, ADD_SATURATION, amount)
+
+
+def set_saturation(rgba: int, saturation: float) -> int:
+    return transform(rgba, SET_SATURATION, saturation)
+
+
+def transform_palette(palette, op: str, amount: float):
+    """
+    以NumPy批量变换一组颜色, 结果与逐个调用 `transform` 相同
+    :param palette: RGBA整数的序列或数组
+    :return: numpy.uint32 数组
+    """
+    import numpy as np
+
+    rgba = np.asarray(palette, dtype=np.uint32)
+    r = (rgba & 0xFF) / 255
+    g = (rgba >> 8 & 0xFF) / 255
+    b = (rgba >> 16 & 0xFF) / 255
+    alpha = rgba >> 24 & 0xFF
+
+    # rgb -> hsl
+    v_min = np.minimum(np.minimum(r, g), b)
+    v_max = np.maximum(np.maximum(r, g), b)
+    diff = v_max - v_min
+    v_sum = v_min + v_max
+    lum = v_sum / 2
+    grey = diff < FLOAT_ERROR
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sat = np.where(lum < 0.5, diff / v_sum, diff / (2.0 - v_sum))
+        dr = ((v_max - r) / 6 + diff / 2) / diff
+        dg = ((v_max - g) / 6 + diff / 2) / diff
+        db = ((v_max - b) / 6 + diff / 2) / diff
+    hue = np.select([r == v_max, g == v_max], [db - dg, 1.0 / 3 + dr - db], 2.0 / 3 + dg - dr)
+    hue = np.where(hue < 0, hue + 1, hue)
+    hue = np.where(hue > 1, hue - 1, hue)
+    hue = np.where(grey, 0.0, hue)
+    sat = np.where(grey, 0.0, sat)
+
+    if op == ADD_LUMINANCE:
+        lum = np.clip(lum + amount, 0, 1)
+    elif op == SET_LUMINANCE:
+        lum = np.full_like(lum, amount)
+    elif op == ADD_SATURATION:
+        sat = np.clip(sat + amount, 0, 1)
+    elif op == SET_SATURATION:
+        sat = np.full_like(sat, amount)
+    else:
+        raise ValueError(f"Unknown color transform: {op}")
+
+    # hsl -> rgb
+    v2 = np.where(lum < 0.5, lum * (1.0 + sat), lum + sat - sat * lum)
+    v1 = 2.0 * lum - v2
+
+    def channel(h):
+        h = np.where(h < 0, h + 1, h)  # h的范围为 (-1/3, 4/3), 调整一次即可
+        h = np.where(h > 1, h - 1, h)
+        return np.select([6 * h < 1, 2 * h < 1, 3 * h < 2],
+                         [v1 + (v2 - v1) * 6 * h, v2, v1 + (v2 - v1) * (2.0 / 3 - h) * 6], v1)
+
+    grey = sat == 0
+    r = np.where(grey, lum, channel(hue + 1.0 / 3))
+    g = np.where(grey, lum, channel(hue))
+    b = np.where(grey, lum, channel(hue - 1.0 / 3))
+
+    def to_byte(channel_value):
+        return (channel_value * 255).astype(np.uint32)
+
+    return to_byte(r) | to_byte(g) << 8 | to_byte(b) << 16 | alpha << 24
@@ -0,0 +1,238 @@
+"""
+主题快照, 将主题解析后的颜色与所有已注册组件样式的参数预先编译到文件中, 启动时直接读取, 无需进行颜色计算.
+快照记录了生成它的输入 (明暗、强调色、相关设置与源文件), 输入改变时视为过期, 回退到实时计算.
+
+Theme snapshots, resolved colors and metrics of all registered widget styles are compiled into a file
+ and loaded at startup without any color math. A snapshot is stale when its inputs change,
+ in which case the theme is computed live instead.
+
+    python -m cwx.style.snapshot theme.json  # 以系统强调色编译亮色与暗色主题
+"""
+import hashlib
+import importlib
+import json
+import os
+import sys
+from enum import Enum
+
+import wx
+
+from . import Style, WidgetStyle, Colors, EmptyStyle
+from .color import color_attrs
+
+SNAPSHOT_VERSION = 1
+SKIP_FIELDS = ("_base", "frozen")  # 派生与冻结的标记, 不属于样式的值
+
+
+class SnapshotError(ValueError):
+    """样式中存在无法写入快照的值"""
+    pass
+
+
+def qualified_name(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def resolve_name(name: str) -> type:
+    module, qualname = name.split(":")
+    obj = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def source_stamp(module_name: str) -> list[int] | None:
+    """模块源文件的修改时间与大小, 源文件改变 (如升级) 后快照中对应的样式过期"""
+    path = getattr(sys.modules.get(module_name), "__file__", None)
+    if path is None:
+        return None
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def encode_value(value):
+    """将样式中的值编码为JSON对象, 带有类型标记的对象用于还原原来的类型"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Enum):
+        return {"enum": qualified_name(type(value)), "name": value.name}
+    if isinstance(value, tuple):
+        return {"tuple": [encode_value(item) for item in value]}
+    if isinstance(value, list):
+        return [encode_value(item) for item in value]
+    if isinstance(value, dict):
+        if not all(isinstance(key, str) for key in value):
+            raise SnapshotError(f"Dict keys must be str: {value!r}")
+        return {"dict": {key: encode_value(item) for key, item in value.items()}}
+    if isinstance(value, wx.GraphicsGradientStops):
+        return {"stops": [[stop.GetColour().GetRGBA(), stop.GetPosition()]
+                          for stop in (value.Item(i) for i in range(value.GetCount()))]}
+    if isinstance(value, wx.Colour):
+        if type(value) is wx.Colour:
+            return {"colour": value.GetRGBA()}
+        return {"colour": value.GetRGBA(), "type": qualified_name(type(value)), "attrs": encode_attrs(value)}
+    colour = sys.modules.get("colour")  # 未导入colour时不可能存在它的实例, 无需为此导入
+    if colour is not None and isinstance(value, colour.Color):
+        # colour.Color的实例属性包含比较函数, 只记录HSL
+        return {"hsl": list(value.get_hsl()), "type": qualified_name(type(value))}
+    if type(value).__module__ != "builtins" and hasattr(value, "__dict__") and not isinstance(value, wx.Object):
+        return {"type": qualified_name(type(value)), "attrs": encode_attrs(value)}
+    raise SnapshotError(f"Can't write {type(value).__name__} into a theme snapshot")
+
+
+def encode_attrs(obj) -> dict:
+    attrs = obj.fields() if isinstance(obj, WidgetStyle) else color_attrs(obj)
+    return {name: encode_value(value) for name, value in attrs.items() if name not in SKIP_FIELDS}
+
+
+def make_colour(rgba: int) -> wx.Colour:
+    result = wx.Colour()
+    result.SetRGBA(rgba)
+    return result
+
+
+def decode_value(data):
+    if isinstance(data, list):
+        return [decode_value(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if "enum" in data:
+        return resolve_name(data["enum"])[data["name"]]
+    if "tuple" in data:
+        return tuple(decode_value(item) for item in data["tuple"])
+    if "dict" in data:
+        return {key: decode_value(item) for key, item in data["dict"].items()}
+    if "stops" in data:
+        (start, _), *middle, (end, _) = data["stops"]
+        stops = wx.GraphicsGradientStops(make_colour(start), make_colour(end))
+        for rgba, position in middle:
+            stops.Add(make_colour(rgba), position)
+        return stops
+    if "colour" in data and "type" not in data:
+        return make_colour(data["colour"])
+
+    cls = resolve_name(data["type"])
+    obj = cls.__new__(cls)
+    if "hsl" in data:
+        import colour
+        colour.Color.__init__(obj, hsl=tuple(data["hsl"]))
+        return obj
+    if "colour" in data:
+        # 直接初始化wx.Colour部分, 不经过子类的__init__与SetRGBA (渐变色的SetRGBA依赖尚未还原的属性)
+        wx.Colour.__init__(obj, make_colour(data["colour"]))
+    # 绕过__setattr__与属性设置器, 原样还原实例属性
+    obj.__dict__.update((name, decode_value(value)) for name, value in data["attrs"].items())
+    return obj
+
+
+def theme_key(is_dark: bool, accent: wx.Colour) -> str:
+    return f"{'dark' if is_dark else 'light'}-{accent.GetRGBA():08x}"
+
+
+def theme_fingerprint(is_dark: bool, accent: wx.Colour) -> str:
+    """主题输入的指纹, 不进行任何颜色计算"""
+    from ..lib.settings import GlobalSettings
+
+    inputs = [
+        SNAPSHOT_VERSION, is_dark, accent.GetRGBA(),
+        GlobalSettings.default_caption_theme.name,
+        GlobalSettings.default_backdrop_type.name,
+        GlobalSettings.default_frame_accent.name,
+        source_stamp(Colors.__module__),
+        source_stamp(Style.__module__),
+    ]
+    return hashlib.sha1(json.dumps(inputs).encode()).hexdigest()
+
+
+def compile_theme(style: Style) -> dict:
+    """
+    解析主题的颜色与所有已注册的组件样式, 无法写入快照的组件样式会被跳过, 加载快照后实时生成.
+    主题的强调色取自 `style.colors.primary`, 即 `Colors.default` 的强调色
+    """
+    styles = {}
+    for name, cls in Style.REGISTERED_STYLES.items():
+        try:
+            value = encode_value(style.as_type_str(name))
+        except SnapshotError:
+            continue
+        styles[name] = {"source": source_stamp(cls.__module__), "value": value}
+    return {
+        "fingerprint": theme_fingerprint(style.is_dark, style.colors.primary),
+        "is_dark": style.is_dark,
+        "colors": encode_value(style.colors),
+        "default_style": encode_value(style.default_style),
+        "styles": styles,
+    }
+
+
+def read_snapshot(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return {}
+    return snapshot
+
+
+def write_theme_snapshot(path: str, *styles: Style):
+    """将主题编译并写入快照文件, 文件中其他明暗或强调色的主题会被保留"""
+    themes = read_snapshot(path).get("themes", {})
+    for style in styles:
+        themes[theme_key(style.is_dark, style.colors.primary)] = compile_theme(style)
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump({"version": SNAPSHOT_VERSION, "themes": themes}, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temp, path)
+
+
+def load_theme_snapshot(path: str, is_dark: bool, accent: wx.Colour | None = None) -> Style | None:
+    """
+    从快照文件读取主题, 文件不存在、损坏或过期时返回None.
+    源文件已改变的组件样式不会被读取, 之后在第一次获取时实时生成
+    """
+    from .color import TheDefaultColors
+
+    if accent is None:
+        accent = TheDefaultColors.PRIMARY
+    theme = read_snapshot(path).get("themes", {}).get(theme_key(is_dark, accent))
+    if theme is None or theme.get("fingerprint") != theme_fingerprint(is_dark, accent):
+        return None
+
+    try:
+        style = object.__new__(Style)
+        style.is_dark = is_dark
+        style.colors = decode_value(theme["colors"])
+        style.default_style = decode_value(theme["default_style"])
+        style.styles = {}
+        for name, entry in theme["styles"].items():
+            cls = Style.REGISTERED_STYLES.get(name)
+            if cls is not None and entry["source"] == source_stamp(cls.__module__):
+                style.styles[name] = decode_value(entry["value"])
+    except (KeyError, ValueError, TypeError, AttributeError, ImportError):
+        return None
+    if not isinstance(style.colors, Colors) or not isinstance(style.default_style, EmptyStyle):
+        return None
+    return style
+
+
+def snapshot_or_live(path: str, is_dark: bool, accent: wx.Colour | None = None) -> Style:
+    """读取快照中的主题, 快照过期时实时计算主题并重新写入快照"""
+    style = load_theme_snapshot(path, is_dark, accent)
+    if style is None:
+        style = Style(is_dark, Colors.default(is_dark, accent))
+        try:
+            write_theme_snapshot(path, style)
+        except OSError:
+            pass
+    return style
+
+
+if __name__ == "__main__":
+    import cwx  # 导入所有组件, 注册全部组件样式
+
+    app = wx.App()
+    output = sys.argv[1] if len(sys.argv) > 1 else "theme.json"
+    write_theme_snapshot(output, Style(False), Style(True))
+    print(f"Theme snapshot written to {output}")
@@ -3,6 +3,7 @@ from .base_widget import *
 from .button import *
 from .check_box import *
 from .frame import *
+from .light_widget import *
 from .message_box import *
 from .panel import *
 from .progress_bar import *
@@ -13,3 +14,7 @@ from .static_text import *
 from .text_ctrl import *
 from .toggle_switch import *
 from .slider import *
+from .virtual_list import *
+from .tree_view import *
+from .data_grid import *
+from .log_view import *
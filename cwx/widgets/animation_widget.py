@@ -3,7 +3,8 @@ from typing import TypeVar
 
 import wx
 
-from ..animation import Animation, AnimationGroup
+from ..animation import Animation, AnimationGroup, TheRealClock
+from ..lib.frame_pacer import FramePacer, FrameStats
 from ..style import WidgetStyle
 from ..widgets.base_widget import Widget
 
@@ -33,6 +34,10 @@ class AnimationWidget(Widget):
         self.allow_multi_anim: bool = True
         self.animations: dict[str, Animation | AnimationGroup] = {}
         self.in_playing: list[Animation | AnimationGroup] = []
+        self.low_priority: bool = False  # 低优先级动画在窗口失去焦点时降低帧率
+        self.last_frame_at: float | None = None  # 上一动画帧的时间
+        self.planned_frame_time: float | None = None  # 上一动画帧计划的帧间隔
+        self.frame_stats = FrameStats()  # 该控件自己的动画帧率与掉帧
 
         self.timer = wx.Timer()
         self.timer.StartOnce(1000 // self.fps)
@@ -68,20 +73,31 @@ class AnimationWidget(Widget):
         调整某个动画到开头, 并播放某个该动画
         Play an animation.
         """
-        if name in self.animations:
-            anim = self.animations[name]
-        else:
-            raise RuntimeError(f"PlayAnimationError, There is no animation (group) named: {name}")
-        anim.play()
-        if not self.allow_multi_anim and self.in_playing:
-            for animation in self.in_playing:
-                if animation is not anim:
-                    animation.stop()
-            self.in_playing.clear()
-        self.in_playing.append(anim)
+        self.play_animations(name)
 
-        if not self.timer.IsRunning():
-            self.timer.StartOnce()
+    def play_animations(self, *names: str):
+        """
+        一次性播放多个动画, 只检查一次可见性并启动一次定时器
+        Play several animations at once, visibility is checked and the timer is started only once.
+        """
+        for name in names:
+            if name in self.animations:
+                anim = self.animations[name]
+            else:
+                raise RuntimeError(f"PlayAnimationError, There is no animation (group) named: {name}")
+            anim.play()
+            if not self.allow_multi_anim and self.in_playing:
+                for animation in self.in_playing:
+                    if animation is not anim:
+                        animation.stop()
+                self.in_playing.clear()
+            if anim not in self.in_playing:
+                self.in_playing.append(anim)
+
+        if not self.is_animation_visible():
+            self.fast_forward()
+        elif not self.timer.IsRunning():
+            self.start_frame_timer(self.fps)
 
     def stop_animation(self, name: str | Animation | AnimationGroup):
         """
@@ -99,6 +115,7 @@ class AnimationWidget(Widget):
             self.in_playing.remove(anim)
         if not self.in_playing:
             self.timer.Stop()
+            self.last_frame_at = None
 
     def _animation_call(self, _):
         """
@@ -106,21 +123,100 @@ class AnimationWidget(Widget):
         A method for internal use, please using `animation_callback`
         """
         # timer = Counter(create_start=True)
-        try:
-            self.animation_callback()
-        except RuntimeError:
+        if not self.is_animation_visible():
+            self.fast_forward()
             return
+        self.record_frame()
+        with Animation.clock.frame():
+            try:
+                self.animation_callback()
+            except RuntimeError:
+                return
         for animation in self.in_playing[:]:
             if not animation.is_playing:
                 animation.stop()
                 self.in_playing.remove(animation)
         if self.in_playing:
-            frame_time = 1 / self.fps
-            for animation in self.in_playing:
-                frame_time = min(frame_time, max(0, animation.get_next_frame_time(self.fps)))
-            self.timer.StartOnce(int(frame_time * 1000))
+            self.start_frame_timer(self.get_frame_rate())
+        else:
+            self.last_frame_at = None
         # print(f"Animation Frame Use: {timer.endT()}")
 
+    @property
+    def frame_pacer(self) -> FramePacer | None:
+        """顶层窗口画布的帧率调节器, 不在画布中时为None"""
+        canvas = getattr(self.GetTopLevelParent(), "CWX_canvas", None)
+        return canvas.pacer if canvas is not None else None
+
+    def get_frame_rate(self) -> float:
+        """获取下一帧使用的帧率, 由帧率调节器根据绘制耗时调整"""
+        pacer = self.frame_pacer
+        if pacer is None:
+            return self.fps
+        return pacer.target_fps(self.fps, self.low_priority)
+
+    def record_frame(self):
+        """
+        在控件自己的 `frame_stats` 中记录动画帧, 用于统计实际帧率与掉帧. 定时器以真实时间等待, 因此以真实时间计时.
+        窗口合成的帧率由画布统计, 见 `FramePacer.stats`
+        """
+        now = TheRealClock.now()
+        interval = None if self.last_frame_at is None else now - self.last_frame_at
+        self.frame_stats.record_frame(now, interval, self.planned_frame_time)
+        self.last_frame_at = now
+
+    def start_frame_timer(self, fps: float):
+        """
+        启动下一帧的定时器. 每个动画在自己的时钟上计算到下一帧的时长并换算为真实等待时长, 取最短的一个;
+         全部动画都使用手动推进的时钟(ManualClock)时不启动定时器
+        Start the timer of next frame, each animation computes its frame time on its own clock.
+        """
+        delays = []
+        for animation in self.in_playing:
+            delay = animation.clock.real_delay(max(0, animation.get_next_frame_time(fps)))
+            if delay is not None:
+                delays.append(delay)
+        if not delays:
+            self.planned_frame_time = None
+            return
+        self.planned_frame_time = min(delays)
+        self.timer.StartOnce(int(self.planned_frame_time * 1000))
+
+    def is_animation_visible(self) -> bool:
+        """
+        控件当前是否可见, 所在窗口最小化、隐藏或控件位于隐藏的页面中时为False
+        Whether the widget is visible, False when its top window is minimized/hidden or it's on a hidden page.
+        """
+        canvas = getattr(self.GetTopLevelParent(), "CWX_canvas", None)
+        if canvas is not None and canvas.suspended:
+            return False
+        return self.IsShownOnScreen()
+
+    def fast_forward(self):
+        """
+        将所有播放中的动画直接跳到结尾并停止, 不可见的控件不会逐帧播放动画
+        Jump all playing animations to their end and stop them, invisible widgets don't tick.
+        """
+        if not self.in_playing:
+            return
+        self.timer.Stop()
+        self.last_frame_at = None
+        with Animation.clock.frame():
+            for animation in self.in_playing:
+                animation.stop()
+            try:
+                self.animation_callback()
+            except RuntimeError:
+                pass
+        self.in_playing.clear()
+
+    def tick(self):
+        """
+        立即处理一帧动画, 配合手动推进的时钟使用
+        Process an animation frame immediately, use with a manually advanced clock.
+        """
+        self._animation_call(None)
+
     def animation_callback(self):
         """
         动画回调函数, 你应该在这里处理组件数据更新逻辑, 我们不会帮你自动刷新控件
@@ -146,6 +242,10 @@ class AnimationWrapper(typing.cast(type[Widget], object)):
         self.allow_multi_anim: bool = True
         self.animations: dict[str, Animation | AnimationGroup] = {}
         self.in_playing: list[Animation | AnimationGroup] = []
+        self.low_priority: bool = False  # 低优先级动画在窗口失去焦点时降低帧率
+        self.last_frame_at: float | None = None  # 上一动画帧的时间
+        self.planned_frame_time: float | None = None  # 上一动画帧计划的帧间隔
+        self.frame_stats = FrameStats()  # 该控件自己的动画帧率与掉帧
         self.handled_props: dict[str, Animation | AnimationGroup] = {}
 
         self.timer = wx.Timer()
@@ -182,20 +282,31 @@ class AnimationWrapper(typing.cast(type[Widget], object)):
         调整某个动画到开头, 并播放某个该动画
         Play an animation.
         """
-        if name in self.animations:
-            anim = self.animations[name]
-        else:
-            raise RuntimeError(f"PlayAnimationError, There is no animation (group) named: {name}")
-        anim.play()
-        if not self.allow_multi_anim and self.in_playing:
-            for animation in self.in_playing:
-                if animation is not anim:
-                    animation.stop()
-            self.in_playing.clear()
-        self.in_playing.append(anim)
+        self.play_animations(name)
 
-        if not self.timer.IsRunning():
-            self.timer.StartOnce()
+    def play_animations(self, *names: str):
+        """
+        一次性播放多个动画, 只检查一次可见性并启动一次定时器
+        Play several animations at once, visibility is checked and the timer is started only once.
+        """
+        for name in names:
+            if name in self.animations:
+                anim = self.animations[name]
+            else:
+                raise RuntimeError(f"PlayAnimationError, There is no animation (group) named: {name}")
+            anim.play()
+            if not self.allow_multi_anim and self.in_playing:
+                for animation in self.in_playing:
+                    if animation is not anim:
+                        animation.stop()
+                self.in_playing.clear()
+            if anim not in self.in_playing:
+                self.in_playing.append(anim)
+
+        if not self.is_animation_visible():
+            self.fast_forward()
+        elif not self.timer.IsRunning():
+            self.start_frame_timer(self.fps)
 
     def stop_animation(self, name: str | Animation | AnimationGroup):
         """
@@ -213,6 +324,7 @@ class AnimationWrapper(typing.cast(type[Widget], object)):
             self.in_playing.remove(anim)
         if not self.in_playing:
             self.timer.Stop()
+            self.last_frame_at = None
 
     def _animation_call(self, _):
         """
@@ -220,22 +332,102 @@ class AnimationWrapper(typing.cast(type[Widget], object)):
         A method for internal use, please using `animation_callback`
         """
         # timer = Counter(create_start=True)
-        try:
-            self.update_handled_props()
-            self.animation_callback()
-        except RuntimeError:
+        if not self.is_animation_visible():
+            self.fast_forward()
             return
+        self.record_frame()
+        with Animation.clock.frame():
+            try:
+                self.update_handled_props()
+                self.animation_callback()
+            except RuntimeError:
+                return
         for animation in self.in_playing[:]:
             if not animation.is_playing:
                 animation.stop()
                 self.in_playing.remove(animation)
         if self.in_playing:
-            frame_time = 1 / self.fps
-            for animation in self.in_playing:
-                frame_time = min(frame_time, max(0, animation.get_next_frame_time(self.fps)))
-            self.timer.StartOnce(int(frame_time * 1000))
+            self.start_frame_timer(self.get_frame_rate())
+        else:
+            self.last_frame_at = None
         # print(f"Animation Frame Use: {timer.endT()}")
 
+    @property
+    def frame_pacer(self) -> FramePacer | None:
+        """顶层窗口画布的帧率调节器, 不在画布中时为None"""
+        canvas = getattr(self.GetTopLevelParent(), "CWX_canvas", None)
+        return canvas.pacer if canvas is not None else None
+
+    def get_frame_rate(self) -> float:
+        """获取下一帧使用的帧率, 由帧率调节器根据绘制耗时调整"""
+        pacer = self.frame_pacer
+        if pacer is None:
+            return self.fps
+        return pacer.target_fps(self.fps, self.low_priority)
+
+    def record_frame(self):
+        """
+        在控件自己的 `frame_stats` 中记录动画帧, 用于统计实际帧率与掉帧. 定时器以真实时间等待, 因此以真实时间计时.
+        窗口合成的帧率由画布统计, 见 `FramePacer.stats`
+        """
+        now = TheRealClock.now()
+        interval = None if self.last_frame_at is None else now - self.last_frame_at
+        self.frame_stats.record_frame(now, interval, self.planned_frame_time)
+        self.last_frame_at = now
+
+    def start_frame_timer(self, fps: float):
+        """
+        启动下一帧的定时器. 每个动画在自己的时钟上计算到下一帧的时长并换算为真实等待时长, 取最短的一个;
+         全部动画都使用手动推进的时钟(ManualClock)时不启动定时器
+        Start the timer of next frame, each animation computes its frame time on its own clock.
+        """
+        delays = []
+        for animation in self.in_playing:
+            delay = animation.clock.real_delay(max(0, animation.get_next_frame_time(fps)))
+            if delay is not None:
+                delays.append(delay)
+        if not delays:
+            self.planned_frame_time = None
+            return
+        self.planned_frame_time = min(delays)
+        self.timer.StartOnce(int(self.planned_frame_time * 1000))
+
+    def is_animation_visible(self) -> bool:
+        """
+        控件当前是否可见, 所在窗口最小化、隐藏或控件位于隐藏的页面中时为False
+        Whether the widget is visible, False when its top window is minimized/hidden or it's on a hidden page.
+        """
+        canvas = getattr(self.GetTopLevelParent(), "CWX_canvas", None)
+        if canvas is not None and canvas.suspended:
+            return False
+        return self.IsShownOnScreen()
+
+    def fast_forward(self):
+        """
+        将所有播放中的动画直接跳到结尾并停止, 不可见的控件不会逐帧播放动画
+        Jump all playing animations to their end and stop them, invisible widgets don't tick.
+        """
+        if not self.in_playing:
+            return
+        self.timer.Stop()
+        self.last_frame_at = None
+        with Animation.clock.frame():
+            for animation in self.in_playing:
+                animation.stop()
+            try:
+                self.update_handled_props()
+                self.animation_callback()
+            except RuntimeError:
+                pass
+        self.in_playing.clear()
+
+    def tick(self):
+        """
+        立即处理一帧动画, 配合手动推进的时钟使用
+        Process an animation frame immediately, use with a manually advanced clock.
+        """
+        self._animation_call(None)
+
     def handle_value(self, anim_name: str, prop_name: str):
         """
         添加一个动画属性, 该属性将自动更新为动画的当前值
@@ -1,15 +1,22 @@
 import typing
+from contextlib import nullcontext
 from dataclasses import dataclass
+from typing import Callable, Hashable
 
 import wx
 from win32.lib.win32con import GWL_STYLE, WS_CLIPSIBLINGS
 from win32gui import GetWindowLong, SetWindowLong
 
-from ..dpi import translate_size, SCALE
+from ..animation import Animation
+from ..dpi import ScaleContext, get_scale_context
 from ..event import PyCommandEvent
-from ..lib.perf import Counter
+from ..lib import invalidation
+from ..lib.frame_pacer import FramePacer
+from ..lib.perf import Counter, AllocationProfiler
+from ..lib.settings import GlobalSettings
+from ..lib.spatial_index import HitTester, Rect
 from ..render import CustomGraphicsContext
-from ..style import Style, WidgetStyle, MaskState
+from ..style import Style, WidgetStyle, MaskState, DefaultStyle
 
 __KEEP_IMPORT = MaskState
 
@@ -23,6 +30,20 @@ class StyleUpdateEvent(PyCommandEvent):
         self.gen_style = gen_style
 
 
+cwxEVT_SCALE_CHANGED = wx.NewEventType()
+EVT_SCALE_CHANGED = wx.PyEventBinder(cwxEVT_SCALE_CHANGED, 1)
+
+
+class ScaleChangedEvent(PyCommandEvent):
+    """顶层窗口的DPI缩放改变后发出, 此时窗口内所有控件已经以新缩放重新布局"""
+
+    def __init__(self, window: wx.Window, old_scale: float, new_scale: float):
+        super().__init__(cwxEVT_SCALE_CHANGED, window.GetId())
+        self.SetEventObject(window)
+        self.old_scale = old_scale
+        self.new_scale = new_scale
+
+
 """
 实现Widget的主题
 1. 重写translate_style方法, 负责将 主题(Style) 转换为 组件主题(WidgetStyle)
@@ -41,10 +62,12 @@ class Widget(wx.Window):
 
     init_wnd: bool = True  # 指示是否初始化wx.Window类
     enable_double_buffer: bool = True
+    layer_host: 'TopWindowCanvas | None' = None  # 合成该控件图层的画布, 不在画布中时为None
 
     WND_NAME = "CWX_Widget"
 
     def __init__(self, parent: wx.Window, style=0, widget_style: WidgetStyle = None):
+        self.logical_sizes: dict[str, tuple[int, int]] = {}  # 设置大小的方法名 -> 未经缩放的大小, 缩放改变时重新应用
         if self.init_wnd:
             super().__init__(parent, style=style | wx.TRANSPARENT_WINDOW, name=self.WND_NAME)
 
@@ -53,12 +76,13 @@ class Widget(wx.Window):
             SetWindowLong(self.GetHandle(), GWL_STYLE, sty)
         # 确保颜色可以被继承
         super().SetBackgroundColour(parent.GetBackgroundColour())
+        self.layers: dict[str, CanvasLayer] = {}
         self.SetDoubleBuffered(self.enable_double_buffer)
 
         if hasattr(parent, "gen_style"):
             self.gen_style = parent.gen_style
         else:
-            self.gen_style = Style()
+            self.gen_style = DefaultStyle.DEFAULT
         if widget_style:
             self.style = widget_style
         else:
@@ -67,6 +91,8 @@ class Widget(wx.Window):
         self.load_style(self.gen_style)
         self.initializing_style = False
         self.Bind(wx.EVT_PAINT, self.on_paint)
+        self.Bind(wx.EVT_SIZE, self.on_hit_regions_size)
+        self.Bind(wx.EVT_MOUSE_EVENTS, self.on_hit_test_mouse)
         # if self.__class__.__name__ != "Frame":
         #     self.Bind(wx.EVT_ERASE_BACKGROUND, lambda _:None)
         self.py_font = parent.GetFont() if hasattr(parent, "GetFont") else None
@@ -84,7 +110,8 @@ class Widget(wx.Window):
         if not hasattr(font, "CWX_RAW_SIZE"):
             font = wx.Font(font)
             font.CWX_RAW_SIZE = font.GetPointSize()
-            font.SetPointSize(round(font.GetPointSize() * SCALE))
+            font.SetPointSize(round(font.GetPointSize() * self.scale))
+            font.CWX_SCALE = self.scale  # 字体按该缩放放大过, 缩放改变时重新放大
         super().SetFont(font)
         self.py_font = font
 
@@ -94,6 +121,13 @@ class Widget(wx.Window):
     def Disable(self):
         self.Enable(False)
 
+    def Layout(self) -> bool:
+        """重新布局, 之后立即将轻量控件的位置同步到命中测试的空间索引"""
+        result = super().Layout()
+        if self.layer_host is not None and (tree := self.layer_host.light_trees.get(self.GetHandle())):
+            tree.sync_layout()
+        return result
+
     def GetTupClientSize(self) -> tuple[int, int]:
         return tuple(typing.cast(tuple[int, int], super().GetClientSize().GetIM()))
 
@@ -102,61 +136,117 @@ class Widget(wx.Window):
         super().SetId(winid)
         return self
 
+    # DPI缩放
+    # DPI scale.
+    @property
+    def scale_context(self) -> ScaleContext:
+        """控件所在顶层窗口的缩放"""
+        return get_scale_context(self)
+
+    @property
+    def scale(self) -> float:
+        """
+        当前的DPI缩放, 顶层窗口移动到DPI不同的显示器时改变, 绘制时应使用该值而非 `cwx.dpi.SCALE`
+        Current DPI scale, changes when the top level window moves to a monitor with a different DPI.
+        """
+        return get_scale_context(self).scale
+
+    def on_scale_changed(self, old_scale: float, new_scale: float):
+        """
+        顶层窗口的缩放改变时调用, 以新缩放重新应用字体, 重新计算内容大小 (`remeasure`),
+         之后重新应用通过 `SetSize` 等方法设置的大小.
+        Called when the scale of the top level window changes.
+        """
+        # 缩放记录在字体上, 从父窗口继承的已放大字体同样需要重新放大 (复制后放大, 不修改父窗口的字体)
+        font_scale = getattr(self.py_font, "CWX_SCALE", None)
+        if font_scale is not None and font_scale != new_scale:
+            font = wx.Font(self.py_font)
+            font.CWX_RAW_SIZE = self.py_font.CWX_RAW_SIZE
+            font.SetPointSize(round(font.CWX_RAW_SIZE * new_scale))
+            font.CWX_SCALE = new_scale
+            super().SetFont(font)
+            self.py_font = font
+        # Raw*方法会覆盖同名的未缩放大小, 先记下, 确保用户设置的大小优先
+        logical_sizes = dict(self.logical_sizes)
+        self.remeasure()
+        for setter, size in logical_sizes.items():
+            getattr(self, setter)(size)
+        self.update_hit_regions()
+
+    def remeasure(self):
+        """
+        缩放改变时调用, 在这里重新计算依赖缩放的尺寸 (如根据文字大小计算的最小大小)
+        Recompute scale dependent sizes here, such as a minimum size computed from the label.
+        """
+        pass
+
     # 一些关于大小设置的DPI替换
     # Some method hook about setting size.
 
     def SetSize(self, size: tuple[int, int]):
-        super().SetSize(translate_size(size))
+        self.logical_sizes["SetSize"] = size
+        super().SetSize(self.scale_context.translate_size(size))
 
     def SetMinSize(self, size: tuple[int, int]):
-        super().SetMinSize(translate_size(size))
+        self.logical_sizes["SetMinSize"] = size
+        super().SetMinSize(self.scale_context.translate_size(size))
 
     def SetMaxSize(self, size: tuple[int, int]):
-        super().SetMaxSize(translate_size(size))
+        self.logical_sizes["SetMaxSize"] = size
+        super().SetMaxSize(self.scale_context.translate_size(size))
 
     def CacheBestSize(self, size: tuple[int, int]):
-        super().CacheBestSize(translate_size(size))
+        self.logical_sizes["CacheBestSize"] = size
+        super().CacheBestSize(self.scale_context.translate_size(size))
 
     def RawSetSize(self, size: tuple[int, int]):
         """注意数值必须为int"""
+        self.logical_sizes.pop("SetSize", None)
         super().SetSize(size)
 
     def RawSetMinSize(self, size: tuple[int, int]):
         """注意数值必须为int"""
+        self.logical_sizes.pop("SetMinSize", None)
         super().SetMinSize(size)
 
     def RawSetMaxSize(self, size: tuple[int, int]):
         """注意数值必须为int"""
+        self.logical_sizes.pop("SetMaxSize", None)
         super().SetMaxSize(size)
 
     def RawCacheBestSize(self, size: tuple[int, int]):
         """注意数值必须为int"""
+        self.logical_sizes.pop("CacheBestSize", None)
         super().CacheBestSize(size)
 
     # 主题函数
     # Method about theme.
     def SetBackgroundColour(self, colour: wx.Colour):
         super().SetBackgroundColour(colour)
-        self.style.bg.SetRGBA(colour.GetRGBA())
+        # 组件样式可能被多个控件共享, 以派生样式覆盖颜色, 不修改原样式
+        if self.style.bg.GetRGBA() != colour.GetRGBA():
+            self.load_widget_style(self.style.derive(bg=self.style.bg.with_normal(colour)))
 
     def SetForegroundColour(self, colour: wx.Colour):
         super().SetForegroundColour(colour)
-        self.style.fg.SetRGBA(colour.GetRGBA())
+        if self.style.fg.GetRGBA() != colour.GetRGBA():
+            self.load_widget_style(self.style.derive(fg=self.style.fg.with_normal(colour)))
 
     def load_style(self, style: Style):
         """
-        转换主题为组件样式并加载, 用`init_style`属性的存在来判断是否正在初始化组件
+        转换主题为组件样式并加载, 用`initializing_style`属性来判断是否正在初始化组件.
+        初始化后调用时, 以单次遍历切换该控件及所有子控件的主题 (见 `theme_switch.switch_theme`).
         Translate gen style into widget style and load it,
-         when `init_style` property is existed, it means it's initialing the theme on create widget.
+         after initialization, switch the theme of the widget and all its children in a single pass.
         """
-        self.gen_style = style
-        self.load_widget_style(self.translate_style(style))
-
         if self.initializing_style:
+            self.gen_style = style
+            widget_style = self.translate_style(style)
+            self.load_widget_style(widget_style)
+            self.style_signature = widget_style.signature(style)  # 切换主题时用于判断样式是否改变
             return
-        for child in self.GetChildren():
-            if hasattr(child, "load_style") and hasattr(child.load_style, "__call__"):
-                child.load_style(style)
+        from .theme_switch import switch_theme
+        switch_theme(self, style)
 
     @staticmethod
     def translate_style(style: Style) -> WidgetStyle:
@@ -168,12 +258,9 @@ class Widget(wx.Window):
 
     def on_style_update(self, event: StyleUpdateEvent):
         """
-        当组件接收到更新主题的信息时, 向该控件下所有支持update_style方法的子控件转发该消息
+        当组件接收到更新主题的信息时, 切换该控件及所有子控件的主题, 每个控件只加载一次
         """
         self.load_style(event.gen_style)
-        for child in self.GetChildren():
-            if hasattr(child, "load_style") and hasattr(child.load_style, "__call__"):
-                child.load_style(event.gen_style)
 
     def load_widget_style(self, style: WidgetStyle):
         """
@@ -195,12 +282,111 @@ class Widget(wx.Window):
 
         timer = Counter(create_start=True)
         gc = CustomGraphicsContext(wx.GraphicsContext.Create(dc))
-        self.draw_content(gc)
+        with Animation.clock.frame():
+            self.draw_content(gc)
         print(f"{self.__class__.__name__}: {timer.endT()}")
 
     def draw_content(self, gc: CustomGraphicsContext):
         pass
 
+    # 命中测试函数
+    # Method about hit testing.
+    @property
+    def hit_tester(self) -> HitTester:
+        """
+        控件的命中测试器, 在画布中时由画布持有. 可交互区域使用控件坐标 (像素)
+        Hit tester of the widget, owned by the canvas when the widget is in one.
+        """
+        if self.layer_host is not None:
+            return self.layer_host.hit_tester(self)
+        tester = getattr(self, "own_hit_tester", None)
+        if tester is None:
+            tester = self.own_hit_tester = HitTester(round(64 * self.scale))
+        return tester
+
+    def update_hit_regions(self):
+        """
+        布局改变时调用, 在这里通过 `hit_tester.set_region` 更新可交互区域
+        Called when the layout changes, update interactive regions here.
+        """
+        pass
+
+    def on_hit_regions_size(self, event: wx.SizeEvent):
+        event.Skip()
+        self.update_hit_regions()
+
+    def on_hit_test_mouse(self, event: wx.MouseEvent):
+        """为没有在自己的鼠标事件中更新命中测试器的控件记录鼠标位置"""
+        event.Skip()
+        if self.layer_host is not None:
+            tester = self.layer_host.hit_testers.get(self.GetHandle())
+        else:
+            tester = getattr(self, "own_hit_tester", None)
+        if tester is not None:
+            tester.track(event)
+
+    # 图层函数
+    # Method about layers.
+    def update_layers(self):
+        """
+        由画布在合成控件前调用, 在这里提升图层并更新图层的位置、缩放与透明度.
+        已提升为图层的元素不应再在 `draw_content` 中绘制.
+        Called by the canvas before compositing the widget, promote layers and update their transform here.
+        """
+        pass
+
+    def promote_layer(self, name: str, size: tuple[int, int], painter: Callable[[CustomGraphicsContext], None],
+                      key: Hashable = None) -> 'CanvasLayer | None':
+        """
+        将一个元素提升为图层, 内容由 `painter` 绘制到大小为 `size` 的位图上, 仅在 `key` 或大小改变时重新绘制.
+        控件不在画布中时返回None, 此时应直接绘制该元素.
+        """
+        if self.layer_host is None:
+            return None
+        layer = self.layers.get(name)
+        if layer is not None and layer.key == key and layer.size == size:
+            return layer
+
+        image = wx.Image(*size, clear=True)
+        image.SetAlpha(bytes(size[0] * size[1]))
+        gc = CustomGraphicsContext(wx.GraphicsContext.Create(image), self)
+        painter(gc)
+        gc.Destroy()
+        bitmap = wx.GraphicsRenderer.GetDefaultRenderer().CreateBitmapFromImage(image)
+        if layer is None:
+            layer = self.layers[name] = CanvasLayer(bitmap, size, key)
+        else:
+            layer.bitmap, layer.size, layer.key = bitmap, size, key
+        return layer
+
+    def remove_layer(self, name: str):
+        if self.layers.pop(name, None) is not None:
+            self.Refresh()
+
+    def refresh_layers(self):
+        """只重新合成图层, 不重绘控件内容"""
+        if self.layer_host is not None:
+            self.layer_host.refresh_layers(self)
+        else:
+            self.Refresh()
+
+
+@dataclass
+class CanvasLayer:
+    """
+    控件的子图层, 内容只光栅化一次, 画布合成时应用其位置、缩放与透明度
+    A sub layer of widget, rasterized once, its position, scale and opacity are applied during composition.
+    """
+    bitmap: wx.GraphicsBitmap
+    size: tuple[int, int]
+    key: Hashable = None  # 内容标识, 改变时重新光栅化
+    x: float = 0  # 锚点在控件中的位置 (像素)
+    y: float = 0
+    anchor: tuple[float, float] = (0.5, 0.5)  # 锚点在图层中的位置比例
+    scale: float = 1.0
+    opacity: float = 1.0
+    visible: bool = True
+
 
 @dataclass
 class CanvasCache:
@@ -225,10 +411,22 @@ class TopWindowCanvas:
 
         self.handled_windows: dict[int, Widget] = {}
         self.render_cache: dict[int, CanvasCache] = {}  # 窗口句柄 -> 渲染缓存
+        self.pacer = FramePacer()  # 窗口内所有动画共用的帧率调节器
+        self.invalidation = invalidation.InvalidationTracker(self.flush_invalidation)
+        self.alloc_profiler: AllocationProfiler | None = None  # 启用分配统计时逐帧统计内存分配
+        if GlobalSettings.profile_allocations:
+            self.alloc_profiler = AllocationProfiler(GlobalSettings.allocation_profile_frames,
+                                                     export_path=GlobalSettings.allocation_profile_export)
+        self.suspended = False  # 顶层窗口最小化或隐藏时暂停绘制与动画
+        self.light_trees: dict[int, 'LightTree'] = {}  # 宿主窗口句柄 -> 轻量控件树
+        self.hit_testers: dict[int, HitTester] = {}  # 窗口句柄 -> 命中测试器
 
         self.canvas_host.SetDoubleBuffered(True)
         self.canvas_host.Bind(wx.EVT_PAINT, self.on_paint, self.canvas_host)
         self.canvas_host.Bind(wx.EVT_ERASE_BACKGROUND, lambda e: None)
+        self.canvas_host.Bind(wx.EVT_ACTIVATE, self.on_host_activate)
+        self.canvas_host.Bind(wx.EVT_ICONIZE, self.on_host_visibility)
+        self.canvas_host.Bind(wx.EVT_SHOW, self.on_host_visibility)
 
         self.pos_test_window = wx.Window(canvas_host, style=wx.TRANSPARENT_WINDOW)
         self.pos_test_window.SetBackgroundColour(wx.BLACK)
@@ -252,13 +450,104 @@ class TopWindowCanvas:
 
         window.Unbind(wx.EVT_SIZE)
         window.Bind(wx.EVT_SIZE, self.on_window_size, window)
+        window.Bind(wx.EVT_SHOW, self.on_window_show, window)
+        window.Bind(wx.EVT_WINDOW_DESTROY, self.on_window_destroy, window)
         window.Refresh = lambda: self.refresh_window(window)
+        window.layer_host = self
 
         window.SetDoubleBuffered(False)
 
-    def on_host_size(self, event: wx.SizeEvent):
+    def hit_tester(self, window: Widget) -> HitTester:
+        """获取窗口的命中测试器, 不存在时创建"""
+        tester = self.hit_testers.get(window.GetHandle())
+        if tester is None:
+            tester = self.hit_testers[window.GetHandle()] = HitTester(round(64 * window.scale))
+        return tester
+
+    def on_window_destroy(self, event: wx.WindowDestroyEvent):
+        event.Skip()
+        self.hit_testers.pop(event.GetEventObject().GetHandle(), None)
+
+    def light_tree(self, host: Widget) -> 'LightTree':
+        """
+        获取宿主窗口中的轻量控件树, 第一次获取时创建, 并将宿主窗口的鼠标与键盘事件交给控件树分发
+        Get the lightweight widget tree of a host window, the host's mouse and key events are routed by the tree.
+        """
+        tree = self.light_trees.get(host.GetHandle())
+        if tree is not None:
+            return tree
+        from .light_widget import LightTree
+
+        tree = self.light_trees[host.GetHandle()] = LightTree(self, host)
+        host.Bind(wx.EVT_MOUSE_EVENTS, tree.on_mouse)
+        host.Bind(wx.EVT_MOUSE_CAPTURE_LOST, tree.on_capture_lost)
+        host.Bind(wx.EVT_KEY_DOWN, tree.on_key_down)
+        host.Bind(wx.EVT_KEY_UP, tree.on_key_up)
+        host.Bind(wx.EVT_CHAR, tree.on_char)
+        host.Bind(wx.EVT_SET_FOCUS, tree.on_host_focus)
+        host.Bind(wx.EVT_KILL_FOCUS, tree.on_host_focus)
+        host.Bind(wx.EVT_WINDOW_DESTROY, self.on_light_host_destroy, host)
+        return tree
+
+    def on_light_host_destroy(self, event: wx.WindowDestroyEvent):
         event.Skip()
+        for handle, tree in list(self.light_trees.items()):
+            if tree.host is event.GetEventObject():
+                del self.light_trees[handle]
+
+    def draw_lights(self, gc: CustomGraphicsContext, window: wx.Window, region: Rect | None = None):
+        """在窗口自身的画面上合成其轻量控件, region为需要重绘的区域, 默认为整个窗口"""
+        if tree := self.light_trees.get(window.GetHandle()):
+            tree.draw(gc, region)
+
+    def on_host_activate(self, event: wx.ActivateEvent):
+        event.Skip()
+        self.pacer.is_active = event.GetActive()
+
+    def on_host_visibility(self, event: wx.IconizeEvent | wx.ShowEvent):
+        event.Skip()
+        if event.GetEventObject() is not self.canvas_host:
+            return
+        host = typing.cast(wx.TopLevelWindow, self.canvas_host)
+        suspended = not host.IsShown() or host.IsIconized()
+        if suspended == self.suspended:
+            return
+        self.suspended = suspended
+        if suspended:
+            self.suspend()
+        else:
+            self.resume()
+
+    def suspend(self):
+        """
+        顶层窗口不可见时, 将所有控件的动画跳到结尾, 此后不再逐帧播放动画与重绘
+        When the top window is invisible, jump all animations to their end, no more ticks or paints after that.
+        """
+        for window in self.handled_windows.values():
+            if hasattr(window, "fast_forward"):
+                window.fast_forward()
+
+    def resume(self):
+        """顶层窗口恢复显示时, 以动画的结束状态重绘整个画布"""
+        self.render_cache.clear()
         self.canvas_host.Refresh()
+
+    def on_window_show(self, event: wx.ShowEvent):
+        event.Skip()
+        window = event.GetEventObject()
+        if not isinstance(window, Widget):
+            return
+        if not event.IsShown() and hasattr(window, "fast_forward"):
+            window.fast_forward()
+        # 父窗口的完整渲染缓存包含了该窗口的画面
+        self.remove_cache(window)
+        if not self.suspended:
+            self.canvas_host.Refresh()
+
+    def on_host_size(self, event: wx.SizeEvent):
+        event.Skip()
+        if not self.suspended:
+            self.canvas_host.Refresh()
         # self.canvas_host.Layout()
 
     def on_window_size(self, event: wx.SizeEvent):
@@ -269,11 +558,32 @@ class TopWindowCanvas:
         if cache := self.render_cache.get(window.GetHandle()):
             if cache.own_bitmap_size and cache.own_bitmap_size != event.GetSize().Get():
                 self.remove_cache(window)
-        self.canvas_host.Refresh()
+        window.update_hit_regions()
+        if tree := self.light_trees.get(window.GetHandle()):
+            tree.invalidate_layout()  # 默认的处理在之后重新布局, 控件位置在下一次绘制或命中测试前同步
+        if not self.suspended:
+            self.canvas_host.Refresh()
 
     def refresh_window(self, window: Widget):
-        self.remove_cache(window)
-        self.canvas_host.Refresh()
+        # 不可见时只使缓存失效, 在恢复显示时统一重绘
+        if self.suspended or not window.IsShownOnScreen():
+            self.remove_cache(window)
+            return
+        # 下一次绘制前的重复请求不需要再处理, 画布在事件处理完后统一刷新
+        if self.invalidation.request(window, invalidation.CONTENT):
+            self.remove_cache(window)
+
+    def refresh_layers(self, window: Widget):
+        """控件的图层变化, 保留控件自身的渲染缓存, 只重新合成"""
+        if self.suspended or not window.IsShownOnScreen():
+            self.remove_cache(window, include_own=False)
+            return
+        if self.invalidation.request(window, invalidation.LAYERS):
+            self.remove_cache(window, include_own=False)
+
+    def flush_invalidation(self):
+        if not self.suspended:
+            self.canvas_host.Refresh()
 
     def remove_cache(self, window: Widget, include_own: bool = True):
         # print(window.__class__.__name__, "Remove cache")
@@ -293,29 +603,67 @@ class TopWindowCanvas:
     def on_paint(self, _):
         dc = wx.BufferedPaintDC(self.canvas_host)
         timer = Counter()
+        self.invalidation.on_paint()
 
         gc = CustomGraphicsContext(wx.GraphicsContext.Create(dc))
         dc.Clear()
-        self.canvas_host.draw_content(gc)
-        for child in self.canvas_host.GetChildren():
-            if isinstance(child, Widget):
-                self.draw_wnd(gc, self.canvas_host, child)
+        profiler = self.alloc_profiler
+        with Animation.clock.frame(), (profiler.frame() if profiler else nullcontext()):
+            with self.measure_draw(self.canvas_host):
+                self.canvas_host.draw_content(gc)
+            update = self.canvas_host.GetUpdateRegion().GetBox()
+            self.draw_lights(gc, self.canvas_host, (update.x, update.y, update.width, update.height)
+                             if not update.IsEmpty() else None)
+            for child in self.canvas_host.GetChildren():
+                if isinstance(child, Widget) and child.IsShown():
+                    self.draw_wnd(gc, self.canvas_host, child)
         t = timer.end()
+        self.pacer.record_paint(t)
         print(f"Each frame: {round(t * 1000, 2)}ms, fps: {round(1 / t, 2)}")
 
+    def measure_draw(self, window: wx.Window):
+        """启用分配统计时, 将窗口 `draw_content` 中的内存分配记在该窗口名下"""
+        return self.alloc_profiler.measure(window) if self.alloc_profiler else nullcontext()
+
     def draw_wnd(self, gc: CustomGraphicsContext, root_window: wx.Window, window: Widget):
         # 计算位置
         root_pos = self.pos_test_window.GetScreenPosition()
         wnd_pos, size = window.GetScreenPosition(), window.GetClientSize().Get()
         pos = (wnd_pos.x - root_pos.x, wnd_pos.y - root_pos.y)
 
+        window.update_layers()
+        self.draw_wnd_content(gc, root_window, window, pos, size)
+        if window.layers:
+            self.draw_layers(gc, window, pos)
+
+    @staticmethod
+    def draw_layers(gc: CustomGraphicsContext, window: Widget, pos: tuple[int, int]):
+        """在控件及其子控件之上合成控件的图层"""
+        for layer in window.layers.values():
+            if not layer.visible or layer.opacity <= 0 or layer.scale <= 0:
+                continue
+            w, h = layer.size[0] * layer.scale, layer.size[1] * layer.scale
+            x = pos[0] + layer.x - w * layer.anchor[0]
+            y = pos[1] + layer.y - h * layer.anchor[1]
+            if layer.opacity < 1:
+                gc.BeginLayer(layer.opacity)
+                gc.DrawBitmap(layer.bitmap, x, y, w, h)
+                gc.EndLayer()
+            else:
+                gc.DrawBitmap(layer.bitmap, x, y, w, h)
+
+    def draw_wnd_content(self, gc: CustomGraphicsContext, root_window: wx.Window, window: Widget,
+                         pos: tuple[int, int], size: tuple[int, int]):
         # 如果未启用缓存
         if not self.enable_cache:
             gc.ResetClip()
             gc.Clip(pos[0], pos[1], size[0], size[1])
-            window.draw_content(gc)
+            with self.measure_draw(window):
+                window.draw_content(gc)
+            self.draw_lights(gc, window)
             for child in window.GetChildren():
-                if isinstance(child, Widget) and not child.__class__.__name__ not in ["Frame", "Dialog"]:
+                if isinstance(child, Widget) and not child.__class__.__name__ not in ["Frame", "Dialog"] \
+                        and child.IsShown():
                     self.draw_wnd(gc, root_window, child)
 
         # 加载缓存
@@ -335,6 +683,11 @@ class TopWindowCanvas:
             gc.DrawBitmap(cache.own_bitmap, *pos, *cache.own_bitmap_size)
             return
 
+        # 使用预渲染的状态位图合成 (StateBitmapCache)
+        if not window.GetChildren() and window.GetHandle() not in self.light_trees and \
+                hasattr(window, "composite_state") and window.composite_state(gc, pos, size):
+            return
+
         # 仅根据部分渲染缓存绘制
         if cache.own_bitmap:
             # print(window.__class__.__name__, "Cache Hit")
@@ -348,7 +701,9 @@ class TopWindowCanvas:
             image.SetAlphaBuffer(self.alpha_buffer)
             low_gc = wx.GraphicsContext.Create(image)
             wnd_gc = CustomGraphicsContext(low_gc, window)
-            window.draw_content(wnd_gc)
+            with self.measure_draw(window):
+                window.draw_content(wnd_gc)
+            self.draw_lights(wnd_gc, window)
             wnd_gc.Destroy()
             gc_bitmap = gc.CreateBitmapFromImage(image)
             gc.DrawBitmap(gc_bitmap, *pos, *size)
@@ -368,7 +723,8 @@ class TopWindowCanvas:
         low_gc.GetWindow = lambda: root_window
         wnd_gc = CustomGraphicsContext(low_gc)
         for child in window.GetChildren():
-            if isinstance(child, Widget) and not child.__class__.__name__ not in ["Frame", "Dialog"]:
+            if isinstance(child, Widget) and not child.__class__.__name__ not in ["Frame", "Dialog"] \
+                    and child.IsShown():
                 wnd_gc.init_from_window(child)
                 self.draw_wnd(wnd_gc, root_window, child)
         wnd_gc.Destroy()
@@ -2,15 +2,16 @@
 按钮
 """
 import webbrowser
-from typing import cast as type_cast
+from contextlib import contextmanager
+from typing import cast as type_cast, Iterator
 
 import wx
 
 from .animation_widget import AnimationWrapper
 from .base_widget import MaskState, Widget
+from .state_bitmap import StateBitmapCache
 from ..animation.adv_anim import StateGradientAnimation
 from ..animation.state_color_wrap import StateAnimManager
-from ..dpi import SCALE
 from ..event import SimpleCommandEvent
 from ..render import CustomGraphicsContext
 from ..style import Style, WidgetStyle, Foreground, Background, Border, TRANSPARENT_COLOR
@@ -67,7 +68,7 @@ Style.register_style_cls(BtnStyle)
 
 
 # class AutoBaseColorWrapper
-class ButtonBase(Widget, AnimationWrapper, StateAnimManager):
+class ButtonBase(Widget, AnimationWrapper, StateAnimManager, StateBitmapCache):
     style: BtnStyle
     bg_anim: StateGradientAnimation
     border_anim: StateGradientAnimation
@@ -77,6 +78,7 @@ class ButtonBase(Widget, AnimationWrapper, StateAnimManager):
         super().__init__(parent, widget_style=widget_style)
         AnimationWrapper.__init__(self)
         StateAnimManager.__init__(self, "mask_state")
+        StateBitmapCache.__init__(self)
         self.mask_state = MaskState.NONE
         self.crt_bg = wx.Colour(self.style.bg)
         self.crt_border = wx.Colour(self.style.border)
@@ -96,6 +98,36 @@ class ButtonBase(Widget, AnimationWrapper, StateAnimManager):
         self.own_animation_callback()
         self.Refresh()
 
+    STATE_NAMES = {MaskState.NONE: "normal", MaskState.HOVER: "hover",
+                   MaskState.PRESSED: "pressed", MaskState.DISABLED: "disable"}
+
+    def on_mask_state_change(self, old, state):
+        self.note_state_change(old if self.IsEnabled() else MaskState.DISABLED, self.bg_anim)
+        super().on_mask_state_change(old, state)
+
+    def visual_state(self) -> MaskState:
+        return self.mask_state if self.IsEnabled() else MaskState.DISABLED
+
+    def render_states(self) -> list[MaskState]:
+        if not self.IsEnabled():
+            return [MaskState.DISABLED]
+        return [MaskState.NONE, MaskState.HOVER, MaskState.PRESSED]
+
+    def fade_animations(self):
+        return self.bg_anim, self.border_anim
+
+    @contextmanager
+    def apply_visual_state(self, state: MaskState) -> Iterator[None]:
+        saved = self.crt_bg, self.crt_border, self.mask_state
+        name = self.STATE_NAMES[state]
+        self.crt_bg, self.crt_border = self.bg_anim[name], self.border_anim[name]
+        type(self).mask_state.set_quietly(self, MaskState.NONE if state == MaskState.DISABLED else state)
+        try:
+            yield
+        finally:
+            self.crt_bg, self.crt_border = saved[:2]
+            type(self).mask_state.set_quietly(self, saved[2])
+
     def on_mouse_events(self, event: wx.MouseEvent):
         event.Skip()
         if event.Entering():
@@ -111,9 +143,7 @@ class ButtonBase(Widget, AnimationWrapper, StateAnimManager):
             self.ProcessEvent(ButtonEvent(self))
         elif event.LeftUp():
             self.mask_state = MaskState.HOVER
-        else:
-            return
-        self.Refresh()
+        # 遮罩状态改变时由 on_mask_state_change 重绘
 
     def on_button(self):
         """点击时触发, 该函数比EVT_BUTTON早触发, 为特殊按钮类的功能提供支持"""
@@ -125,9 +155,12 @@ class ButtonBase(Widget, AnimationWrapper, StateAnimManager):
         self.play_animation("bg")
         self.Refresh()
 
+    def remeasure(self):
+        self.update_size()
+
     def update_size(self):
         width, height = self.get_content_size()
-        size = (int(width + 32 * SCALE), int(height + 16 * SCALE))
+        size = (int(width + 32 * self.scale), int(height + 16 * self.scale))
         self.RawCacheBestSize(size)
         self.RawSetMinSize(size)
 
@@ -150,12 +183,9 @@ class ButtonBase(Widget, AnimationWrapper, StateAnimManager):
     def draw_btn_background(self, gc: CustomGraphicsContext):
         w, h = self.GetTupClientSize()
 
-        border_width = self.style.border_width * SCALE
-        gc.SetPen(gc.CreatePen(wx.GraphicsPenInfo(self.crt_border, border_width, self.style.border_style)))
-        gc.SetBrush(gc.CreateBrush(wx.Brush(self.crt_bg)))
-        gc.DrawInnerRoundedRect(0, 0,
-                                w, h,
-                                self.style.corner_radius * SCALE, border_width)
+        border_width = self.style.border_width * self.scale
+        gc.DrawChrome(0, 0, w, h, self.style.corner_radius * self.scale, border_width,
+                      self.crt_bg, self.crt_border, self.style.border_style, cached=not self.in_playing)
 
     def draw_btn_content(self, gc: CustomGraphicsContext):
         pass
@@ -249,4 +279,4 @@ class HyperlinkButton(Button):
 
     @staticmethod
     def translate_style(style: Style):
-        return HyperlinkBtnStyle.load(style)
+        return style.as_type(HyperlinkBtnStyle)
@@ -1,11 +1,14 @@
+from contextlib import contextmanager
+from typing import Iterator
+
 import wx
 
 from .animation_widget import AnimationWrapper
 from .base_widget import MaskState, Widget
+from .state_bitmap import StateBitmapCache
 from ..animation import KeyFrameCurves, MAKE_ANIMATION, ColorGradientAnimation
 from ..animation.adv_anim import StateGradientAnimation
 from ..animation.state_color_wrap import StateAnimManager
-from ..dpi import SCALE
 from ..event import SimpleCommandEvent
 from ..lib.animation_elements import DrawLinesAE
 from ..lib.flag_parser import parse_flag
@@ -65,19 +68,20 @@ class CheckBoxStyle(WidgetStyle):
 Style.register_style_cls(CheckBoxStyle)
 
 
-class CheckBox(Widget, AnimationWrapper, StateAnimManager):
+class CheckBox(Widget, AnimationWrapper, StateAnimManager, StateBitmapCache):
     WND_NAME = "check"
     style: CheckBoxStyle
     check_sym_am: DrawLinesAE
     box_anim: StateGradientAnimation
     box_bg_anim: ColorGradientAnimation
 
-    PAD = 5 * SCALE
+    PAD = 5  # 勾选框的边距, 未经缩放
 
     def __init__(self, parent: wx.Window, label: str = "", style=0, widget_style: WidgetStyle = None):
         super().__init__(parent, style, widget_style)
         AnimationWrapper.__init__(self)
         StateAnimManager.__init__(self)
+        StateBitmapCache.__init__(self)
 
         self.current_state: wx.CheckBoxState = \
             parse_flag(style, wx.CHK_CHECKED, wx.CHK_UNDETERMINED, default=wx.CHK_UNCHECKED)
@@ -102,6 +106,7 @@ class CheckBox(Widget, AnimationWrapper, StateAnimManager):
         self.text_extent: tuple[float, float, float, float] = (1.0, 1.0, 0.0, 0.0)
 
         self.SetLabel(label)
+        self.update_hit_regions()
         self.Bind(wx.EVT_MOUSE_EVENTS, self.on_mouse_events)
         if self.current_state == wx.CHK_CHECKED:
             self.stop_animation("check")
@@ -110,10 +115,40 @@ class CheckBox(Widget, AnimationWrapper, StateAnimManager):
         self.own_animation_callback()
         self.Refresh()
 
+    STATE_NAMES = {MaskState.NONE: "normal", MaskState.HOVER: "hover", MaskState.PRESSED: "pressed"}
+
+    def on_mask_state_change(self, old, state):
+        self.note_state_change(old, self.box_anim)
+        super().on_mask_state_change(old, state)
+
+    def visual_state(self) -> MaskState:
+        return self.mask_state
+
+    def render_states(self) -> list[MaskState]:
+        return [MaskState.NONE, MaskState.HOVER, MaskState.PRESSED]
+
+    def state_content_key(self):
+        return self.GetLabel(), self.IsEnabled(), self.current_state, self.align_right
+
+    def fade_animations(self):
+        return self.box_anim, self.box_active_anim, self.border_anim
+
+    @contextmanager
+    def apply_visual_state(self, state: MaskState) -> Iterator[None]:
+        saved = self.crt_normal_bg, self.crt_active_bg, self.crt_border
+        name = self.STATE_NAMES[state]
+        self.crt_normal_bg = self.box_anim[name]
+        self.crt_active_bg = self.box_active_anim[name]
+        self.crt_border = self.border_anim[name]
+        try:
+            yield
+        finally:
+            self.crt_normal_bg, self.crt_active_bg, self.crt_border = saved
+
     def on_mouse_events(self, event: wx.MouseEvent):
         event.Skip()
-        box_pos, box_size = self.get_box_info()
-        in_box = wx.Rect2D(*box_pos, *box_size).Contains(wx.Point2D(event.GetPosition()))
+        hover_change = self.hit_tester.track(event)
+        in_box = self.hit_tester.hovered == "box"
 
         if event.IsButton() and event.LeftUp() and in_box:  # 处理点击事件
             three_state = self.state_type == wx.CHK_3STATE and self.allow_3_state_for_user
@@ -130,7 +165,7 @@ class CheckBox(Widget, AnimationWrapper, StateAnimManager):
             self.on_change_state()
             self.Refresh()
 
-        elif event.Moving() or event.Dragging() or event.IsButton():  # 处理遮罩状态更改
+        elif hover_change is not None or event.IsButton():  # 处理遮罩状态更改, 只在进出勾选框或按键时
             last_state = self.mask_state
             if in_box:
                 if event.LeftIsDown():
@@ -152,6 +187,9 @@ class CheckBox(Widget, AnimationWrapper, StateAnimManager):
         self.box_bg_anim.set_color(self.box_anim.value, self.box_active_anim.value)
         self.play_animation("box_bg")
 
+    def remeasure(self):
+        self.SetLabel(self.GetLabel())
+
     def SetLabel(self, label: str):
         super().SetLabel(label)
         gc = CustomGraphicsContext(wx.GraphicsContext.Create(self))
@@ -163,25 +201,29 @@ class CheckBox(Widget, AnimationWrapper, StateAnimManager):
         self.text_extent = gc.GetFullTextExtent(self.GetLabel())
 
     def refresh_size(self):
-        h = self.style.box_size * SCALE + self.PAD * 2
+        h = self.style.box_size * self.scale + self.PAD * self.scale * 2
         size = (int(h + self.text_extent[0]) + 100, int(h))
         self.RawSetMinSize(size)
         self.RawCacheBestSize(size)
 
+    def update_hit_regions(self):
+        box_pos, box_size = self.get_box_info()
+        self.hit_tester.set_region("box", (*box_pos, *box_size))
+
     def get_box_info(self) -> tuple[tuple[float, float], tuple[float, float]]:
         """获取勾选框位置"""
         w, h = self.GetTupClientSize()
-        box_size = (self.style.box_size * SCALE,) * 2
+        box_size = (self.style.box_size * self.scale,) * 2
         if not self.align_right:  # left
-            box_pos = (self.PAD, (h - box_size[1]) / 2)
+            box_pos = (self.PAD * self.scale, (h - box_size[1]) / 2)
         else:  # right
-            box_pos = (w - self.PAD - box_size[0], (h - box_size[1]) / 2)
+            box_pos = (w - self.PAD * self.scale - box_size[0], (h - box_size[1]) / 2)
         return box_pos, box_size
 
     def draw_content(self, gc: CustomGraphicsContext):
         # 绘制勾选框
         box_pos, box_size = self.get_box_info()
-        radius = self.style.box_corner_radius * SCALE
+        radius = self.style.box_corner_radius * self.scale
         with gc.State:
             gc.Translate(*box_pos)
             # 绘制背景
@@ -193,7 +235,7 @@ class CheckBox(Widget, AnimationWrapper, StateAnimManager):
             if self.current_state in [wx.CHK_CHECKED, wx.CHK_UNDETERMINED]:
                 gc.SetPen(gc.CreatePen(wx.GraphicsPenInfo(box_bg_color, width=0)))
             else:
-                gc.SetPen(gc.CreatePen(wx.GraphicsPenInfo(self.crt_border, width=round(SCALE))))
+                gc.SetPen(gc.CreatePen(wx.GraphicsPenInfo(self.crt_border, width=round(self.scale))))
             gc.DrawRoundedRectangle(0, 0, *box_size, radius)
 
             if self.current_state in [wx.CHK_CHECKED, wx.CHK_UNDETERMINED]:  # 绘制选中或者半选中
@@ -205,8 +247,8 @@ class CheckBox(Widget, AnimationWrapper, StateAnimManager):
                            (0.52 + x, 0.08 + y)]  # 200%缩放下 - [(2, 7), (6, 10), (13, 2)]
                 elif self.current_state == wx.CHK_UNDETERMINED:
                     PTS = [(0.3, 0.52), (0.7, 0.52)]
-                point2Ds = [wx.Point2D(point[0] * box_size[0], point[1] * box_size[1]) for point in PTS]
-                self.check_sym_am.point2Ds = point2Ds
+                # 路径未变化时DrawLinesAE会复用已计算的弧长与点
+                self.check_sym_am.point2Ds = [(point[0] * box_size[0], point[1] * box_size[1]) for point in PTS]
                 gc.DrawAnimationElement(self.check_sym_am)
 
         # 绘制文字
@@ -217,13 +259,13 @@ class CheckBox(Widget, AnimationWrapper, StateAnimManager):
             y = h / 2
             gc.DrawText(self.GetLabel(), x, y, center_align="left")
         else:
-            x = box_pos[0] - self.PAD
+            x = box_pos[0] - self.PAD * self.scale
             y = h / 2
             gc.DrawText(self.GetLabel(), x, y, center_align="right")
 
     @staticmethod
     def translate_style(style: Style) -> CheckBoxStyle:
-        return CheckBoxStyle.load(style)
+        return style.as_type(CheckBoxStyle)
 
     # 一些无聊的设值函数
 
@@ -0,0 +1,771 @@
+"""
+数据表格, 行与列都只绘制可见的部分, 适用于百万行、数百列的数据
+Data grid virtualised on both axes, suitable for tables of 1M rows × hundreds of columns.
+"""
+from bisect import bisect_right
+from html import escape
+from math import ceil
+from typing import Callable, Iterable, Sequence
+
+import wx
+
+from .animation_widget import AnimationWrapper
+from .base_widget import Widget
+from ..animation import EZKeyFrameAnimation, KeyFrameCurves
+from ..event import SimpleCommandEvent
+from ..lib.viewport_cache import ViewportCache
+from ..render import CustomGraphicsContext
+from ..render.text_render import TextAttr, TextRender
+from ..style import Style, WidgetStyle, Foreground, Background, TRANSPARENT_COLOR
+
+cwxEVT_GRID_SELECT_CELL = wx.NewEventType()
+EVT_GRID_SELECT_CELL = wx.PyEventBinder(cwxEVT_GRID_SELECT_CELL, 1)
+
+
+class GridEvent(SimpleCommandEvent):
+    eventType = cwxEVT_GRID_SELECT_CELL
+
+    def __init__(self, window: wx.Window, row: int, col: int):
+        super().__init__(window)
+        self.row = row
+        self.col = col
+
+    def GetRow(self) -> int:
+        return self.row
+
+    def GetCol(self) -> int:
+        return self.col
+
+
+class DataGridStyle(WidgetStyle):
+    fg: Foreground
+    bg: Background
+
+    def __init__(self, fg: Foreground, bg: Background, header_fg: wx.Colour, header_bg: wx.Colour,
+                 frozen_bg: wx.Colour, selected_bg: wx.Colour, selected_border: wx.Colour, grid_line: wx.Colour,
+                 scrollbar: wx.Colour, row_height: float, header_height: float, cell_padding: float,
+                 default_col_width: float, min_col_width: float, max_col_width: float):
+        """
+        :param header_fg: 表头文字
+        :param header_bg: 表头背景
+        :param frozen_bg: 冻结行、列的背景
+        :param selected_bg: 选中单元格的背景
+        :param selected_border: 选中单元格的边框
+        :param grid_line: 网格线
+        :param scrollbar: 滚动条
+        :param row_height: 行高
+        :param header_height: 表头高度
+        :param cell_padding: 单元格文字的水平边距
+        :param default_col_width: 尚未测量的列的宽度
+        :param min_col_width: 自动列宽的最小值
+        :param max_col_width: 自动列宽的最大值
+        """
+        super().__init__(fg, bg)
+        self.header_fg = header_fg
+        self.header_bg = header_bg
+        self.frozen_bg = frozen_bg
+        self.selected_bg = selected_bg
+        self.selected_border = selected_border
+        self.grid_line = grid_line
+        self.scrollbar = scrollbar
+        self.row_height = row_height
+        self.header_height = header_height
+        self.cell_padding = cell_padding
+        self.default_col_width = default_col_width
+        self.min_col_width = min_col_width
+        self.max_col_width = max_col_width
+
+    @classmethod
+    def load(cls, style: Style) -> 'DataGridStyle':
+        colors = style.colors
+        return cls(
+            fg=Foreground.from_colors(colors.text),
+            bg=Background(TRANSPARENT_COLOR),
+            header_fg=colors.text.secondary,
+            header_bg=colors.control_fill.default,
+            frozen_bg=colors.control_fill.tertiary,
+            selected_bg=colors.control_fill.secondary,
+            selected_border=colors.accent_fill.default,
+            grid_line=colors.control_stroke.default,
+            scrollbar=colors.neutral_strong.default,
+            row_height=28,
+            header_height=32,
+            cell_padding=8,
+            default_col_width=100,
+            min_col_width=40,
+            max_col_width=400,
+        )
+
+
+Style.register_style_cls(DataGridStyle)
+
+
+class ColumnWidthCache:
+    """
+    自动列宽缓存. 列宽由抽样行 (开头的行、均匀分布的行与当前可见的行) 的文字宽度决定,
+     一列的所有抽样单元格通过批量测量一次完成. 宽度以未经缩放的逻辑像素保存, 缩放改变时不需要重新测量.
+    行改变时只测量改变的行: 变宽时直接加宽, 只有原本最宽的行变窄时才重新抽样该列.
+
+    Auto-fit column width cache. A column's width comes from sampled rows measured in one batch,
+     widths are kept in logical pixels. Changed rows are measured incrementally, the column is only
+     re-sampled when its widest row shrinks.
+    """
+    SAMPLE_HEAD = 32  # 抽样开头的行数
+    SAMPLE_SPREAD = 64  # 在其余行中均匀抽样的行数
+    MAX_INCREMENTAL = 256  # 一次改变的行超过该数量时, 只抽样测量其中的一部分
+    HEADER_ROW = -1
+
+    def __init__(self, text_of: Callable[[int, int], str], header_of: Callable[[int], str],
+                 measure: Callable[[list[str]], list[float]]):
+        """
+        :param text_of: 根据 (行, 列) 返回单元格文字
+        :param header_of: 根据列返回表头文字
+        :param measure: 批量测量文字宽度
+        """
+        self.text_of = text_of
+        self.header_of = header_of
+        self.measure = measure
+        self.widths: dict[int, float] = {}  # 列 -> 内容宽度
+        self.max_rows: dict[int, int] = {}  # 列 -> 最宽的行, 表头为HEADER_ROW
+        self.version = 0  # 任意列宽改变时增加
+
+    def __contains__(self, col: int) -> bool:
+        return col in self.widths
+
+    def get(self, col: int) -> float | None:
+        return self.widths.get(col)
+
+    def sample_rows(self, row_count: int, extra: Iterable[int] = ()) -> list[int]:
+        rows = set(range(min(row_count, self.SAMPLE_HEAD)))
+        rest = row_count - self.SAMPLE_HEAD
+        if rest > 0:
+            step = max(1, rest // self.SAMPLE_SPREAD)
+            rows.update(range(self.SAMPLE_HEAD, row_count, step))
+        rows.update(row for row in extra if 0 <= row < row_count)
+        return sorted(rows)
+
+    def measure_columns(self, cols: Iterable[int], row_count: int, visible_rows: Iterable[int] = ()):
+        """测量尚未缓存的列"""
+        rows = None
+        for col in cols:
+            if col in self.widths:
+                continue
+            if rows is None:
+                rows = self.sample_rows(row_count, visible_rows)
+            texts = [self.header_of(col)] + [self.text_of(row, col) for row in rows]
+            widths = self.measure(texts)
+            index = max(range(len(widths)), key=widths.__getitem__)
+            self.widths[col] = widths[index]
+            self.max_rows[col] = self.HEADER_ROW if index == 0 else rows[index - 1]
+            self.version += 1
+
+    def rows_changed(self, rows: Sequence[int]):
+        """行的数据改变, 只测量这些行"""
+        if not self.widths or not rows:
+            return
+        if len(rows) > self.MAX_INCREMENTAL:
+            step = len(rows) / self.MAX_INCREMENTAL
+            rows = [rows[int(i * step)] for i in range(self.MAX_INCREMENTAL)]
+        for col in list(self.widths):
+            widths = self.measure([self.text_of(row, col) for row in rows])
+            index = max(range(len(widths)), key=widths.__getitem__)
+            if widths[index] > self.widths[col]:
+                self.widths[col] = widths[index]
+                self.max_rows[col] = rows[index]
+                self.version += 1
+            elif self.max_rows[col] in rows and widths[rows.index(self.max_rows[col])] < self.widths[col]:
+                self.invalidate(col)  # 最宽的行变窄, 重新抽样
+
+    def rows_removed(self, row_count: int):
+        """行数减少, 最宽的行被删除的列重新抽样"""
+        for col in [col for col, row in self.max_rows.items() if row >= row_count]:
+            self.invalidate(col)
+
+    def invalidate(self, col: int | None = None):
+        """丢弃一列 (默认全部) 的宽度, 在下一次可见时重新测量"""
+        if col is None:
+            self.widths.clear()
+            self.max_rows.clear()
+        else:
+            self.widths.pop(col, None)
+            self.max_rows.pop(col, None)
+        self.version += 1
+
+
+class DataGrid(Widget, AnimationWrapper):
+    """
+    数据表格. 单元格数据通过 `cell_source(行, 列)` 按需获取, 行与列都只绘制可见的部分.
+    表头、冻结的行与列和可滚动的区域分别保存在各自的视口缓存中, 滚动时只平移画面并绘制新露出的单元格,
+     冻结区域只沿一个方向滚动, 角落区域不随滚动重新绘制.
+    未手动设置宽度的列在第一次可见时自动测量宽度, 尚未测量的列使用默认宽度.
+
+    Data grid virtualised on both axes. Header, frozen rows/columns and the scrolling body are cached
+     as separate viewport layers, scrolling shifts them and only renders newly exposed cells.
+    """
+    style: DataGridStyle
+
+    SCROLLBAR_HIT_WIDTH = 12
+    SCROLLBAR_WIDTH = 3
+    MIN_THUMB = 24
+    MEASURE_PASSES = 4  # 自动列宽改变后, 重新确定可见列的最大次数
+
+    def __init__(self, parent: wx.Window, row_count: int = 0, col_count: int = 0,
+                 cell_source: Callable[[int, int], object] | None = None,
+                 column_labels: Sequence[str] | Callable[[int], str] | None = None,
+                 frozen_rows: int = 0, frozen_cols: int = 0, widget_style: DataGridStyle = None):
+        """
+        :param cell_source: 根据 (行, 列) 返回单元格数据的函数, 数据以str()显示
+        :param column_labels: 表头文字的列表或函数, 默认为列号
+        :param frozen_rows: 冻结在表头下方的行数
+        :param frozen_cols: 冻结在左侧的列数
+        """
+        super().__init__(parent, style=wx.WANTS_CHARS, widget_style=widget_style)
+        AnimationWrapper.__init__(self)
+        self.row_count = row_count
+        self.col_count = col_count
+        self.cell_source: Callable[[int, int], object] = cell_source if cell_source is not None \
+            else lambda row, col: ""
+        self.column_labels = column_labels
+        self.frozen_rows = frozen_rows
+        self.frozen_cols = frozen_cols
+
+        self.column_widths: dict[int, float] = {}  # 手动设置的列宽
+        self.width_cache = ColumnWidthCache(self.get_cell_text, self.get_column_label, self.measure_texts)
+        self.col_x: list[int] = [0]  # 各列左侧的位置 (像素), 长度为列数+1
+        self.layout_key: tuple | None = None
+
+        self.regions: dict[str, ViewportCache] = {name: ViewportCache()
+                                                  for name in ("corner", "header", "frozen", "body")}
+        self.scroll_x: float = 0
+        self.scroll_y: float = 0
+        self.scroll_target: tuple[float, float] = (0, 0)
+        self.selection: tuple[int, int] | None = None
+        self.thumb_drag: tuple[str, int, float] | None = None  # (方向, 按下的鼠标位置, 滚动位置)
+
+        self.scroll_x_anim = self.reg_animation(
+            "scroll_x", EZKeyFrameAnimation(0.2, KeyFrameCurves.CUBE_EASE_OUT, 0, 0))
+        self.scroll_y_anim = self.reg_animation(
+            "scroll_y", EZKeyFrameAnimation(0.2, KeyFrameCurves.CUBE_EASE_OUT, 0, 0))
+        self.handle_value("scroll_x", "scroll_x")
+        self.handle_value("scroll_y", "scroll_y")
+
+        self.CacheBestSize((400, 300))
+        self.SetMinSize((120, 80))
+
+        self.Bind(wx.EVT_MOUSE_EVENTS, self.on_mouse_events)
+        self.Bind(wx.EVT_MOUSE_CAPTURE_LOST, self.on_capture_lost)
+        self.Bind(wx.EVT_KEY_DOWN, self.on_key_down)
+        self.Bind(wx.EVT_SIZE, self.on_size)
+
+    @staticmethod
+    def translate_style(style: Style):
+        return style.as_type(DataGridStyle)
+
+    # 数据
+    # Data.
+    def get_cell_text(self, row: int, col: int) -> str:
+        value = self.cell_source(row, col)
+        return "" if value is None else str(value)
+
+    def get_column_label(self, col: int) -> str:
+        if self.column_labels is None:
+            return str(col + 1)
+        if callable(self.column_labels):
+            return self.column_labels(col)
+        return self.column_labels[col] if col < len(self.column_labels) else ""
+
+    def measure_texts(self, texts: list[str]) -> list[float]:
+        """批量测量文字宽度 (逻辑像素)"""
+        attr = TextAttr.from_wx_font(self.GetFont())
+        return [w for w, h in TextRender.measure_texts([escape(text, quote=False) for text in texts], attr)]
+
+    def SetRowCount(self, count: int):
+        old, self.row_count = self.row_count, max(0, count)
+        if count > old:
+            self.width_cache.rows_changed(range(old, count))
+        else:
+            self.width_cache.rows_removed(count)
+        if self.selection is not None and self.selection[0] >= count:
+            self.selection = None
+        self.scroll_to(*self.scroll_target, animate=False)
+        self.RefreshAll(remeasure=False)
+
+    def SetColCount(self, count: int, column_labels: Sequence[str] | Callable[[int], str] | None = None):
+        self.col_count = max(0, count)
+        if column_labels is not None:
+            self.column_labels = column_labels
+        self.width_cache.invalidate()
+        if self.selection is not None and self.selection[1] >= count:
+            self.selection = None
+        self.RefreshAll(remeasure=False)
+
+    def SetFrozen(self, rows: int, cols: int):
+        self.frozen_rows, self.frozen_cols = max(0, rows), max(0, cols)
+        self.RefreshAll(remeasure=False)
+
+    def RefreshRows(self, start: int, end: int):
+        """行 [start, end] 的数据改变, 更新自动列宽并只重新绘制这些行"""
+        start, end = max(0, start), min(end, self.row_count - 1)
+        if start > end:
+            return
+        self.width_cache.rows_changed(range(start, end + 1))
+        header_h, row_h = self.header_height, self.row_height
+        rect = (0, header_h + start * row_h, self.col_x[-1], (end - start + 1) * row_h)
+        for region in self.regions.values():
+            region.invalidate_rect(rect)
+        self.Refresh()
+
+    def RefreshCell(self, row: int, col: int):
+        self.width_cache.rows_changed([row])
+        self.invalidate_cell(row, col)
+
+    def RefreshAll(self, remeasure: bool = True):
+        """所有数据改变, 丢弃所有视口缓存, remeasure为True时重新测量自动列宽"""
+        if remeasure:
+            self.width_cache.invalidate()
+        self.layout_key = None
+        for region in self.regions.values():
+            region.invalidate()
+        self.Refresh()
+
+    def SetFont(self, font: wx.Font):
+        super().SetFont(font)
+        self.RefreshAll()
+
+    # 列宽
+    # Column widths.
+    def SetColumnWidth(self, col: int, width: float | None):
+        """设置列宽 (未经缩放), None表示自动列宽"""
+        if width is None:
+            self.column_widths.pop(col, None)
+        else:
+            self.column_widths[col] = width
+        self.layout_key = None
+        self.Refresh()
+
+    def GetColumnWidth(self, col: int) -> int:
+        """列的当前宽度 (像素)"""
+        self.update_layout()
+        return self.col_x[col + 1] - self.col_x[col]
+
+    def logical_column_width(self, col: int) -> float:
+        if col in self.column_widths:
+            return self.column_widths[col]
+        style = self.style
+        measured = self.width_cache.get(col)
+        if measured is None:
+            return style.default_col_width
+        return min(max(measured + style.cell_padding * 2, style.min_col_width), style.max_col_width)
+
+    def update_layout(self):
+        """列宽或缩放改变时重新计算各列的位置"""
+        key = (self.width_cache.version, tuple(self.column_widths.items()), self.col_count, self.scale, self.style)
+        if key == self.layout_key:
+            return
+        self.layout_key = key
+        scale = self.scale
+        col_x = [0]
+        for col in range(self.col_count):
+            col_x.append(col_x[-1] + max(1, round(self.logical_column_width(col) * scale)))
+        self.col_x = col_x
+
+    def measure_visible_columns(self):
+        """测量可见的自动列宽列, 列宽改变会移动后面的列, 因此重复到可见列不再改变为止"""
+        for _ in range(self.MEASURE_PASSES):
+            self.update_layout()
+            cols = [col for col in self.visible_cols() if col not in self.column_widths and col not in self.width_cache]
+            if not cols:
+                return
+            self.width_cache.measure_columns(cols, self.row_count, range(*self.visible_rows()))
+
+    # 几何
+    # Geometry.
+    @property
+    def row_height(self) -> int:
+        return max(1, round(self.style.row_height * self.scale))
+
+    @property
+    def header_height(self) -> int:
+        return max(1, round(self.style.header_height * self.scale))
+
+    def frozen_size(self) -> tuple[int, int]:
+        """冻结区域的 (宽度, 高度), 高度包括表头"""
+        frozen_cols = min(self.frozen_cols, self.col_count)
+        frozen_rows = min(self.frozen_rows, self.row_count)
+        return self.col_x[frozen_cols], self.header_height + frozen_rows * self.row_height
+
+    def body_origin(self) -> tuple[int, int]:
+        """可滚动区域左上角在内容中的位置"""
+        left_w, top_h = self.frozen_size()
+        return left_w + round(self.scroll_x), top_h + round(self.scroll_y)
+
+    @property
+    def max_scroll(self) -> tuple[int, int]:
+        w, h = self.GetTupClientSize()
+        left_w, top_h = self.frozen_size()
+        content_w = self.col_x[-1] - left_w
+        content_h = (self.row_count - min(self.frozen_rows, self.row_count)) * self.row_height
+        return max(0, content_w - (w - left_w)), max(0, content_h - (h - top_h))
+
+    def visible_rows(self) -> tuple[int, int]:
+        """可滚动区域中可见的行 [first, last), 不包括冻结的行"""
+        h = self.GetTupClientSize()[1]
+        row_h, header_h = self.row_height, self.header_height
+        _, top_h = self.frozen_size()
+        _, oy = self.body_origin()
+        first = max(min(self.frozen_rows, self.row_count), (oy - header_h) // row_h)
+        last = min(self.row_count, ceil((oy + h - top_h - header_h) / row_h))
+        return first, max(first, last)
+
+    def visible_cols(self) -> list[int]:
+        """冻结的列与可滚动区域中可见的列"""
+        w = self.GetTupClientSize()[0]
+        frozen = min(self.frozen_cols, self.col_count)
+        left_w, _ = self.frozen_size()
+        ox, _ = self.body_origin()
+        return list(range(frozen)) + self.cols_in(max(ox, left_w), ox + w - left_w)
+
+    def cols_in(self, x0: float, x1: float) -> list[int]:
+        """与内容中 [x0, x1) 相交的列"""
+        col_x = self.col_x
+        first = max(0, bisect_right(col_x, x0) - 1)
+        last = min(self.col_count, bisect_right(col_x, x1 - 1))
+        return list(range(first, last))
+
+    def cell_at(self, x: float, y: float) -> tuple[int, int] | None:
+        """控件坐标处的单元格, 表头返回行-1, 不在单元格上时返回None"""
+        left_w, top_h = self.frozen_size()
+        ox, oy = self.body_origin()
+        content_x = x if x < left_w else x - left_w + ox
+        content_y = y if y < top_h else y - top_h + oy
+        header_h = self.header_height
+        col = bisect_right(self.col_x, content_x) - 1
+        if not 0 <= col < self.col_count:
+            return None
+        if content_y < header_h:
+            return -1, col
+        row = int((content_y - header_h) // self.row_height)
+        return (row, col) if 0 <= row < self.row_count else None
+
+    def cell_rect(self, row: int, col: int) -> tuple[int, int, int, int]:
+        """单元格在内容中的矩形"""
+        x = self.col_x[col]
+        return x, self.header_height + row * self.row_height, self.col_x[col + 1] - x, self.row_height
+
+    # 滚动
+    # Scrolling.
+    def scroll_to(self, x: float, y: float, animate: bool = True):
+        max_x, max_y = self.max_scroll
+        x, y = max(0, min(x, max_x)), max(0, min(y, max_y))
+        self.scroll_target = (x, y)
+        for value, attr, anim, name in ((x, "scroll_x", self.scroll_x_anim, "scroll_x"),
+                                        (y, "scroll_y", self.scroll_y_anim, "scroll_y")):
+            current = getattr(self, attr)
+            if animate and value != current and self.IsShownOnScreen():
+                anim.set_range(current, value)
+                self.play_animation(name)
+                continue
+            if anim in self.in_playing:
+                self.stop_animation(anim)
+            setattr(self, attr, value)
+        self.Refresh()
+
+    def scroll_by(self, dx: float, dy: float, animate: bool = True):
+        self.scroll_to(self.scroll_target[0] + dx, self.scroll_target[1] + dy, animate)
+
+    def EnsureVisible(self, row: int, col: int):
+        """滚动使单元格完整可见, 冻结的行、列只在另一方向上滚动"""
+        self.update_layout()
+        w, h = self.GetTupClientSize()
+        left_w, top_h = self.frozen_size()
+        x, y, cw, ch = self.cell_rect(row, col)
+        target_x, target_y = self.scroll_target
+        if col >= self.frozen_cols:
+            view_x = left_w + target_x
+            if x < view_x:
+                target_x = x - left_w
+            elif x + cw > view_x + w - left_w:
+                target_x = x + cw - w
+        if row >= self.frozen_rows:
+            view_y = top_h + target_y
+            if y < view_y:
+                target_y = y - top_h
+            elif y + ch > view_y + h - top_h:
+                target_y = y + ch - h
+        if (target_x, target_y) != self.scroll_target:
+            self.scroll_to(target_x, target_y)
+
+    def animation_callback(self):
+        self.Refresh()
+
+    def on_size(self, event: wx.SizeEvent):
+        event.Skip()
+        max_x, max_y = self.max_scroll
+        if self.scroll_target[0] > max_x or self.scroll_target[1] > max_y:
+            self.scroll_to(*self.scroll_target, animate=False)
+
+    def on_scale_changed(self, old_scale: float, new_scale: float):
+        ratio = new_scale / old_scale
+        for anim in (self.scroll_x_anim, self.scroll_y_anim):
+            if anim in self.in_playing:
+                self.stop_animation(anim)
+        self.scroll_x, self.scroll_y = self.scroll_target[0] * ratio, self.scroll_target[1] * ratio
+        self.scroll_target = (self.scroll_x, self.scroll_y)
+        super().on_scale_changed(old_scale, new_scale)
+
+    # 选择
+    # Selection.
+    def GetSelection(self) -> tuple[int, int] | None:
+        return self.selection
+
+    def SetSelection(self, row: int, col: int):
+        """选中单元格, 不发出事件"""
+        if not (0 <= row < self.row_count and 0 <= col < self.col_count):
+            return
+        if self.selection is not None:
+            self.invalidate_cell(*self.selection)
+        self.selection = (row, col)
+        self.invalidate_cell(row, col)
+
+    def select(self, row: int, col: int):
+        """用户选中单元格, 发出EVT_GRID_SELECT_CELL"""
+        row = max(0, min(row, self.row_count - 1))
+        col = max(0, min(col, self.col_count - 1))
+        if self.selection == (row, col):
+            return
+        self.SetSelection(row, col)
+        self.EnsureVisible(row, col)
+        self.ProcessEvent(GridEvent(self, row, col))
+
+    def invalidate_cell(self, row: int, col: int):
+        if not (0 <= row < self.row_count and 0 <= col < self.col_count):
+            return
+        self.update_layout()
+        rect = self.cell_rect(row, col)
+        for region in self.regions.values():
+            region.invalidate_rect(rect)
+        self.Refresh()
+
+    # 绘制
+    # Drawing.
+    def viewport_key(self) -> tuple:
+        return self.layout_key, self.frozen_rows, self.frozen_cols, self.IsEnabled()
+
+    def draw_content(self, gc: CustomGraphicsContext):
+        w, h = self.GetTupClientSize()
+        if self.style.bg.Alpha():
+            gc.SetPen(gc.TRANSPARENT_PEN)
+            gc.SetBrush(gc.CreateBrush(wx.Brush(self.style.bg)))
+            gc.DrawRectangle(0, 0, w, h)
+        self.measure_visible_columns()
+        left_w, top_h = self.frozen_size()
+        ox, oy = self.body_origin()
+        key = self.viewport_key()
+        regions = (
+            ("corner", (0, 0, left_w, top_h), (0, 0)),
+            ("header", (left_w, 0, w - left_w, top_h), (ox, 0)),
+            ("frozen", (0, top_h, left_w, h - top_h), (0, oy)),
+            ("body", (left_w, top_h, w - left_w, h - top_h), (ox, oy)),
+        )
+        for name, (x, y, region_w, region_h), origin in regions:
+            if region_w <= 0 or region_h <= 0:
+                continue
+            bitmap = self.regions[name].get_bitmap(self, (region_w, region_h), origin, key, self.paint_cells)
+            if bitmap is not None:
+                gc.DrawBitmap(bitmap, x, y, region_w, region_h)
+        self.draw_scrollbars(gc)
+
+    def paint_cells(self, gc: CustomGraphicsContext, rect: tuple[int, int, int, int]):
+        """视口缓存的绘制函数, 在内容坐标中绘制与rect相交的表头与单元格"""
+        x, y, w, h = rect
+        row_h, header_h = self.row_height, self.header_height
+        cols = self.cols_in(x, x + w)
+        if not cols:
+            return
+        gc.SetFont(self.GetFont(), self.style.fg)
+        if y < header_h:
+            for col in cols:
+                self.draw_header_cell(gc, col)
+        first = max(0, (y - header_h) // row_h)
+        last = min(self.row_count, ceil((y + h - header_h) / row_h))
+        for row in range(first, last):
+            for col in cols:
+                self.draw_cell(gc, row, col)
+
+    def draw_grid_lines(self, gc: CustomGraphicsContext, x: int, y: int, w: int, h: int):
+        """绘制单元格右侧与底部的网格线"""
+        line = max(1, round(self.scale))
+        gc.SetPen(gc.TRANSPARENT_PEN)
+        gc.SetBrush(gc.CreateBrush(wx.Brush(self.style.grid_line)))
+        gc.DrawRectangle(x + w - line, y, line, h)
+        gc.DrawRectangle(x, y + h - line, w - line, line)
+
+    def draw_cell_text(self, gc: CustomGraphicsContext, text: str, x: int, y: int, w: int, h: int,
+                       color: wx.Colour):
+        if not text:
+            return
+        scale = gc.scale
+        # 文字以Pango标记渲染, 需要转义; 单元格已由视口缓存保存, 不再进入全局文字缓存
+        bitmap = TextRender.render(gc, gc.ConvertText(escape(text, quote=False)), color, scale, cache=False)
+        t_w, t_h = bitmap.size
+        padding = self.style.cell_padding * scale
+        text_x, text_y = int(x + padding), int(y + (h - t_h) / 2)
+        if t_w > w - padding * 2:  # 文字超出单元格, 裁剪
+            with gc.State:
+                gc.Clip(x, y, max(0, w - padding), h)
+                gc.DrawBitmap(bitmap.bitmap, text_x, text_y, t_w, t_h)
+        else:
+            gc.DrawBitmap(bitmap.bitmap, text_x, text_y, t_w, t_h)
+
+    def draw_header_cell(self, gc: CustomGraphicsContext, col: int):
+        style = self.style
+        x, w, h = self.col_x[col], self.col_x[col + 1] - self.col_x[col], self.header_height
+        gc.SetPen(gc.TRANSPARENT_PEN)
+        gc.SetBrush(gc.CreateBrush(wx.Brush(style.header_bg)))
+        gc.DrawRectangle(x, 0, w, h)
+        self.draw_cell_text(gc, self.get_column_label(col), x, 0, w, h,
+                            style.header_fg if self.IsEnabled() else style.fg.disabled)
+        self.draw_grid_lines(gc, x, 0, w, h)
+
+    def draw_cell(self, gc: CustomGraphicsContext, row: int, col: int):
+        style = self.style
+        x, y, w, h = self.cell_rect(row, col)
+        selected = self.selection == (row, col)
+        if selected:
+            fill = style.selected_bg
+        elif row < self.frozen_rows or col < self.frozen_cols:
+            fill = style.frozen_bg
+        else:
+            fill = None
+        if fill is not None and fill.Alpha():
+            gc.SetPen(gc.TRANSPARENT_PEN)
+            gc.SetBrush(gc.CreateBrush(wx.Brush(fill)))
+            gc.DrawRectangle(x, y, w, h)
+        self.draw_cell_text(gc, self.get_cell_text(row, col), x, y, w, h,
+                            style.fg if self.IsEnabled() else style.fg.disabled)
+        self.draw_grid_lines(gc, x, y, w, h)
+        if selected:
+            border = max(1.0, 2 * self.scale)
+            gc.SetPen(gc.CreatePen(wx.GraphicsPenInfo(style.selected_border, border)))
+            gc.SetBrush(gc.TRANSPARENT_BRUSH)
+            gc.DrawRectangle(x + border / 2, y + border / 2, w - border, h - border)
+
+    def get_thumb_rects(self) -> dict[str, tuple[float, float, float, float]]:
+        """滚动条滑块的矩形, 只包括需要滚动的方向"""
+        w, h = self.GetTupClientSize()
+        left_w, top_h = self.frozen_size()
+        max_x, max_y = self.max_scroll
+        scale = self.scale
+        bar = self.SCROLLBAR_WIDTH * scale
+        thumbs = {}
+        track_h = h - top_h
+        if max_y > 0 and track_h > 0:
+            thumb_h = max(track_h * track_h / (track_h + max_y), self.MIN_THUMB * scale)
+            thumb_y = top_h + self.scroll_y / max_y * (track_h - thumb_h)
+            thumbs["y"] = (w - bar - 2 * scale, thumb_y, bar, thumb_h)
+        track_w = w - left_w
+        if max_x > 0 and track_w > 0:
+            thumb_w = max(track_w * track_w / (track_w + max_x), self.MIN_THUMB * scale)
+            thumb_x = left_w + self.scroll_x / max_x * (track_w - thumb_w)
+            thumbs["x"] = (thumb_x, h - bar - 2 * scale, thumb_w, bar)
+        return thumbs
+
+    def draw_scrollbars(self, gc: CustomGraphicsContext):
+        thumbs = self.get_thumb_rects()
+        if not thumbs:
+            return
+        gc.SetPen(gc.TRANSPARENT_PEN)
+        gc.SetBrush(gc.CreateBrush(wx.Brush(self.style.scrollbar)))
+        for x, y, w, h in thumbs.values():
+            gc.DrawRoundedRectangle(x, y, w, h, min(w, h) / 2)
+
+    # 事件
+    # Events.
+    def on_mouse_events(self, event: wx.MouseEvent):
+        event.Skip()
+        x, y = event.GetPosition()
+        if event.GetWheelRotation():
+            amount = -event.GetWheelRotation() / event.GetWheelDelta() * event.GetLinesPerAction() * self.row_height
+            if event.GetWheelAxis() == wx.MOUSE_WHEEL_HORIZONTAL:
+                self.scroll_by(-amount, 0)
+            elif event.ShiftDown():
+                self.scroll_by(amount, 0)
+            else:
+                self.scroll_by(0, amount)
+            return
+
+        if self.thumb_drag is not None:
+            if event.Dragging():
+                self.drag_thumb(x, y)
+            elif event.LeftUp():
+                self.thumb_drag = None
+                if self.HasCapture():
+                    self.ReleaseMouse()
+            return
+
+        if event.LeftDown():
+            self.SetFocus()
+            w, h = self.GetTupClientSize()
+            hit = self.SCROLLBAR_HIT_WIDTH * self.scale
+            thumbs = self.get_thumb_rects()
+            if "y" in thumbs and x >= w - hit:
+                self.start_thumb_drag("y", y)
+            elif "x" in thumbs and y >= h - hit:
+                self.start_thumb_drag("x", x)
+            elif (cell := self.cell_at(x, y)) is not None and cell[0] >= 0:
+                self.select(*cell)
+
+    def start_thumb_drag(self, axis: str, pos: int):
+        self.thumb_drag = (axis, pos, self.scroll_x if axis == "x" else self.scroll_y)
+        self.CaptureMouse()
+
+    def drag_thumb(self, x: int, y: int):
+        axis, start, start_scroll = self.thumb_drag
+        thumb = self.get_thumb_rects().get(axis)
+        if thumb is None:
+            return
+        w, h = self.GetTupClientSize()
+        left_w, top_h = self.frozen_size()
+        max_x, max_y = self.max_scroll
+        if axis == "x":
+            track = w - left_w - thumb[2]
+            if track > 0:
+                self.scroll_to(start_scroll + (x - start) / track * max_x, self.scroll_y, animate=False)
+        else:
+            track = h - top_h - thumb[3]
+            if track > 0:
+                self.scroll_to(self.scroll_x, start_scroll + (y - start) / track * max_y, animate=False)
+
+    def on_capture_lost(self, _):
+        self.thumb_drag = None
+
+    def on_key_down(self, event: wx.KeyEvent):
+        if not self.row_count or not self.col_count:
+            event.Skip()
+            return
+        row, col = self.selection if self.selection is not None else (0, 0)
+        _, top_h = self.frozen_size()
+        page = max(1, (self.GetTupClientSize()[1] - top_h) // self.row_height - 1)
+        key = event.GetKeyCode()
+        if key == wx.WXK_UP:
+            row -= 1
+        elif key == wx.WXK_DOWN:
+            row += 1
+        elif key == wx.WXK_LEFT:
+            col -= 1
+        elif key == wx.WXK_RIGHT:
+            col += 1
+        elif key == wx.WXK_TAB:
+            col += -1 if event.ShiftDown() else 1
+        elif key == wx.WXK_PAGEUP:
+            row -= page
+        elif key == wx.WXK_PAGEDOWN:
+            row += page
+        elif key == wx.WXK_HOME:
+            row, col = (0, 0) if event.ControlDown() else (row, 0)
+        elif key == wx.WXK_END:
+            row, col = (self.row_count - 1, self.col_count - 1) if event.ControlDown() else (row, self.col_count - 1)
+        else:
+            event.Skip()
+            return
+        self.select(row, col)
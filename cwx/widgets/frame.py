@@ -3,6 +3,7 @@ from os.path import abspath
 
 import wx
 
+from cwx.dpi import ScaleContext
 from cwx.lib.settings import GlobalSettings
 from cwx.render import CustomGraphicsContext
 from cwx.style import WidgetStyle, Style, FrameTheme, AccentState, Background
@@ -66,12 +67,33 @@ class TopLevelWrapper(Widget):
             self.gen_style = gen_style
 
         self.WindowBlurEnabled = False
+        # 窗口内所有控件共用的DPI缩放, 以窗口所在显示器的缩放初始化, 之后随EVT_DPI_CHANGED改变
+        self.scale_context = ScaleContext(self.GetDPIScaleFactor())
         Widget.__init__(self, self if parent is None else parent, widget_style=widget_style)
+        self.Bind(wx.EVT_DPI_CHANGED, self.on_dpi_changed)
 
         # self.Refresh = lambda :None
         super().SetBackgroundColour(wx.BLACK)
         set_multi_size_icon(typing.cast(wx.TopLevelWindow, self), abspath("cwx/assets/icon.png"))
 
+    def set_scale(self, scale: float) -> bool:
+        """
+        修改窗口的DPI缩放, 窗口内的控件以新缩放重新布局与绘制, 不影响其他窗口. 缩放未改变时返回False
+        Change the DPI scale of the window, its widgets are re-laid out and redrawn, other windows are untouched.
+        """
+        from .scale_switch import rescale_window
+        return rescale_window(self, scale)
+
+    def on_dpi_changed(self, event: wx.DPIChangedEvent):
+        """窗口移动到DPI不同的显示器"""
+        event.Skip()
+        self.set_scale(event.GetNewDPI().GetWidth() / 96)
+
+    def on_scale_changed(self, old_scale: float, new_scale: float):
+        # 顶层窗口的大小由系统在DPI改变时调整, 不重新应用
+        self.logical_sizes.pop("SetSize", None)
+        super().on_scale_changed(old_scale, new_scale)
+
     def EnableWindowComposition(self,
                                 enable: bool = True,
                                 color: tuple[int, int, int, int] | tuple[int, int, int] | wx.Colour | None = None,
@@ -109,7 +131,7 @@ class TopLevelWrapper(Widget):
     def translate_style(style: Style) -> TopLevelStyle:
         widget_style = style.frame_style
         if widget_style.is_default_bg and (widget_style.accent_state.enabled or widget_style.backdrop_type.enabled):
-            widget_style.raw_bg = wx.BLACK
+            return widget_style.derive(raw_bg=wx.BLACK)
         return widget_style
 
     def load_widget_style(self, style: TopLevelStyle):
@@ -0,0 +1,588 @@
+"""
+无窗口(无句柄)的轻量控件, 由顶层窗口画布持有、命中测试、分发事件并合成, 适合包含大量控件的界面
+Windowless (handle-free) lightweight widgets, owned, hit-tested, event-routed and composited by the top window canvas.
+"""
+import typing
+from typing import Callable
+
+import wx
+
+from .base_widget import Widget, TopWindowCanvas
+from .button import BtnStyle, ButtonEvent
+from ..dpi import ScaleContext
+from ..lib.spatial_index import HitTester, Rect
+from ..render import CustomGraphicsContext
+from ..style import Style, WidgetStyle, MaskState
+
+
+class LightWidget:
+    """
+    轻量控件基类, 没有原生窗口, 位置与大小相对于宿主窗口 (一个普通的CWX控件).
+    可以通过 `add_to_sizer` 加入宿主窗口的布局器, 也可以手动设置位置与大小.
+    轻量控件的子控件与其共用宿主窗口的坐标, 子控件总是绘制在父控件之上.
+
+    实现:
+    1. 重写 `draw_content`, 在 (0, 0) 到控件大小的范围内绘制
+    2. 重写 `on_mouse_events`/`on_key_down`/`on_char`, 事件坐标已转换为控件坐标
+
+    Base class of lightweight widgets, without native window, positioned relative to its host window.
+    """
+    gen_style: Style
+    style: WidgetStyle
+    accepts_focus: bool = False  # 是否可以获得键盘焦点
+
+    def __init__(self, parent: 'Widget | LightWidget', widget_style: WidgetStyle = None):
+        self.parent = parent
+        self.host: Widget = parent.host if isinstance(parent, LightWidget) else parent
+        canvas: TopWindowCanvas | None = getattr(self.host.GetTopLevelParent(), "CWX_canvas", None)
+        if canvas is None:
+            raise RuntimeError("Lightweight widgets must be hosted in a window drawn by TopWindowCanvas")
+        self.tree: LightTree = canvas.light_tree(self.host)
+        self.children: list[LightWidget] = []
+        if isinstance(parent, LightWidget):
+            parent.children.append(self)
+
+        self.rect: Rect = (0, 0, 0, 0)  # 在宿主窗口中的位置与大小 (像素)
+        self.min_size: tuple[int, int] = (0, 0)
+        self.logical_sizes: dict[str, tuple[int, int]] = {}  # 设置大小的方法名 -> 未经缩放的值, 缩放改变时重新应用
+        self.sizer_item: wx.SizerItem | None = None
+        self.shown = True
+        self.enabled = True
+        self.label = ""
+        self.font: wx.Font | None = None
+        self.handlers: dict[int, list[Callable[[wx.Event], None]]] = {}
+
+        self.bitmap: wx.GraphicsBitmap | None = None  # 控件内容的渲染缓存
+        self.bitmap_size: tuple[int, int] | None = None
+
+        self.gen_style = parent.gen_style
+        self.style = widget_style if widget_style else self.translate_style(self.gen_style)
+        self.load_widget_style(self.style)
+        self.style_signature = self.style.signature(self.gen_style)  # 切换主题时用于判断样式是否改变
+        self.tree.add(self)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.label!r} at {self.rect}>"
+
+    # 布局
+    # Layout.
+    def add_to_sizer(self, sizer: wx.Sizer, proportion: int = 0, flag: int = 0, border: int = 0) -> wx.SizerItem:
+        """
+        以占位项的形式加入布局器, 布局后由画布读取占位项的位置作为控件的位置
+        Add to a sizer as a spacer item, the canvas reads back its rect after layout.
+        """
+        self.sizer_item = sizer.Add(*self.GetMinSize(), proportion, flag, border)
+        self.tree.invalidate_layout()
+        return self.sizer_item
+
+    def sync_layout(self) -> bool:
+        """从布局器的占位项同步位置, 返回位置是否改变"""
+        if self.sizer_item is None:
+            return False
+        rect = self.sizer_item.GetRect()
+        return self.apply_rect((rect.x, rect.y, rect.width, rect.height))
+
+    def apply_rect(self, rect: Rect) -> bool:
+        if rect == self.rect:
+            return False
+        if rect[2:] != self.rect[2:]:
+            self.bitmap = None
+        self.rect = rect
+        self.tree.move(self)
+        return True
+
+    def GetRect(self) -> wx.Rect:
+        return wx.Rect(*map(int, self.rect))
+
+    def GetPosition(self) -> tuple[int, int]:
+        return typing.cast(tuple[int, int], tuple(map(int, self.rect[:2])))
+
+    def GetSize(self) -> tuple[int, int]:
+        return typing.cast(tuple[int, int], tuple(map(int, self.rect[2:])))
+
+    GetTupClientSize = GetSize
+
+    def GetScreenPosition(self) -> wx.Point:
+        return self.host.ClientToScreen(wx.Point(*self.GetPosition()))
+
+    def SetPosition(self, pos: tuple[int, int]):
+        self.logical_sizes["SetPosition"] = pos
+        if self.apply_rect((*self.scale_context.translate_size(pos), *self.rect[2:])):
+            self.host.Refresh()
+
+    def SetSize(self, size: tuple[int, int]):
+        self.RawSetSize(self.scale_context.translate_size(size))
+        self.logical_sizes["SetSize"] = size
+
+    def RawSetSize(self, size: tuple[int, int]):
+        """注意数值必须为int"""
+        self.logical_sizes.pop("SetSize", None)
+        if self.apply_rect((*self.rect[:2], *size)):
+            self.host.Refresh()
+
+    def GetMinSize(self) -> tuple[int, int]:
+        return self.min_size
+
+    def SetMinSize(self, size: tuple[int, int]):
+        self.RawSetMinSize(self.scale_context.translate_size(size))
+        self.logical_sizes["SetMinSize"] = size
+
+    def RawSetMinSize(self, size: tuple[int, int]):
+        """注意数值必须为int"""
+        self.logical_sizes.pop("SetMinSize", None)
+        self.min_size = size
+        if self.sizer_item is not None:
+            self.sizer_item.SetMinSize(size)
+
+    # DPI缩放
+    # DPI scale.
+    @property
+    def scale_context(self) -> ScaleContext:
+        return self.host.scale_context
+
+    @property
+    def scale(self) -> float:
+        return self.host.scale
+
+    def on_scale_changed(self, old_scale: float, new_scale: float):
+        """宿主窗口所在顶层窗口的缩放改变时调用, 与 `Widget.on_scale_changed` 相同"""
+        logical_sizes = dict(self.logical_sizes)
+        self.remeasure()
+        for setter, size in logical_sizes.items():
+            getattr(self, setter)(size)
+        self.bitmap = None
+
+    def remeasure(self):
+        """缩放改变时调用, 在这里重新计算依赖缩放的尺寸"""
+        pass
+
+    # 状态
+    # State.
+    def GetParent(self) -> 'Widget | LightWidget':
+        return self.parent
+
+    def GetHost(self) -> Widget:
+        return self.host
+
+    def Show(self, show: bool = True):
+        if show == self.shown:
+            return
+        self.shown = show
+        if self.sizer_item is not None:
+            self.sizer_item.Show(show)
+            self.tree.invalidate_layout()
+        if not show:
+            self.tree.on_hidden(self)
+        self.host.Refresh()
+
+    def Hide(self):
+        self.Show(False)
+
+    def IsShown(self) -> bool:
+        """自身与所有父控件都显示时才视为显示"""
+        widget = self
+        while isinstance(widget, LightWidget):
+            if not widget.shown:
+                return False
+            widget = widget.parent
+        return True
+
+    def Enable(self, enable: bool = True):
+        if enable == self.enabled:
+            return
+        self.enabled = enable
+        self.Refresh()
+
+    def Disable(self):
+        self.Enable(False)
+
+    def IsEnabled(self) -> bool:
+        return self.enabled and (self.parent.IsEnabled() if isinstance(self.parent, LightWidget)
+                                 else self.host.IsEnabled())
+
+    def SetFocus(self):
+        if self.accepts_focus:
+            self.tree.set_focus(self)
+
+    def HasFocus(self) -> bool:
+        return self.tree.focused is self and self.host.HasFocus()
+
+    def GetLabel(self) -> str:
+        return self.label
+
+    def SetLabel(self, label: str):
+        self.label = label
+        self.Refresh()
+
+    def GetFont(self) -> wx.Font:
+        return self.font if self.font else self.host.GetFont()
+
+    def SetFont(self, font: wx.Font):
+        self.font = font
+        self.Refresh()
+
+    def Refresh(self):
+        """丢弃渲染缓存并请求画布重新合成宿主窗口"""
+        self.bitmap = None
+        self.host.Refresh()
+
+    def Destroy(self):
+        for child in self.children[:]:
+            child.Destroy()
+        if isinstance(self.parent, LightWidget):
+            self.parent.children.remove(self)
+        if self.sizer_item is not None:
+            self.sizer_item.Show(False)
+            self.sizer_item = None
+        self.tree.remove(self)
+        self.host.Refresh()
+
+    # 事件
+    # Events.
+    def Bind(self, event: wx.PyEventBinder, handler: Callable[[wx.Event], None]):
+        """绑定由该控件发出的事件, 没有处理函数或事件被Skip时, 事件继续交给宿主窗口处理"""
+        self.handlers.setdefault(event.typeId, []).append(handler)
+
+    def Unbind(self, event: wx.PyEventBinder):
+        self.handlers.pop(event.typeId, None)
+
+    def ProcessEvent(self, event: wx.Event) -> bool:
+        """发出事件, 事件的 `light_widget` 属性为该控件, `GetEventObject()` 为宿主窗口"""
+        event.light_widget = self
+        handlers = self.handlers.get(event.GetEventType())
+        if handlers:
+            for handler in handlers:
+                event.Skip(False)
+                handler(event)
+                if not event.GetSkipped():
+                    return True
+        return self.host.GetEventHandler().ProcessEvent(event)
+
+    def on_mouse_events(self, event: wx.MouseEvent):
+        pass
+
+    def on_key_down(self, event: wx.KeyEvent):
+        if event.GetKeyCode() == wx.WXK_TAB and event.GetModifiers() in (wx.MOD_NONE, wx.MOD_SHIFT):
+            if self.tree.navigate(self, not event.ShiftDown()):
+                return
+        event.Skip()
+
+    def on_key_up(self, event: wx.KeyEvent):
+        event.Skip()
+
+    def on_char(self, event: wx.KeyEvent):
+        event.Skip()
+
+    def on_focus_change(self, focused: bool):
+        """获得或失去键盘焦点时调用"""
+        self.Refresh()
+
+    # 主题
+    # Theme.
+    def load_style(self, style: Style):
+        """转换主题为组件样式并加载, 不包括子控件 (切换宿主窗口的主题时所有轻量控件都会被加载)"""
+        from .theme_switch import restyle
+        if restyle(self, style):
+            self.Refresh()
+
+    @staticmethod
+    def translate_style(style: Style) -> WidgetStyle:
+        return style.default_style
+
+    def load_widget_style(self, style: WidgetStyle):
+        self.style = style
+
+    @property
+    def is_dark(self) -> bool:
+        return self.gen_style.is_dark
+
+    # 绘制
+    # Drawing.
+    def draw_content(self, gc: CustomGraphicsContext):
+        pass
+
+    def get_bitmap(self) -> wx.GraphicsBitmap | None:
+        """获取控件内容的渲染图, 只在内容或大小改变后重新绘制"""
+        size = self.GetSize()
+        if size[0] <= 0 or size[1] <= 0:
+            return None
+        if self.bitmap is None or self.bitmap_size != size:
+            image = wx.Image(*size, clear=True)
+            image.SetAlpha(bytes(size[0] * size[1]))
+            gc = CustomGraphicsContext(wx.GraphicsContext.Create(image), self.host)
+            gc.SetFont(self.GetFont())
+            self.draw_content(gc)
+            gc.Destroy()
+            self.bitmap = wx.GraphicsRenderer.GetDefaultRenderer().CreateBitmapFromImage(image)
+            self.bitmap_size = size
+        return self.bitmap
+
+
+class LightTree:
+    """
+    一个宿主窗口中的所有轻量控件, 由画布持有.
+    负责从布局器同步位置、用空间索引做命中测试、分发鼠标与键盘事件, 以及在宿主窗口的画面上合成轻量控件.
+
+    All lightweight widgets of a host window, owned by the canvas.
+    """
+
+    def __init__(self, canvas: TopWindowCanvas, host: Widget):
+        self.canvas = canvas
+        self.host = host
+        self.handle = host.GetHandle()
+        self.widgets: list[LightWidget] = []  # 按创建顺序排列, 即绘制顺序
+        self.hits: HitTester[LightWidget] = HitTester(round(64 * host.scale))
+        self.captured: LightWidget | None = None  # 按下鼠标的控件, 松开前接收所有鼠标事件
+        self.focused: LightWidget | None = None
+        self.layout_dirty = False  # 宿主窗口重新布局后, 控件位置需要从布局器同步
+
+    def add(self, widget: LightWidget):
+        self.widgets.append(widget)
+        self.hits.set_region(widget, widget.rect)
+
+    def remove(self, widget: LightWidget):
+        self.widgets.remove(widget)
+        self.hits.remove_region(widget)
+        self.on_hidden(widget)
+
+    def move(self, widget: LightWidget):
+        self.hits.set_region(widget, widget.rect)
+
+    @property
+    def hovered(self) -> LightWidget | None:
+        return self.hits.hovered
+
+    def on_hidden(self, widget: LightWidget):
+        """控件隐藏或销毁后, 清除对它的引用"""
+        if self.hits.hovered is widget:
+            self.hits.hovered = None
+        if self.captured is widget:
+            self.release_capture()
+        if self.focused is widget:
+            self.focused = None
+
+    def invalidate_layout(self):
+        """宿主窗口的布局改变, 在下一次绘制或命中测试前同步控件位置"""
+        self.layout_dirty = True
+
+    def sync_layout(self):
+        """从布局器同步所有控件的位置, 每次布局只需要同步一次"""
+        self.layout_dirty = False
+        for widget in self.widgets:
+            widget.sync_layout()
+
+    def ensure_layout(self):
+        if self.layout_dirty:
+            self.sync_layout()
+
+    def draw(self, gc: CustomGraphicsContext, region: Rect | None = None):
+        """
+        在宿主窗口的画面上绘制轻量控件, 坐标为宿主窗口的坐标.
+        只绘制空间索引中与region相交的控件, 按Z序 (创建顺序) 从下到上绘制
+        :param region: 需要重绘的区域, 默认为宿主窗口的客户区
+        """
+        self.ensure_layout()
+        if region is None:
+            region = (0, 0, *self.host.GetClientSize())
+        for widget in self.hits.index.query_rect(region):
+            if not widget.IsShown():
+                continue
+            bitmap = widget.get_bitmap()
+            if bitmap is not None:
+                gc.DrawBitmap(bitmap, *widget.rect)
+
+    def hit_test(self, x: float, y: float) -> LightWidget | None:
+        self.ensure_layout()
+        return self.hits.hit(x, y, LightWidget.IsShown)
+
+    # 鼠标
+    # Mouse.
+    @staticmethod
+    def local_event(event: wx.MouseEvent, widget: LightWidget, event_type: int | None = None) -> wx.MouseEvent:
+        """复制鼠标事件并将坐标转换为控件坐标"""
+        local = typing.cast(wx.MouseEvent, event.Clone())
+        if event_type is not None:
+            local.SetEventType(event_type)
+        x, y = event.GetPosition()
+        local.SetPosition(wx.Point(int(x - widget.rect[0]), int(y - widget.rect[1])))
+        return local
+
+    def on_mouse(self, event: wx.MouseEvent):
+        event.Skip()
+        self.ensure_layout()
+        # 只在命中的控件改变时发出离开/进入事件
+        if change := self.hits.track(event, LightWidget.IsShown):
+            if change.left is not None:
+                change.left.on_mouse_events(self.local_event(event, change.left, wx.wxEVT_LEAVE_WINDOW))
+            if change.entered is not None:
+                change.entered.on_mouse_events(self.local_event(event, change.entered, wx.wxEVT_ENTER_WINDOW))
+        if event.Entering() or event.Leaving():
+            return
+        hit = self.hits.hovered
+
+        if event.ButtonDown() and hit is not None:
+            if hit.accepts_focus and hit.IsEnabled():
+                self.set_focus(hit)
+            self.captured = hit
+            if not self.host.HasCapture():
+                self.host.CaptureMouse()
+        target = self.captured or hit
+        if target is not None:
+            target.on_mouse_events(self.local_event(event, target))
+        if event.ButtonUp() and not (event.LeftIsDown() or event.MiddleIsDown() or event.RightIsDown()):
+            self.release_capture()
+
+    def release_capture(self):
+        self.captured = None
+        if self.host and self.host.HasCapture():
+            self.host.ReleaseMouse()
+
+    def on_capture_lost(self, _: wx.MouseCaptureLostEvent):
+        self.captured = None
+
+    # 键盘
+    # Keyboard.
+    def set_focus(self, widget: LightWidget | None):
+        old, self.focused = self.focused, widget
+        if widget is not None and not self.host.HasFocus():
+            self.host.SetFocus()
+        if old is not widget:
+            if old is not None:
+                old.on_focus_change(False)
+            if widget is not None:
+                widget.on_focus_change(True)
+
+    def navigate(self, current: LightWidget, forward: bool = True) -> bool:
+        """将焦点移动到下一个(上一个)可获得焦点的控件, 没有时返回False"""
+        candidates = [w for w in self.widgets if w.accepts_focus and w.IsShown() and w.IsEnabled()]
+        if current not in candidates or len(candidates) < 2:
+            return False
+        index = candidates.index(current) + (1 if forward else -1)
+        if not 0 <= index < len(candidates):
+            return False  # 交给原生的Tab导航离开宿主窗口
+        self.set_focus(candidates[index])
+        return True
+
+    def focused_target(self) -> LightWidget | None:
+        widget = self.focused
+        if widget is not None and widget.IsShown() and widget.IsEnabled():
+            return widget
+        return None
+
+    def on_key_down(self, event: wx.KeyEvent):
+        if target := self.focused_target():
+            target.on_key_down(event)
+        else:
+            event.Skip()
+
+    def on_key_up(self, event: wx.KeyEvent):
+        if target := self.focused_target():
+            target.on_key_up(event)
+        else:
+            event.Skip()
+
+    def on_char(self, event: wx.KeyEvent):
+        if target := self.focused_target():
+            target.on_char(event)
+        else:
+            event.Skip()
+
+    def on_host_focus(self, event: wx.FocusEvent):
+        event.Skip()
+        if self.focused is not None:
+            self.focused.on_focus_change(event.GetEventType() == wx.wxEVT_SET_FOCUS)
+
+
+class LightLabel(LightWidget):
+    """轻量的静态文本"""
+
+    def __init__(self, parent: 'Widget | LightWidget', label: str = "", widget_style: WidgetStyle = None):
+        super().__init__(parent, widget_style)
+        self.SetLabel(label)
+
+    def SetLabel(self, label: str):
+        super().SetLabel(label)
+        gc = CustomGraphicsContext(wx.GraphicsContext.Create(self.host))
+        gc.SetFont(self.GetFont())
+        w, h = gc.GetFullTextExtent(label)[:2]
+        self.RawSetMinSize((int(w), int(h)))
+
+    def remeasure(self):
+        self.SetLabel(self.label)
+
+    def draw_content(self, gc: CustomGraphicsContext):
+        gc.SetFont(self.GetFont(), self.style.fg if self.IsEnabled() else self.style.fg.disabled)
+        gc.DrawText(self.label, 0, 0)
+
+
+class LightButton(LightWidget):
+    """
+    轻量按钮, 使用按钮样式 (BtnStyle), 状态切换没有过渡动画.
+    点击时发出 EVT_BUTTON, 事件的 `light_widget` 属性为该按钮.
+    """
+    style: BtnStyle
+    accepts_focus = True
+
+    def __init__(self, parent: 'Widget | LightWidget', label: str = "", widget_style: BtnStyle = None):
+        self.mask_state = MaskState.NONE
+        super().__init__(parent, widget_style)
+        self.SetLabel(label)
+
+    @staticmethod
+    def translate_style(style: Style) -> BtnStyle:
+        return style.btn_style
+
+    def SetLabel(self, label: str):
+        super().SetLabel(label)
+        gc = CustomGraphicsContext(wx.GraphicsContext.Create(self.host))
+        gc.SetFont(self.GetFont())
+        w, h = gc.GetFullTextExtent(label)[:2]
+        self.RawSetMinSize((int(w + 32 * self.scale), int(h + 16 * self.scale)))
+
+    def remeasure(self):
+        self.SetLabel(self.label)
+
+    def set_mask_state(self, state: MaskState):
+        if state != self.mask_state:
+            self.mask_state = state
+            self.Refresh()
+
+    def on_mouse_events(self, event: wx.MouseEvent):
+        if event.Entering():
+            self.set_mask_state(MaskState.PRESSED if event.LeftIsDown() else MaskState.HOVER)
+        elif event.Leaving():
+            self.set_mask_state(MaskState.NONE)
+        elif event.LeftDown():
+            self.set_mask_state(MaskState.PRESSED)
+        elif event.LeftUp():
+            inside = wx.Rect(wx.Point(0, 0), wx.Size(*self.GetSize())).Contains(event.GetPosition())
+            self.set_mask_state(MaskState.HOVER if inside else MaskState.NONE)
+            if inside and self.IsEnabled():
+                self.click()
+
+    def on_key_down(self, event: wx.KeyEvent):
+        if event.GetKeyCode() in (wx.WXK_SPACE, wx.WXK_RETURN, wx.WXK_NUMPAD_ENTER):
+            if self.IsEnabled():
+                self.click()
+            return
+        super().on_key_down(event)
+
+    def click(self):
+        event = ButtonEvent(self.host)
+        self.ProcessEvent(event)
+
+    def draw_content(self, gc: CustomGraphicsContext):
+        w, h = self.GetSize()
+        if not self.IsEnabled():
+            bg, border, fg = self.style.bg.disabled, self.style.border.disabled, self.style.fg.disabled
+        else:
+            bg = {MaskState.NONE: self.style.bg.normal, MaskState.HOVER: self.style.bg.hover,
+                  MaskState.PRESSED: self.style.bg.pressed}[self.mask_state]
+            border = self.style.border.pressed if self.HasFocus() else self.style.border.normal
+            fg = self.style.fg.pressed if self.mask_state == MaskState.PRESSED else self.style.fg.normal
+        gc.DrawChrome(0, 0, w, h, self.style.corner_radius * self.scale, self.style.border_width * self.scale,
+                      bg, border, self.style.border_style)
+
+        gc.SetFont(self.GetFont(), fg)
+        t_w, t_h = gc.GetFullTextExtent(self.label)[:2]
+        gc.DrawText(self.label, int((w - t_w) / 2), int((h - t_h) / 2))
@@ -0,0 +1,501 @@
+"""
+日志视图, 适用于每秒追加数千行的日志
+Log view for tailing logs at thousands of lines per second.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from html import escape
+from math import ceil
+from typing import Iterable
+
+import wx
+
+from .base_widget import Widget
+from ..lib.line_buffer import LineBuffer, LineSearchIndex
+from ..render import CustomGraphicsContext
+from ..render.text_render import AdvancedText, TextAttr, TextBitmap, TextRender, TextWarp
+from ..style import Style, WidgetStyle, Foreground, Background, TRANSPARENT_COLOR
+from ..style.color import CT
+
+
+class LogViewStyle(WidgetStyle):
+    fg: Foreground
+    bg: Background
+
+    def __init__(self, fg: Foreground, bg: Background, match_bg: wx.Colour, current_match_bg: wx.Colour,
+                 scrollbar: wx.Colour, padding: float, line_spacing: float):
+        """
+        :param match_bg: 匹配搜索的行的背景
+        :param current_match_bg: 当前搜索结果所在行的背景
+        :param scrollbar: 滚动条
+        :param padding: 文字与边缘的距离
+        :param line_spacing: 行之间的额外间距
+        """
+        super().__init__(fg, bg)
+        self.match_bg = match_bg
+        self.current_match_bg = current_match_bg
+        self.scrollbar = scrollbar
+        self.padding = padding
+        self.line_spacing = line_spacing
+
+    @classmethod
+    def load(cls, style: Style) -> 'LogViewStyle':
+        colors = style.colors
+        return cls(
+            fg=Foreground.from_colors(colors.text),
+            bg=Background(TRANSPARENT_COLOR),
+            match_bg=CT.with_alpha(colors.accent_fill.default, 0x30),
+            current_match_bg=CT.with_alpha(colors.accent_fill.default, 0x70),
+            scrollbar=colors.neutral_strong.default,
+            padding=8,
+            line_spacing=2,
+        )
+
+
+Style.register_style_cls(LogViewStyle)
+
+
+class LogView(Widget):
+    """
+    日志视图. 行保存在有界的环形缓冲区中 (可以使用 `MappedLineBuffer` 将文字放在内存映射文件中),
+     每行只在第一次可见时栅格化一次, 位图按行号缓存, 之后每帧只是绘制可见行的位图.
+    `AppendLines` 可以在任意线程调用, 追加的行在主线程中合并处理, 重绘请求由画布合并, 每帧最多绘制一次.
+    滚动位置以 (顶部行号, 行内偏移) 表示, 丢弃旧行不会移动画面; 位于底部时自动跟随新行.
+    搜索使用预先建立的行索引, 输入更长的查询时只在上一次的结果中筛选.
+
+    Log view. Lines live in a bounded ring buffer, each line is rasterized once when it first becomes
+     visible and cached by line id. `AppendLines` is thread safe, appends are batched on the main thread
+     and painted at most once per frame. Stays pinned to the bottom while auto-scrolling.
+    """
+    style: LogViewStyle
+
+    MAX_RASTER_CACHE = 2048  # 缓存的行位图数量
+    MAX_HEIGHT_CACHE = 65536  # 缓存的换行后行高数量
+    SCROLLBAR_HIT_WIDTH = 12
+    SCROLLBAR_WIDTH = 3
+    MIN_THUMB = 24
+
+    def __init__(self, parent: wx.Window, capacity: int = 100000, buffer: LineBuffer | None = None,
+                 wrap: bool = True, searchable: bool = True, widget_style: LogViewStyle = None):
+        """
+        :param capacity: 保留的最大行数, 传入buffer时忽略
+        :param buffer: 行缓冲区, 例如 `MappedLineBuffer`
+        :param wrap: 是否按控件宽度自动换行
+        :param searchable: 是否建立搜索索引, 索引会在内存中保存每行的casefold文字
+        """
+        super().__init__(parent, style=wx.WANTS_CHARS, widget_style=widget_style)
+        self.buffer = buffer if buffer is not None else LineBuffer(capacity)
+        self.index = LineSearchIndex() if searchable else None
+        self.wrap = wrap
+
+        self.rasters: dict[int, tuple[TextBitmap, int]] = {}  # 行号 -> (位图, 行高)
+        self.heights: dict[int, int] = {}  # 行号 -> 行高 (像素), 用于滚动经过尚未绘制的行
+        self.raster_key: tuple | None = None  # 影响所有行位图的参数, 改变时清空缓存
+        self.text_attr: TextAttr | None = None
+
+        self.pending: list[str] = []  # 等待主线程处理的行
+        self.pending_lock = threading.Lock()
+        self.flush_scheduled = False
+
+        self.auto_scroll = True
+        self.top_id = self.buffer.first_id  # 视口顶部的行
+        self.top_offset = 0  # 顶部行被卷出视口的像素数
+        self.visible_ids: tuple[int, int] = (0, 0)  # 上一次绘制的行 [first, last)
+        self.thumb_drag: tuple[int, float] | None = None  # (按下的鼠标y, 滚动比例)
+
+        self.query = ""
+        self.matches: list[int] = []  # 匹配搜索的行号, 递增
+        self.current_match: int = wx.NOT_FOUND
+
+        self.CacheBestSize((400, 240))
+        self.SetMinSize((80, 64))
+
+        self.Bind(wx.EVT_MOUSE_EVENTS, self.on_mouse_events)
+        self.Bind(wx.EVT_MOUSE_CAPTURE_LOST, self.on_capture_lost)
+        self.Bind(wx.EVT_KEY_DOWN, self.on_key_down)
+        self.Bind(wx.EVT_SIZE, self.on_size)
+
+    @staticmethod
+    def translate_style(style: Style):
+        return style.as_type(LogViewStyle)
+
+    # 数据
+    # Data.
+    def AppendLines(self, lines: Iterable[str]):
+        """追加多行, 可以在任意线程调用"""
+        with self.pending_lock:
+            self.pending.extend(lines)
+            if self.flush_scheduled:
+                return
+            self.flush_scheduled = True
+        wx.CallAfter(self.flush_pending)
+
+    def AppendText(self, text: str):
+        """追加文字, 按换行符分为多行"""
+        self.AppendLines(text.splitlines())
+
+    def flush_pending(self):
+        """在主线程中将等待的行写入缓冲区与索引"""
+        with self.pending_lock:
+            lines, self.pending = self.pending, []
+            self.flush_scheduled = False
+        if not self or not lines:
+            return
+        buffer, index = self.buffer, self.index
+        if any("\n" in text for text in lines):  # 含换行符的行拆分为多行
+            lines = [part.rstrip("\r") for text in lines for part in text.split("\n")]
+        query = self.query.casefold()
+        for text in lines:
+            line_id = buffer.append(text)
+            folded = index.append(line_id, text) if index is not None else None
+            if query and query in (folded if folded is not None else text.casefold()):
+                self.matches.append(line_id)
+
+        first = buffer.first_id
+        if index is not None:
+            index.evict_before(first)
+        if self.matches and self.matches[0] < first:
+            LineSearchIndex.trim(self.matches, first)
+            if self.current_match < first:
+                self.current_match = wx.NOT_FOUND
+        if self.top_id < first:
+            self.top_id, self.top_offset = first, 0
+        self.Refresh()
+
+    def Clear(self):
+        with self.pending_lock:
+            self.pending.clear()
+        self.buffer.clear()
+        if self.index is not None:
+            self.index.clear()
+            self.index.evict_before(self.buffer.first_id)
+        self.rasters.clear()
+        self.heights.clear()
+        self.matches.clear()
+        self.current_match = wx.NOT_FOUND
+        self.top_id, self.top_offset = self.buffer.first_id, 0
+        self.auto_scroll = True
+        self.Refresh()
+
+    def GetLineCount(self) -> int:
+        return len(self.buffer)
+
+    def GetLine(self, line_id: int) -> str | None:
+        return self.buffer.get(line_id)
+
+    def SetWrap(self, wrap: bool):
+        self.wrap = wrap
+        self.Refresh()
+
+    def SetFont(self, font: wx.Font):
+        super().SetFont(font)
+        self.Refresh()
+
+    # 搜索
+    # Search.
+    def SetSearch(self, query: str) -> int:
+        """
+        设置搜索文字 (不区分大小写), 跳转到视口顶部之后的第一个结果. 返回匹配的行数
+        新的查询包含上一次的查询时, 只在上一次的结果中筛选
+        """
+        folded, previous = query.casefold(), self.query.casefold()
+        buffer, index = self.buffer, self.index
+        if not folded:
+            self.matches = []
+        elif previous and previous in folded:
+            if index is not None:
+                self.matches = [line_id for line_id in self.matches if index.contains(line_id, folded)]
+            else:
+                self.matches = [line_id for line_id in self.matches
+                                if folded in (buffer.get(line_id) or "").casefold()]
+        elif index is not None:
+            self.matches = index.find(folded, buffer.first_id)
+        else:
+            self.matches = [line_id for line_id in range(buffer.first_id, buffer.next_id)
+                            if folded in buffer.get(line_id).casefold()]
+        self.query = query
+
+        if self.current_match not in self.matches or not self.matches:
+            pos = bisect_left(self.matches, self.top_id)
+            self.current_match = self.matches[pos] if pos < len(self.matches) else \
+                (self.matches[0] if self.matches else wx.NOT_FOUND)
+        if self.current_match != wx.NOT_FOUND:
+            self.EnsureVisible(self.current_match)
+        self.Refresh()
+        return len(self.matches)
+
+    def FindNext(self, forward: bool = True) -> int:
+        """跳转到下一个 (或上一个) 结果并返回其行号, 到达末尾时从头开始"""
+        if not self.matches:
+            return wx.NOT_FOUND
+        if self.current_match == wx.NOT_FOUND:
+            pos = bisect_left(self.matches, self.top_id) if forward else bisect_left(self.matches, self.top_id) - 1
+        elif forward:
+            pos = bisect_right(self.matches, self.current_match)
+        else:
+            pos = bisect_left(self.matches, self.current_match) - 1
+        self.current_match = self.matches[pos % len(self.matches)]
+        self.EnsureVisible(self.current_match)
+        self.Refresh()
+        return self.current_match
+
+    def GetMatches(self) -> list[int]:
+        return self.matches
+
+    # 行的栅格化
+    # Line rasterization.
+    def wrap_width(self) -> int | None:
+        """换行宽度 (未经缩放), 不换行时为None"""
+        if not self.wrap:
+            return None
+        scale = self.scale
+        w = self.GetTupClientSize()[0] - (self.style.padding * 2 + self.SCROLLBAR_HIT_WIDTH) * scale
+        return max(1, int(w / scale))
+
+    def check_raster_key(self):
+        """字体、缩放、样式或换行宽度改变时, 清空所有行的位图与行高"""
+        attr = TextAttr.from_wx_font(self.GetFont())
+        key = (hash(attr), self.scale, self.style, self.wrap_width(), self.IsEnabled())
+        if key != self.raster_key:
+            self.raster_key = key
+            self.text_attr = attr
+            self.rasters.clear()
+            self.heights.clear()
+
+    def make_text(self, text: str) -> AdvancedText:
+        width = self.wrap_width()
+        return AdvancedText(border=(width, 0) if width is not None else None, warp=TextWarp.WORD_CHAR,
+                            text=escape(text, quote=False), global_attr=self.text_attr)
+
+    def line_height(self, line_id: int) -> int:
+        """行高 (像素), 换行时按需测量, 不换行时所有行等高"""
+        if raster := self.rasters.get(line_id):
+            return raster[1]
+        self.check_raster_key()
+        if not self.wrap:
+            line_id = -1  # 不换行时所有行共用一个行高
+        height = self.heights.get(line_id)
+        if height is None:
+            text = self.buffer.get(line_id) if line_id >= 0 else "Ag"
+            logical_rect, _ = TextRender.get_text_bbox(self.make_text(text or ""))
+            height = self.heights[line_id] = self.pixel_height(logical_rect.height)
+            if len(self.heights) > self.MAX_HEIGHT_CACHE:
+                del self.heights[next(iter(self.heights))]
+        return height
+
+    def pixel_height(self, logical_height: float) -> int:
+        return max(1, ceil((logical_height + self.style.line_spacing) * self.scale))
+
+    def get_raster(self, gc: CustomGraphicsContext, line_id: int) -> tuple[TextBitmap, int]:
+        """获取一行的位图与行高, 每行只栅格化一次"""
+        raster = self.rasters.get(line_id)
+        if raster is None:
+            color = self.style.fg if self.IsEnabled() else self.style.fg.disabled
+            text = self.make_text(self.buffer.get(line_id) or "")
+            bitmap = TextRender.render(gc, text, color, gc.scale, cache=False)
+            height = self.line_height(-1) if not self.wrap else self.pixel_height(bitmap.logical_rect.height)
+            raster = self.rasters[line_id] = (bitmap, height)
+            if len(self.rasters) > self.MAX_RASTER_CACHE:
+                del self.rasters[next(iter(self.rasters))]
+        return raster
+
+    # 滚动
+    # Scrolling.
+    def layout_bottom(self, view_h: int):
+        """自动滚动时, 从最后一行向上确定顶部行"""
+        buffer = self.buffer
+        y = view_h
+        line_id = buffer.next_id
+        while line_id > buffer.first_id and y > 0:
+            line_id -= 1
+            y -= self.line_height(line_id)
+        if y >= 0:  # 内容不足一屏
+            self.top_id, self.top_offset = buffer.first_id, 0
+        else:
+            self.top_id, self.top_offset = line_id, -y
+
+    def scroll_by(self, dy: float):
+        """滚动dy像素, 滚动到底部时恢复自动滚动"""
+        buffer = self.buffer
+        if not len(buffer):
+            return
+        view_h = self.GetTupClientSize()[1]
+        if self.auto_scroll:
+            self.layout_bottom(view_h)
+        top_id, offset = self.top_id, self.top_offset + round(dy)
+        while offset < 0 and top_id > buffer.first_id:
+            top_id -= 1
+            offset += self.line_height(top_id)
+        while top_id < buffer.next_id - 1 and offset >= (height := self.line_height(top_id)):
+            offset -= height
+            top_id += 1
+        self.top_id, self.top_offset = top_id, max(0, offset)
+        self.auto_scroll = self.is_at_bottom(view_h)
+        self.Refresh()
+
+    def is_at_bottom(self, view_h: int) -> bool:
+        """顶部行之后的内容不超过一屏"""
+        remaining = -self.top_offset
+        for line_id in range(self.top_id, self.buffer.next_id):
+            remaining += self.line_height(line_id)
+            if remaining > view_h:
+                return False
+        return True
+
+    def scroll_to_line(self, line_id: int):
+        self.auto_scroll = False
+        self.top_id = max(self.buffer.first_id, min(line_id, self.buffer.next_id - 1))
+        self.top_offset = 0
+        self.auto_scroll = self.is_at_bottom(self.GetTupClientSize()[1])
+        self.Refresh()
+
+    def ScrollToEnd(self):
+        """滚动到最后一行并恢复自动滚动"""
+        self.auto_scroll = True
+        self.Refresh()
+
+    def IsAutoScrolling(self) -> bool:
+        return self.auto_scroll
+
+    def EnsureVisible(self, line_id: int):
+        """滚动使一行可见, 不可见的行显示在视口上部三分之一处"""
+        first, last = self.visible_ids
+        if first < line_id < last - 1:
+            return
+        self.scroll_to_line(line_id)
+        if not self.auto_scroll:
+            self.scroll_by(-self.GetTupClientSize()[1] / 3)
+
+    def on_size(self, event: wx.SizeEvent):
+        event.Skip()
+        self.Refresh()
+
+    # 绘制
+    # Drawing.
+    def draw_content(self, gc: CustomGraphicsContext):
+        w, h = self.GetTupClientSize()
+        style = self.style
+        if style.bg.Alpha():
+            gc.SetPen(gc.TRANSPARENT_PEN)
+            gc.SetBrush(gc.CreateBrush(wx.Brush(style.bg)))
+            gc.DrawRectangle(0, 0, w, h)
+        buffer = self.buffer
+        if not len(buffer):
+            self.visible_ids = (buffer.first_id, buffer.first_id)
+            return
+        self.check_raster_key()
+        if self.auto_scroll:
+            self.layout_bottom(h)
+
+        scale = gc.scale
+        x = style.padding * scale
+        y = -self.top_offset
+        line_id = self.top_id
+        # 可见范围内的搜索结果
+        matches = self.matches
+        start = bisect_left(matches, line_id)
+        visible_matches = set(matches[start:start + ceil(h / self.line_height(-1)) + 1])
+        while line_id < buffer.next_id and y < h:
+            bitmap, height = self.get_raster(gc, line_id)
+            if line_id in visible_matches:
+                gc.SetPen(gc.TRANSPARENT_PEN)
+                color = style.current_match_bg if line_id == self.current_match else style.match_bg
+                gc.SetBrush(gc.CreateBrush(wx.Brush(color)))
+                gc.DrawRectangle(0, y, w, height)
+            t_w, t_h = bitmap.size
+            gc.DrawBitmap(bitmap.bitmap, int(x + bitmap.ink_rect.x * scale),
+                          int(y + bitmap.ink_rect.y * scale), t_w, t_h)
+            y += height
+            line_id += 1
+        self.visible_ids = (self.top_id, line_id)
+        self.draw_scrollbar(gc)
+
+    def get_thumb_rect(self) -> tuple[float, float, float, float] | None:
+        """滚动条滑块, 位置按行号比例计算"""
+        w, h = self.GetTupClientSize()
+        count = len(self.buffer)
+        first, last = self.visible_ids
+        shown = last - first
+        if shown >= count or count == 0:
+            return None
+        scale = self.scale
+        thumb_h = max(h * shown / count, self.MIN_THUMB * scale)
+        ratio = 1.0 if self.auto_scroll else (self.top_id - self.buffer.first_id) / max(1, count - shown)
+        thumb_y = min(1.0, ratio) * (h - thumb_h)
+        bar = self.SCROLLBAR_WIDTH * scale
+        return w - bar - 2 * scale, thumb_y, bar, thumb_h
+
+    def draw_scrollbar(self, gc: CustomGraphicsContext):
+        rect = self.get_thumb_rect()
+        if rect is None:
+            return
+        x, y, w, h = rect
+        gc.SetPen(gc.TRANSPARENT_PEN)
+        gc.SetBrush(gc.CreateBrush(wx.Brush(self.style.scrollbar)))
+        gc.DrawRoundedRectangle(x, y, w, h, w / 2)
+
+    # 事件
+    # Events.
+    def on_mouse_events(self, event: wx.MouseEvent):
+        event.Skip()
+        x, y = event.GetPosition()
+        if event.GetWheelRotation():
+            lines = -event.GetWheelRotation() / event.GetWheelDelta() * event.GetLinesPerAction()
+            self.scroll_by(lines * self.line_height(-1))
+            return
+
+        if self.thumb_drag is not None:
+            if event.Dragging():
+                self.drag_thumb(y)
+            elif event.LeftUp():
+                self.thumb_drag = None
+                if self.HasCapture():
+                    self.ReleaseMouse()
+            return
+
+        if event.LeftDown():
+            self.SetFocus()
+            rect = self.get_thumb_rect()
+            if rect is not None and x >= self.GetTupClientSize()[0] - self.SCROLLBAR_HIT_WIDTH * self.scale:
+                count, shown = len(self.buffer), self.visible_ids[1] - self.visible_ids[0]
+                ratio = (self.top_id - self.buffer.first_id) / max(1, count - shown)
+                self.thumb_drag = (y, 1.0 if self.auto_scroll else ratio)
+                self.CaptureMouse()
+
+    def drag_thumb(self, y: int):
+        rect = self.get_thumb_rect()
+        if rect is None:
+            return
+        start_y, start_ratio = self.thumb_drag
+        track = self.GetTupClientSize()[1] - rect[3]
+        if track <= 0:
+            return
+        ratio = max(0.0, min(1.0, start_ratio + (y - start_y) / track))
+        count, shown = len(self.buffer), self.visible_ids[1] - self.visible_ids[0]
+        if ratio >= 1.0:
+            self.ScrollToEnd()
+        else:
+            self.scroll_to_line(self.buffer.first_id + round(ratio * max(0, count - shown)))
+
+    def on_capture_lost(self, _):
+        self.thumb_drag = None
+
+    def on_key_down(self, event: wx.KeyEvent):
+        key = event.GetKeyCode()
+        h = self.GetTupClientSize()[1]
+        if key == wx.WXK_UP:
+            self.scroll_by(-self.line_height(-1))
+        elif key == wx.WXK_DOWN:
+            self.scroll_by(self.line_height(-1))
+        elif key == wx.WXK_PAGEUP:
+            self.scroll_by(-h)
+        elif key == wx.WXK_PAGEDOWN:
+            self.scroll_by(h)
+        elif key == wx.WXK_HOME:
+            self.scroll_to_line(self.buffer.first_id)
+        elif key == wx.WXK_END:
+            self.ScrollToEnd()
+        elif key == wx.WXK_F3:
+            self.FindNext(not event.ShiftDown())
+        else:
+            event.Skip()
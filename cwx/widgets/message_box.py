@@ -19,8 +19,8 @@ class MessageDialog(Dialog):
         self.context = cwx.StaticText(self, label=message)
         self.buttons = []
 
-        with PaddedBoxSizer(wx.VERTICAL) as sizer:
-            with PaddedBoxSizer(wx.HORIZONTAL, padx=16, pady=16) as content_stack:
+        with PaddedBoxSizer(wx.VERTICAL, window=self) as sizer:
+            with PaddedBoxSizer(wx.HORIZONTAL, padx=16, pady=16, window=self) as content_stack:
                 content_stack.Add(self.context, 1, wx.EXPAND)
             sizer.Add(content_stack, 1, wx.EXPAND)
 
@@ -30,7 +30,7 @@ class MessageDialog(Dialog):
             self.yes_btn: cwx.Button | None = None
             self.no_btn: cwx.Button | None = None
             self.cancel_btn: cwx.Button | None = None
-            with PaddedBoxSizer(wx.HORIZONTAL, padx=12, pady=16) as btn_stack:
+            with PaddedBoxSizer(wx.HORIZONTAL, padx=12, pady=16, window=self) as btn_stack:
                 btn_stack.AddStretchSpacer()
                 if self.btn_type == wx.OK:
                     self.ok_btn = cwx.Button(self, "确定").SetId(wx.ID_OK)
@@ -6,7 +6,6 @@ import wx
 from cwx.widgets.base_widget import Widget
 from .animation_widget import AnimationWrapper
 from ..animation import EZKeyFrameAnimation, KeyFrameCurves
-from ..dpi import SCALE
 from ..render import GCRender, ARC, CustomGraphicsContext
 from ..style import Style, WidgetStyle
 from ..style.color import GradientBrush, GradientPen, CT
@@ -35,9 +34,7 @@ class ProgressBarStyle(WidgetStyle):
 
     @property
     def 赛博朋克(self) -> 'ProgressBarStyle':
-        self.bar.gradient_stops.SetStartColour(wx.Colour(0x00, 0xdb, 0xde))
-        self.bar.gradient_stops.SetEndColour(wx.Colour(0xfc, 0x00, 0xff))
-        return self
+        return self.derive(bar=GradientBrush(wx.Colour(0x00, 0xdb, 0xde), wx.Colour(0xfc, 0x00, 0xff)))
 
 
 Style.register_style_cls(ProgressBarStyle)
@@ -77,16 +74,25 @@ class ProgressBar(Widget, AnimationWrapper):
 
     def draw_content(self, gc: CustomGraphicsContext):
         w, h = type_cast(tuple[int, int], self.GetClientSize())
-        w /= SCALE
-        h /= SCALE
+        border = self.style.border
+        if border.stop_is_none and border.gradient_stops.GetCount() == 2:
+            # 纯色边框的背景使用九宫格缓存, 以设备像素绘制
+            gc.DrawChrome(0, 0, w, h, self.style.corner_radius * self.scale, border.width * self.scale,
+                          self.style.bg, border, border.pen_style)
+            track_drawn = True
+        else:
+            track_drawn = False
+        w /= self.scale
+        h /= self.scale
 
         with gc.State:
-            gc.SetTransform(gc.CreateMatrix(a=SCALE, d=SCALE))
+            gc.SetTransform(gc.CreateMatrix(a=self.scale, d=self.scale))
 
             # 绘制背景
-            gc.SetPen(self.style.border.create_pen(gc, (w, h), dpi_active=False))
-            gc.SetBrush(gc.CreateBrush(self.bg_brush))
-            gc.DrawInnerRoundedRect(0, 0, w, h, self.style.corner_radius, self.style.border.width)
+            gc.SetPen(border.create_pen(gc, (w, h), dpi_active=False))
+            if not track_drawn:
+                gc.SetBrush(gc.CreateBrush(self.bg_brush))
+                gc.DrawInnerRoundedRect(0, 0, w, h, self.style.corner_radius, border.width)
 
             # 绘制进度
             gc.SetBrush(self.style.bar.create_brush(gc, (w, h)))
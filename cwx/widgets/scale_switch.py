@@ -0,0 +1,63 @@
+"""
+运行时的DPI缩放切换, 只重新布局与重绘缩放改变了的顶层窗口, 其他窗口的缓存不受影响
+Runtime DPI scale switching, only the top level window whose scale changed is re-laid out and re-rasterized.
+"""
+import wx
+
+from .base_widget import Widget, TopWindowCanvas, ScaleChangedEvent
+from .theme_switch import invalidate
+
+
+def rescale_sizer(sizer: wx.Sizer, ratio: float):
+    """按比例缩放布局器中的固定间隔 (AddSpacer)"""
+    for item in sizer.GetChildren():
+        if item.IsSizer():
+            rescale_sizer(item.GetSizer(), ratio)
+        elif item.IsSpacer() and item.GetProportion() == 0:
+            w, h = item.GetMinSize().Get()
+            item.SetMinSize((round(w * ratio), round(h * ratio)))
+
+
+def rescale_window(top: wx.Window, scale: float) -> bool:
+    """
+    修改顶层窗口的缩放. 在冻结的窗口中遍历一次窗口树, 每个控件 (与轻量控件) 以新缩放重新计算字体与大小,
+     丢弃该窗口的所有渲染缓存, 之后重新布局并发出 EVT_SCALE_CHANGED. 缩放未改变时返回False.
+
+    Change the scale of a top level window, walking its tree once inside Freeze/Thaw, every widget recomputes
+     its fonts and sizes, all caches of this window are dropped, then it is re-laid out and EVT_SCALE_CHANGED is sent.
+    """
+    context = top.scale_context
+    old_scale = context.scale
+    if scale == old_scale:
+        return False
+    context.scale = scale
+
+    canvas: TopWindowCanvas | None = getattr(top, "CWX_canvas", None)
+    canvases: set[TopWindowCanvas] = set()
+    top.Freeze()
+    try:
+        stack = [top]
+        while stack:
+            window = stack.pop()
+            # 先缩放间隔, 轻量控件的占位项随后由轻量控件自己重新设置
+            if sizer := window.GetSizer():
+                rescale_sizer(sizer, scale / old_scale)
+            if isinstance(window, Widget):
+                window.on_scale_changed(old_scale, scale)
+                invalidate(window, canvases)
+                if canvas is not None and (tree := canvas.light_trees.get(window.GetHandle())):
+                    for light in tree.widgets:
+                        light.on_scale_changed(old_scale, scale)
+            # 其他顶层窗口 (如对话框) 有自己的缩放
+            stack.extend(child for child in reversed(window.GetChildren()) if not child.IsTopLevel())
+        if canvas is not None:
+            canvas.render_cache.clear()
+        top.Layout()
+    finally:
+        top.Thaw()
+
+    top.ProcessEvent(ScaleChangedEvent(top, old_scale, scale))
+    for owner in canvases:
+        if not owner.suspended:
+            owner.canvas_host.Refresh()
+    return True
@@ -7,7 +7,6 @@ from cwx.widgets.base_widget import Widget
 from cwx.widgets.text_ctrl import TextEvent
 from .animation_widget import AnimationWrapper
 from ..animation import KeyFrameCurves, EZKeyFrameAnimation, MAKE_ANIM_FRAMES, AnimationGroup, ColorGradientAnimation
-from ..dpi import SCALE
 from ..render import CustomGraphicsContext
 from ..style import Style, WidgetStyle
 
@@ -65,14 +64,12 @@ class TextCtrlStyle(WidgetStyle):
 
     @property
     def 桃子(self) -> 'TextCtrlStyle':
-        self.active_tl_border = wx.Colour(0xfc, 0xcb, 0x90)
-        self.active_br_border = wx.Colour(0xd5, 0x7e, 0xeb)
-        return self
+        return self.derive(active_tl_border=wx.Colour(0xfc, 0xcb, 0x90), active_br_border=wx.Colour(0xd5, 0x7e, 0xeb))
 
 
 Style.register_style_cls(TextCtrlStyle)
 
-TC_X_PAD = TC_Y_PAD = 4 * SCALE
+TC_X_PAD = TC_Y_PAD = 4  # 文字与边框的间距, 未经缩放
 
 
 class TextCtrl(Widget, AnimationWrapper):
@@ -137,7 +134,7 @@ class TextCtrl(Widget, AnimationWrapper):
         self.bg_brush = wx.Brush(style.bg)
         self.select_text_color = style.select_fg
         self.select_bg_brush = wx.Brush(style.select_bg)
-        self.cursor_pen = wx.GraphicsPenInfo(style.cursor, SCALE)
+        self.cursor_pen = wx.GraphicsPenInfo(style.cursor, self.scale)
         self.border_pen = wx.GraphicsPenInfo(style.border, style.border_width, style.border_style)
         if not self.initializing_style:
             self.border_width.set_range(style.border_width, style.active_border_width)
@@ -214,11 +211,7 @@ class TextCtrl(Widget, AnimationWrapper):
             # 处理字符输入
             if self.select_start is not None and self.select_start != self.cursor_char:
                 # 替换选中文本
-                cursor_char = min(self.cursor_char, self.select_start)
-                self.DeleteValue(self.select_start, self.cursor_char)
-                # self.cursor_char = cursor_char
-                print(cursor_char)
-                self.InsertValue(cursor_char, char)
+                self.ReplaceValue(self.select_start, self.cursor_char, char)
             else:
                 # 插入新字符
                 self.InsertValue(self.cursor_char, char)
@@ -304,10 +297,9 @@ class TextCtrl(Widget, AnimationWrapper):
             if success:
                 text = data.GetText()
                 if self.select_start is not None and self.select_start != self.cursor_char:
-                    start = min(self.select_start, self.cursor_char)
-                    end = max(self.select_start, self.cursor_char)
-                    self.DeleteValue(start, end)
-                self.InsertValue(self.cursor_char, text)
+                    self.ReplaceValue(self.select_start, self.cursor_char, text)
+                else:
+                    self.InsertValue(self.cursor_char, text)
                 self.update_cursor_pos_target()
                 self.Refresh()
 
@@ -330,37 +322,40 @@ class TextCtrl(Widget, AnimationWrapper):
 
     # region TextControl
 
-    def DeleteValue(self, from_pos: int, to_pos: int):
-        """删除指定范围的内容"""
+    def ReplaceValue(self, from_pos: int, to_pos: int, value: str):
+        """将指定范围的内容替换为value, 只重新测量一次文本并发出一次事件"""
         from_pos, to_pos = min(from_pos, to_pos), max(from_pos, to_pos)
-        self.text = self.text[:from_pos] + self.text[to_pos:]
-        length = to_pos - from_pos
+        self.text = self.text[:from_pos] + value + self.text[to_pos:]
         if self.cursor_char >= to_pos:
-            self.cursor_char -= length
+            self.cursor_char -= to_pos - from_pos
+        if self.cursor_char >= from_pos:
+            self.cursor_char += len(value)
         self.select_start = None
         self.load_text_extends()
         self.ProcessEvent(TextEvent(self))
         self.Refresh()
 
+    def DeleteValue(self, from_pos: int, to_pos: int):
+        """删除指定范围的内容"""
+        self.ReplaceValue(from_pos, to_pos, "")
+
     def InsertValue(self, pos: int, value: str):
         """在指定位置前插入内容"""
-        self.text = self.text[:pos] + value + self.text[pos:]
-        length = len(value)
-        if self.cursor_char >= pos:
-            self.cursor_char += length
-        self.select_start = None
-        self.load_text_extends()
-        self.ProcessEvent(TextEvent(self))
-        self.Refresh()
+        self.ReplaceValue(pos, pos, value)
 
     # endregion
 
+    def remeasure(self):
+        self.cursor_pen = wx.GraphicsPenInfo(self.style.cursor, self.scale)
+        self.text_extents.clear()  # 以像素记录, 绘制时重新计算
+        self.calc_size()
+
     def get_cursor_pos_at_point(self, point: wx.Point) -> int:
         """获取指定坐标对应的字符位置"""
         if not self.text_extents:
             self.Refresh()
 
-        text_x = TC_X_PAD
+        text_x = TC_X_PAD * self.scale
         rel_x = point.x - text_x
 
         # 使用二分法优化查找（bisect_right）
@@ -373,8 +368,8 @@ class TextCtrl(Widget, AnimationWrapper):
         gc = CustomGraphicsContext(wx.GraphicsContext.Create(self))
         gc.SetFont(self.GetFont())
         w, h = type_cast(tuple, gc.GetTextExtent(self.text))
-        pad_x = int(TC_X_PAD * 2)
-        pad_y = int(TC_Y_PAD * 2)
+        pad_x = int(TC_X_PAD * self.scale * 2)
+        pad_y = int(TC_Y_PAD * self.scale * 2)
         size = (int(w + pad_x), int(h + pad_y))
         if self.init_wnd:
             self.RawSetSize(size)
@@ -392,14 +387,20 @@ class TextCtrl(Widget, AnimationWrapper):
             self.load_text_extends(gc)
 
         # 绘制背景
-        border_width = self.border_width.value * SCALE
-        self.border_pen = wx.GraphicsPenInfo(self.style.border, border_width, self.style.border_style) \
-            .LinearGradient(0, 0, w, h, self.border_tl_color.value, self.border_br_color.value)
-        gc.SetPen(gc.CreatePen(self.border_pen))
-        gc.SetBrush(gc.CreateBrush(self.bg_brush))
-        gc.DrawInnerRoundedRect(0, 0, w, h, self.style.corner_radius, border_width)
-        text_x = TC_X_PAD
-        text_y = TC_Y_PAD
+        border_width = self.border_width.value * self.scale
+        tl_color, br_color = self.border_tl_color.value, self.border_br_color.value
+        if tl_color == br_color:  # 边框不是渐变时, 使用九宫格缓存
+            gc.DrawChrome(0, 0, w, h, self.style.corner_radius, border_width,
+                          self.bg_brush.GetColour(), tl_color, self.style.border_style,
+                          cached=self.border_anim not in self.in_playing)
+        else:
+            self.border_pen = wx.GraphicsPenInfo(self.style.border, border_width, self.style.border_style) \
+                .LinearGradient(0, 0, w, h, tl_color, br_color)
+            gc.SetPen(gc.CreatePen(self.border_pen))
+            gc.SetBrush(gc.CreateBrush(self.bg_brush))
+            gc.DrawInnerRoundedRect(0, 0, w, h, self.style.corner_radius, border_width)
+        text_x = TC_X_PAD * self.scale
+        text_y = TC_Y_PAD * self.scale
         if self.cursor_pos_anim.start == self.cursor_pos_anim.end == -1:
             cursor_x = self.text_extents[max(0, self.cursor_char)]
             self.cursor_pos_anim.set_range(cursor_x, cursor_x)
@@ -1,7 +1,8 @@
+import math
+
 import wx
 
 from cwx.animation import EZKeyFrameAnimation, KeyFrameCurves
-from cwx.dpi import SCALE
 from cwx.render import CustomGraphicsContext
 from cwx.style import WidgetStyle, Style
 from cwx.style.color import TRANSPARENT_COLOR
@@ -65,22 +66,25 @@ class Slider(Widget, AnimationWrapper):
         self.handle_value("handle_scale", "handle_scale")
 
         self.update_size()
+        self.update_hit_regions()
 
         self.Bind(wx.EVT_MOUSE_EVENTS, self.on_mouse_events)
 
     def on_mouse_events(self, event: wx.MouseEvent):
         def update_handle_pos():
             x, y, w, h = self.get_bar_box()
-            self.percent = max(0.0, min(1.0, self.drag_start_percent + (event.GetX() / SCALE - self.drag_start_x) / w))
+            self.percent = max(0.0, min(1.0, self.drag_start_percent + (event.GetX() / self.scale - self.drag_start_x) / w))
+            self.update_hit_regions()
             self.Refresh()
 
         event.Skip()
         last_mask_state = self.mask_state
-        in_box = wx.Rect2D(*(map(lambda t: t * SCALE, self.get_handle_box()))).Contains(wx.Point2D(event.GetPosition()))
+        self.hit_tester.track(event)
+        in_box = self.hit_tester.hovered == "handle"
         if event.ButtonDown() and in_box:
             self.mask_state = MaskState.PRESSED
             self.drag_start_percent = self.percent
-            self.drag_start_x = event.GetX() / SCALE
+            self.drag_start_x = event.GetX() / self.scale
             self.CaptureMouse()
             update_handle_pos()
         elif (event.Moving() or event.Dragging()) and event.LeftIsDown():
@@ -111,7 +115,14 @@ class Slider(Widget, AnimationWrapper):
             self.Refresh()
 
     def animation_callback(self):
-        self.Refresh()
+        if self.layers:
+            self.refresh_layers()  # 只有滑块内圆在缩放, 不需要重绘控件
+        else:
+            self.Refresh()
+
+    def update_hit_regions(self):
+        # 滑块区域随数值与大小移动
+        self.hit_tester.set_region("handle", tuple(t * self.scale for t in self.get_handle_box()))
 
     def update_size(self):
         size = (100, int(max(self.style.bar_height, self.style.handle_size)))
@@ -120,14 +131,14 @@ class Slider(Widget, AnimationWrapper):
 
     def draw_content(self, gc: CustomGraphicsContext):
         with gc.State:
-            gc.SetTransform(gc.CreateMatrix(a=SCALE, d=SCALE))
+            gc.SetTransform(gc.CreateMatrix(a=self.scale, d=self.scale))
             self.draw_bar(gc)
             self.draw_handle(gc)
 
     def get_bar_box(self) -> tuple[float, float, float, float]:
         w, h = self.GetTupClientSize()
-        w /= SCALE
-        h /= SCALE
+        w /= self.scale
+        h /= self.scale
         return 0, (h - self.style.bar_height) / 2, w, self.style.bar_height
 
     @staticmethod
@@ -162,6 +173,26 @@ class Slider(Widget, AnimationWrapper):
             # 绘制大圆
             gc.SetBrush(gc.CreateBrush(wx.Brush(self.style.handle_bg)))
             gc.DrawCircle(0, 0, r)
-            # 绘制小圆
+            # 绘制小圆, 提升为图层时由画布合成
+            if "handle_dot" not in self.layers:
+                gc.SetBrush(gc.CreateBrush(wx.Brush(self.style.handle_fg)))
+                gc.DrawCircle(0, 0, r * self.handle_scale)
+
+    def update_layers(self):
+        # 滑块内圆以最大半径光栅化为图层, 缩放动画只修改图层的缩放
+        radius = self.style.handle_size / 2 * self.scale
+        side = math.ceil(radius * 2) + 2
+
+        def draw_dot(gc: CustomGraphicsContext):
+            gc.EmptyPen()
             gc.SetBrush(gc.CreateBrush(wx.Brush(self.style.handle_fg)))
-            gc.DrawCircle(0, 0, r * self.handle_scale)
+            gc.DrawCircle(side / 2, side / 2, radius)
+
+        layer = self.promote_layer("handle_dot", (side, side), draw_dot, key=(self.style.handle_fg.GetRGBA(), radius))
+        if layer is None:
+            return
+        x, y, w, h = self.get_bar_box()
+        r = self.style.handle_size / 2
+        layer.x = (x + (w - self.style.handle_size) * self.percent + r) * self.scale
+        layer.y = (y + self.style.bar_height / 2) * self.scale
+        layer.scale = self.handle_scale
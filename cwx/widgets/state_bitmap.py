@@ -0,0 +1,168 @@
+"""
+控件状态位图缓存, 预渲染控件的各个视觉状态, 状态动画改为两张位图之间的淡入淡出
+Per-state widget bitmaps, every visual state of a widget is rendered once,
+ state animations become a cross-fade between two cached bitmaps in the compositor.
+"""
+import typing
+from abc import abstractmethod
+from contextlib import AbstractContextManager
+from typing import Hashable
+
+import wx
+
+from .animation_widget import AnimationWrapper
+from ..animation import Animation
+from ..lib.settings import GlobalSettings
+from ..render import CustomGraphicsContext
+
+aw = typing.cast(type[AnimationWrapper], object)
+
+
+class StateBitmapCache(aw):
+    """
+    状态位图缓存, 默认关闭, 通过 `GlobalSettings.state_bitmap_cache` 或类属性 `state_cache_enabled` 启用.
+    位图按 (状态, 大小, 组件样式, 缩放, 内容) 缓存, 在空闲时渲染, 未渲染完成或有其他动画播放时使用原本的绘制.
+
+    实现:
+    1. 重写 `visual_state`, 返回控件当前的视觉状态
+    2. 重写 `render_states`, 返回需要预渲染的所有状态
+    3. 重写 `apply_visual_state`, 临时将控件切换到某个状态用于绘制
+    4. 重写 `state_content_key`, 返回会影响画面的其他内容 (标签、选中状态等)
+    5. 重写 `fade_animations`, 返回状态过渡使用的所有动画
+    6. 状态改变, 播放状态动画之前调用 `note_state_change`
+
+    Opt-in per-state bitmap cache, bitmaps are keyed by (state, size, widget style, scale, content)
+     and rendered in idle time, the normal drawing is used until they are ready or when other animations play.
+    """
+    state_cache_enabled: bool | None = None  # None: 跟随全局设置
+
+    def __init_subclass__(cls, **kwargs):
+        # wx控件的元类不是ABCMeta, 在定义子类时检查抽象方法, 而不是等到绘制时才失败
+        super().__init_subclass__(**kwargs)
+        missing = [name for name in ("visual_state", "apply_visual_state")
+                   if getattr(getattr(cls, name), "__isabstractmethod__", False)]
+        if missing:
+            raise TypeError(f"{cls.__name__} must implement {', '.join(missing)} to use StateBitmapCache")
+
+    def __init__(self):
+        if 0.0 == 1.0:  # 欺骗类型检查器
+            super().__init__(self)
+        self.state_bitmaps: dict[Hashable, wx.GraphicsBitmap] = {}
+        self.state_bitmaps_key: tuple | None = None
+        self.state_render_pending = False
+        self.fade_from: Hashable | None = None  # 淡入淡出的起始状态, None表示无法淡入淡出
+        self.fade_to: Hashable | None = None
+        self.fade_anim: Animation | None = None  # 决定淡入淡出进度的动画
+
+    @property
+    def state_cache_active(self) -> bool:
+        if self.state_cache_enabled is None:
+            return GlobalSettings.state_bitmap_cache
+        return self.state_cache_enabled
+
+    @abstractmethod
+    def visual_state(self) -> Hashable:
+        """控件当前 (或正在过渡到) 的视觉状态"""
+
+    def render_states(self) -> list[Hashable]:
+        """需要预渲染的所有视觉状态"""
+        return [self.visual_state()]
+
+    @abstractmethod
+    def apply_visual_state(self, state: Hashable) -> AbstractContextManager:
+        """临时将控件的绘制数据切换为某个视觉状态的最终值, 返回上下文管理器, 通常以 `contextmanager` 实现"""
+
+    def state_content_key(self) -> Hashable:
+        """除视觉状态外其他影响画面的内容, 改变时缓存失效"""
+        return self.GetLabel(), self.IsEnabled()
+
+    def fade_animations(self) -> tuple[Animation, ...]:
+        """状态过渡使用的动画, 这些动画播放时可以使用淡入淡出, 其他动画播放时使用原本的绘制"""
+        return (self.fade_anim,) if self.fade_anim is not None else ()
+
+    def note_state_change(self, old_state: Hashable, anim: Animation):
+        """
+        视觉状态改变时调用, 需要在播放状态动画之前调用.
+        上一次过渡未完成时被打断的画面无法由两张位图表示, 这次过渡使用原本的绘制.
+        """
+        if self.fade_anim is not None and self.fade_anim.is_playing:
+            self.fade_from = None
+        else:
+            self.fade_from = old_state
+        self.fade_to = self.visual_state()
+        self.fade_anim = anim
+
+    def clear_state_bitmaps(self):
+        """清空缓存的状态位图"""
+        self.state_bitmaps.clear()
+        self.state_bitmaps_key = None
+
+    def has_live_animations(self) -> bool:
+        """是否有状态过渡以外的动画正在播放"""
+        fade_animations = self.fade_animations()
+        return any(anim not in fade_animations for anim in self.in_playing)
+
+    def check_state_cache(self, size: tuple[int, int]):
+        key = (size, id(self.style), self.scale, self.state_content_key())
+        if key != self.state_bitmaps_key:
+            self.state_bitmaps.clear()
+            self.state_bitmaps_key = key
+
+    def get_state_bitmap(self, state: Hashable) -> wx.GraphicsBitmap | None:
+        """获取状态位图, 未渲染时安排在空闲时渲染"""
+        bitmap = self.state_bitmaps.get(state)
+        if bitmap is None and not self.state_render_pending:
+            self.state_render_pending = True
+            wx.CallAfter(self.render_state_bitmaps)
+        return bitmap
+
+    def render_state_bitmaps(self):
+        """渲染所有缺少的状态位图, 在空闲时调用"""
+        self.state_render_pending = False
+        if not self or self.has_live_animations():  # 控件已销毁, 或画面正在其他动画中
+            return
+        size = self.GetTupClientSize()
+        if size[0] <= 0 or size[1] <= 0:
+            return
+        self.check_state_cache(size)
+        for state in self.render_states():
+            if state not in self.state_bitmaps:
+                self.state_bitmaps[state] = self.render_state_bitmap(state, size)
+
+    def render_state_bitmap(self, state: Hashable, size: tuple[int, int]) -> wx.GraphicsBitmap:
+        image = wx.Image(*size, clear=True)
+        image.SetAlpha(bytes(size[0] * size[1]))
+        gc = CustomGraphicsContext(wx.GraphicsContext.Create(image), self)
+        with self.apply_visual_state(state), Animation.clock.frame():
+            self.draw_content(gc)
+        gc.Destroy()
+        return wx.GraphicsRenderer.GetDefaultRenderer().CreateBitmapFromImage(image)
+
+    def composite_state(self, gc: CustomGraphicsContext, pos: tuple[int, int], size: tuple[int, int]) -> bool:
+        """
+        由画布调用, 使用状态位图绘制控件, 无法使用时返回False, 由画布使用原本的绘制
+        Called by the canvas, draw the widget from state bitmaps, return False to fall back to the normal drawing.
+        """
+        if not self.state_cache_active or self.has_live_animations():
+            return False
+        self.check_state_cache(size)
+
+        fade_anim = self.fade_anim
+        if fade_anim is not None and fade_anim.is_playing:
+            if self.fade_from is None:
+                return False
+            from_bitmap = self.get_state_bitmap(self.fade_from)
+            to_bitmap = self.get_state_bitmap(self.fade_to)
+            if from_bitmap is None or to_bitmap is None:
+                return False
+            gc.DrawBitmap(from_bitmap, *pos, *size)
+            gc.BeginLayer(fade_anim.percent)
+            gc.DrawBitmap(to_bitmap, *pos, *size)
+            gc.EndLayer()
+            return True
+
+        bitmap = self.get_state_bitmap(self.visual_state())
+        if bitmap is None:
+            return False
+        gc.DrawBitmap(bitmap, *pos, *size)
+        return True
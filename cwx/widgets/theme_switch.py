@@ -0,0 +1,74 @@
+"""
+单次遍历的主题切换, 只重新加载解析后样式改变了的控件, 并一次性使它们的渲染缓存失效
+Single pass theme switching, only widgets whose resolved style changed are reloaded and invalidated in one batch.
+"""
+import wx
+
+from .base_widget import Widget, TopWindowCanvas
+from ..style import Style
+
+
+def restyle(widget, style: Style) -> bool:
+    """
+    为单个控件 (或轻量控件) 加载主题, 不遍历子控件. 组件样式与上次加载时的签名相同时跳过加载, 返回样式是否改变.
+    """
+    widget.gen_style = style
+    widget_style = widget.translate_style(style)
+    signature = widget_style.signature(style)
+    if signature == getattr(widget, "style_signature", None):
+        return False
+    widget.load_widget_style(widget_style)
+    widget.style_signature = signature
+    return True
+
+
+def invalidate(widget: Widget, canvases: set[TopWindowCanvas]):
+    """丢弃控件的图层、状态位图与渲染缓存"""
+    widget.layers.clear()
+    if hasattr(widget, "clear_state_bitmaps"):
+        widget.clear_state_bitmaps()
+    if widget.layer_host is not None:
+        widget.layer_host.remove_cache(widget)
+        canvases.add(widget.layer_host)
+    else:
+        widget.Refresh()
+
+
+def switch_theme(root: wx.Window, style: Style) -> list:
+    """
+    切换窗口及其所有子窗口的主题.
+    在冻结的顶层窗口中只遍历一次窗口树, 比较每个控件新旧组件样式的签名, 只有改变的控件重新加载样式;
+     之后一次性丢弃这些控件的缓存, 每个画布只重绘一次. 返回样式改变了的控件.
+
+    Switch the theme of a window and all its children, walking the tree once inside Freeze/Thaw,
+     only widgets whose resolved style changed are reloaded, caches are dropped in one batch.
+    """
+    top = root.GetTopLevelParent()
+    changed: list = []
+    canvases: set[TopWindowCanvas] = set()
+    top.Freeze()
+    try:
+        stack = [root]
+        while stack:
+            window = stack.pop()
+            if isinstance(window, Widget):
+                if restyle(window, style):
+                    changed.append(window)
+                    invalidate(window, canvases)
+                canvas: TopWindowCanvas | None = getattr(window.GetTopLevelParent(), "CWX_canvas", None)
+                if canvas is not None and (tree := canvas.light_trees.get(window.GetHandle())):
+                    lights_changed = [light for light in tree.widgets if restyle(light, style)]
+                    for light in lights_changed:
+                        light.bitmap = None
+                    if lights_changed:
+                        changed.extend(lights_changed)
+                        canvas.remove_cache(window)
+                        canvases.add(canvas)
+            stack.extend(reversed(window.GetChildren()))
+    finally:
+        top.Thaw()
+
+    for canvas in canvases:
+        if not canvas.suspended:
+            canvas.canvas_host.Refresh()
+    return changed
@@ -1,9 +1,13 @@
+import math
+from contextlib import contextmanager
+from typing import Iterator
+
 import wx
 
 from cwx.widgets.base_widget import Widget
 from .animation_widget import AnimationWrapper
+from .state_bitmap import StateBitmapCache
 from ..animation import MultiColorGradientAnimation, KeyFrameAnimation, MAKE_ANIMATION, KeyFrameCurves
-from ..dpi import SCALE, translate_size
 from ..render import CustomGraphicsContext
 from ..style import WidgetStyle, Style, Background, Foreground, Border
 from ..style.color import GradientBrush
@@ -40,7 +44,7 @@ class ToggleSwitchStyle(WidgetStyle):
 Style.register_style_cls(ToggleSwitchStyle)
 
 
-class ToggleSwitch(Widget, AnimationWrapper):
+class ToggleSwitch(Widget, AnimationWrapper, StateBitmapCache):
     class OwnMultiColorAnimation(MultiColorGradientAnimation):
         start_fix = "off"
 
@@ -53,12 +57,13 @@ class ToggleSwitch(Widget, AnimationWrapper):
     bg_anim: OwnMultiColorAnimation
     sym_anim: KeyFrameAnimation
 
-    LABEL_PAD = 8 * SCALE
+    LABEL_PAD = 8  # 开关与文字的间距, 未经缩放
 
     def __init__(self, parent: wx.Window, label: str = "", style: int = TS_OFF,
                  widget_style: WidgetStyle | None = None):
         super().__init__(parent, widget_style=widget_style)
         AnimationWrapper.__init__(self)
+        StateBitmapCache.__init__(self)
         self.is_on: bool = bool(style & TS_ON)
 
         self.init_animation()
@@ -68,7 +73,7 @@ class ToggleSwitch(Widget, AnimationWrapper):
         self.update_bg_fix = lambda: setattr(self.bg_anim, "start_fix", "on" if self.is_on else "off")
         self.crt_bg = wx.Colour(self.style.bg.normal)
         self.crt_border = wx.Colour(self.style.border.normal)
-        self.sym_pos = translate_size((30, 10)) if self.is_on else translate_size((10, 30))
+        self.sym_pos = self.scale_context.translate_size((30, 10) if self.is_on else (10, 30))
         self.text_extent = (1.0, 1.0, 1.0, 1.0)
         self.SetLabel(label)
 
@@ -100,6 +105,7 @@ class ToggleSwitch(Widget, AnimationWrapper):
     def on_mouse_events(self, event: wx.MouseEvent):
         event.Skip()
         self.update_bg_fix()
+        old_state = self.bg_anim.current_name
         if event.Entering():
             if event.LeftIsDown():
                 self.bg_anim.set_target("pressed")
@@ -114,6 +120,7 @@ class ToggleSwitch(Widget, AnimationWrapper):
             self.bg_anim.set_target("hover")
         else:
             return
+        self.note_state_change(old_state, self.bg_anim)
         self.play_animation("bg")
         self.Refresh()
 
@@ -127,7 +134,7 @@ class ToggleSwitch(Widget, AnimationWrapper):
             self.sym_anim.set_invent(False)
             if self.sym_anim.percent_offset != 0:
                 self.sym_anim.percent_offset = 1 - self.sym_anim.percent_offset
-            self.sym_pos = translate_size((10, 30)) if self.is_on else translate_size((30, 10))
+            self.sym_pos = self.scale_context.translate_size((10, 30) if self.is_on else (30, 10))
         self.bg_anim.set_target("")
         self.play_animation("sym")
         self.play_animation("bg")
@@ -150,44 +157,92 @@ class ToggleSwitch(Widget, AnimationWrapper):
             self.init_animation()
 
     def animation_callback(self):
-        self.Refresh()
+        if self.layers and self.bg_anim not in self.in_playing:
+            self.refresh_layers()  # 只有开关圆点在移动, 不需要重绘控件
+        else:
+            self.Refresh()
+
+    def visual_state(self) -> str:
+        return self.bg_anim.current_name
+
+    def render_states(self) -> list[str]:
+        suffixes = ("_disable",) if not self.IsEnabled() else ("", "_hover", "_pressed")
+        return [prefix + suffix for prefix in ("off", "on") for suffix in suffixes]
+
+    def fade_animations(self):
+        return self.bg_anim,
+
+    @contextmanager
+    def apply_visual_state(self, state: str) -> Iterator[None]:
+        saved = self.crt_bg, self.is_on, self.sym_pos
+        self.crt_bg = self.bg_anim[state]
+        self.is_on = state.startswith("on")
+        end_x = self.scale_context.translate_size((10, 30) if self.is_on else (30, 10))[1]  # 开关动画结束时的位置
+        self.sym_pos = (end_x, end_x)
+        try:
+            yield
+        finally:
+            self.crt_bg, self.is_on, self.sym_pos = saved
 
     def draw_content(self, gc: CustomGraphicsContext):
         self.draw_switch(gc)  # 绘制背景
         with gc.State:
-            gc.Translate((40 * SCALE + self.LABEL_PAD), 0)
+            gc.Translate((40 + self.LABEL_PAD) * self.scale, 0)
             self.draw_label_content(gc)  # 绘制内容
 
     def draw_switch(self, gc: CustomGraphicsContext):
         """绘制开关及其背景"""
         w, h = self.GetTupClientSize()
         with gc.State:
-            gc.Translate(4 * SCALE, int(h / 2 - 10 * SCALE))
+            gc.Translate(4 * self.scale, int(h / 2 - 10 * self.scale))
             # 绘制背景
-            gc.SetBrush(gc.CreateBrush(wx.Brush(self.crt_bg)))
-            if self.is_on:
-                gc.SetPen(gc.CreatePen(wx.GraphicsPenInfo(self.crt_bg, width=0)))
-            else:
-                gc.SetPen(gc.CreatePen(wx.GraphicsPenInfo(self.crt_border, width=round(SCALE))))
-            gc.DrawInnerRoundedRect(0, 0, 40 * SCALE, 20 * SCALE, self.style.box_radius * SCALE,
-                                    self.style.border_width * SCALE)
+            stroke, pen_width = (self.crt_bg, 0) if self.is_on else (self.crt_border, round(self.scale))
+            gc.DrawChrome(0, 0, 40 * self.scale, 20 * self.scale, self.style.box_radius * self.scale,
+                          self.style.border_width * self.scale, self.crt_bg, stroke, pen_width=pen_width,
+                          cached=self.bg_anim not in self.in_playing)
+
+            # 绘制开关, 提升为图层时由画布合成
+            if "knob" not in self.layers:
+                cx = (self.sym_anim.value * (self.sym_pos[1] - self.sym_pos[0])) + self.sym_pos[0]
+                self.draw_knob(gc, cx, 10 * self.scale - 0.5)
+
+    def draw_knob(self, gc: CustomGraphicsContext, cx: float, cy: float):
+        """绘制开关圆点, 渐变按圆点自身的范围创建, 直接绘制与提升为图层时画面相同"""
+        radius = self.style.sym_radius * self.scale
+        diameter = radius * 2
+        sym = self.style.active_sym if self.is_on else self.style.sym
+        with gc.State:
+            gc.Translate(cx - radius, cy - radius)
+            gc.SetBrush(sym.create_brush(gc, (diameter, diameter)))
+            gc.DrawEllipse(0, 0, diameter, diameter)
+
+    def update_layers(self):
+        # 开关圆点作为图层, 移动时只更新图层位置
+        radius = self.style.sym_radius * self.scale
+        side = math.ceil(radius * 2) + 2
+        layer = self.promote_layer("knob", (side, side), lambda gc: self.draw_knob(gc, side / 2, side / 2),
+                                   key=(self.is_on, id(self.style), self.scale))
+        if layer is None:
+            return
+        h = self.GetTupClientSize()[1]
+        cx = (self.sym_anim.value * (self.sym_pos[1] - self.sym_pos[0])) + self.sym_pos[0]
+        layer.x = 4 * self.scale + cx
+        layer.y = int(h / 2 - 10 * self.scale) + 10 * self.scale - 0.5
 
-            # 绘制开关
-            if self.is_on:
-                gc.SetBrush(self.style.active_sym.create_brush(gc, (w, h)))
-            else:
-                gc.SetBrush(self.style.sym.create_brush(gc, (w, h)))
-            cx = (self.sym_anim.value * (self.sym_pos[1] - self.sym_pos[0])) + self.sym_pos[0]
-            cy = 10 * SCALE
-            radius = self.style.sym_radius * SCALE
-            gc.DrawEllipse(cx - radius, cy - radius - 0.5, radius * 2, radius * 2)
+    def on_scale_changed(self, old_scale: float, new_scale: float):
+        # 开关圆点的起止位置以像素记录
+        self.sym_pos = tuple(round(pos / old_scale * new_scale) for pos in self.sym_pos)
+        super().on_scale_changed(old_scale, new_scale)
+
+    def remeasure(self):
+        self.SetLabel(self.GetLabel())
 
     def SetLabel(self, label: str):
         super().SetLabel(label)
         gc = CustomGraphicsContext(wx.GraphicsContext.Create(self))
         gc.SetFont(self.GetFont(), self.style.fg)
         self.refresh_extent(gc)
-        size = (int((40 + self.LABEL_PAD) * SCALE + self.text_extent[0]), int(max(30 * SCALE, self.text_extent[1])))
+        size = (int((40 + self.LABEL_PAD) * self.scale + self.text_extent[0]), int(max(30 * self.scale, self.text_extent[1])))
         self.RawSetMinSize(size)
         self.RawCacheBestSize(size)
         if self.init_wnd:
@@ -0,0 +1,441 @@
+"""
+树视图, 子节点在第一次展开时通过提供函数按需获取, 只有可见的节点保存在扁平的行列表中
+Virtualised tree view, children are fetched lazily on expansion, only visible nodes are kept in a flat row list.
+"""
+import math
+import threading
+from typing import Callable, Iterable, Iterator
+
+import wx
+
+from .virtual_list import VirtualListBox, RowRenderer, ListBoxStyle
+from ..animation import EZKeyFrameAnimation, KeyFrameCurves
+from ..event import SimpleCommandEvent
+from ..render import CustomGraphicsContext
+from ..style import Style
+
+cwxEVT_TREE_ITEM_EXPANDED = wx.NewEventType()
+EVT_TREE_ITEM_EXPANDED = wx.PyEventBinder(cwxEVT_TREE_ITEM_EXPANDED, 1)
+cwxEVT_TREE_ITEM_COLLAPSED = wx.NewEventType()
+EVT_TREE_ITEM_COLLAPSED = wx.PyEventBinder(cwxEVT_TREE_ITEM_COLLAPSED, 1)
+
+
+class TreeEvent(SimpleCommandEvent):
+    def __init__(self, window: wx.Window, node: 'TreeNode'):
+        super().__init__(window)
+        self.node = node
+
+    def GetItem(self) -> 'TreeNode':
+        return self.node
+
+
+class TreeExpandedEvent(TreeEvent):
+    eventType = cwxEVT_TREE_ITEM_EXPANDED
+
+
+class TreeCollapsedEvent(TreeEvent):
+    eventType = cwxEVT_TREE_ITEM_COLLAPSED
+
+
+class TreeViewStyle(ListBoxStyle):
+    @classmethod
+    def load(cls, style: Style) -> 'TreeViewStyle':
+        widget_style = super().load(style)
+        widget_style.indent = 20  # 每一层的缩进, 同时也是展开箭头的点击区域宽度
+        widget_style.chevron = style.colors.text.secondary
+        widget_style.chevron_size = 8
+        widget_style.placeholder_fg = style.colors.text.tertiary
+        return widget_style
+
+
+Style.register_style_cls(TreeViewStyle)
+
+
+class TreeNode:
+    """
+    树节点, 子节点在第一次展开时获取.
+    children为None表示尚未获取, 异步获取时 `pending` 为显示在子节点位置的占位行.
+    `row_hint` 为节点最近一次所在的行, 之前的行被插入或删除后可能过期, 使用前需要验证.
+    """
+    __slots__ = ("data", "parent", "depth", "children", "expanded", "expandable", "pending", "load_error",
+                 "placeholder", "row_hint")
+
+    def __init__(self, data: object, parent: 'TreeNode | None' = None, expandable: bool = True,
+                 placeholder: bool = False):
+        self.data = data
+        self.parent = parent
+        self.depth: int = 0 if parent is None else parent.depth + 1
+        self.children: list[TreeNode] | None = None
+        self.expanded = False
+        self.expandable = expandable and not placeholder  # 是否显示展开箭头, 获取到空的子节点后变为False
+        self.pending: TreeNode | None = None
+        self.load_error: BaseException | None = None  # 获取子节点时抛出的异常
+        self.placeholder = placeholder
+        self.row_hint: int = wx.NOT_FOUND
+
+    @property
+    def loading(self) -> bool:
+        return self.pending is not None
+
+    def __repr__(self):
+        return f"TreeNode({self.data!r}, depth={self.depth})"
+
+
+class TreeRowRenderer(RowRenderer):
+    """树视图的行渲染器, 按节点深度缩进, 在文字前绘制展开箭头"""
+    owner: 'TreeView'
+    data: TreeNode
+
+    def get_text(self) -> str:
+        node = self.data
+        if node is None:
+            return ""
+        if node.placeholder:
+            return self.owner.loading_label
+        return self.owner.label_provider(node.data)
+
+    def draw(self, gc: CustomGraphicsContext, rect: tuple[int, int, int, int], hovered: bool, selected: bool):
+        opacity = self.owner.row_opacity(self.index)
+        if opacity <= 0:
+            return
+        if opacity < 1:
+            gc.BeginLayer(opacity)
+        node = self.data
+        style = self.owner.style
+        scale = gc.scale
+        self.draw_background(gc, rect, hovered and not node.placeholder, selected)
+        indent_x = rect[0] + (style.padding + node.depth * style.indent) * scale
+        if node.expandable:
+            self.draw_chevron(gc, indent_x + style.indent * scale / 2, rect[1] + rect[3] / 2,
+                              self.owner.chevron_angle(node))
+        color = style.placeholder_fg if node.placeholder else None
+        self.draw_text(gc, rect, indent_x + style.indent * scale, color)
+        if opacity < 1:
+            gc.EndLayer()
+
+    def draw_chevron(self, gc: CustomGraphicsContext, cx: float, cy: float, angle: float):
+        """绘制展开箭头, 角度为0时指向右, 90时指向下"""
+        style = self.owner.style
+        half = style.chevron_size * gc.scale / 2
+        with gc.State:
+            gc.Translate(cx, cy)
+            gc.Rotate(math.radians(angle))
+            gc.SetPen(gc.CreatePen(wx.GraphicsPenInfo(style.chevron, max(1.0, gc.scale))))
+            path = gc.CreatePath()
+            path.MoveToPoint(-half / 2, -half)
+            path.AddLineToPoint(half / 2, 0)
+            path.AddLineToPoint(-half / 2, half)
+            gc.StrokePath(path)
+
+
+class TreeView(VirtualListBox):
+    """
+    虚拟树视图. 可见的节点按显示顺序保存在扁平的行列表 `rows` 中, 展开或折叠时只插入或删除该节点的可见子孙,
+     不重新遍历整棵树. 子节点通过 `children_provider(节点数据)` 在第一次展开时获取, 可以在工作线程中获取,
+     获取完成前显示一个占位行.
+
+    Virtualised tree view. Visible nodes are kept in display order in a flat row list, expanding or collapsing
+     only splices the node's visible descendants instead of rebuilding the list from the roots.
+    """
+    style: TreeViewStyle
+    expand_anim: EZKeyFrameAnimation
+
+    def __init__(self, parent: wx.Window, children_provider: Callable[[object], Iterable[object]],
+                 roots: Iterable[object] = (), label_provider: Callable[[object], str] = str,
+                 has_children: Callable[[object], bool] | None = None, async_load: bool = False,
+                 widget_style: TreeViewStyle = None):
+        """
+        :param children_provider: 根据节点数据返回子节点数据的函数
+        :param roots: 根节点的数据
+        :param label_provider: 根据节点数据返回显示文字的函数
+        :param has_children: 判断节点是否可能有子节点的函数, 用于在获取前隐藏叶节点的展开箭头; 默认都显示
+        :param async_load: 在工作线程中获取子节点, 此时children_provider不能操作界面
+        """
+        self.rows: list[TreeNode] = []
+        super().__init__(parent, renderer_cls=TreeRowRenderer, widget_style=widget_style)
+        self.data_source = lambda index: self.rows[index]
+        self.children_provider = children_provider
+        self.label_provider = label_provider
+        self.has_children = has_children
+        self.async_load = async_load
+        self.loading_label = "Loading..."
+        self.roots: list[TreeNode] = []
+
+        # 展开动画: 箭头旋转, 新插入的行淡入
+        self.expand_anim = self.reg_animation(
+            "expand", EZKeyFrameAnimation(0.15, KeyFrameCurves.QUADRATIC_EASE, 0, 1))
+        self.anim_node: TreeNode | None = None
+        self.anim_row: int = wx.NOT_FOUND  # 动画节点所在的行, 行号改变时动画结束, 因此保持有效
+        self.anim_expanding = True
+        self.anim_progress: float = 1
+        self.fade_rows: tuple[int, int] | None = None  # 淡入的行 [start, end)
+
+        self.SetRoots(roots)
+
+    @staticmethod
+    def translate_style(style: Style):
+        return style.as_type(TreeViewStyle)
+
+    # 节点
+    # Nodes.
+    def make_node(self, data: object, parent: TreeNode | None) -> TreeNode:
+        expandable = True if self.has_children is None else bool(self.has_children(data))
+        return TreeNode(data, parent, expandable)
+
+    def SetRoots(self, roots: Iterable[object]):
+        """替换所有根节点, 正在进行的异步获取的结果会被丢弃"""
+        self.stop_expand_animation()
+        self.roots = [self.make_node(data, None) for data in roots]
+        self.rows[:] = self.roots
+        for row, node in enumerate(self.roots):
+            node.row_hint = row
+        self.selection = wx.NOT_FOUND
+        self.SetItemCount(len(self.rows))
+
+    def GetRoots(self) -> list[TreeNode]:
+        return self.roots
+
+    def GetSelectedNode(self) -> TreeNode | None:
+        return self.rows[self.selection] if self.selection != wx.NOT_FOUND else None
+
+    def row_of(self, node: TreeNode) -> int:
+        """节点所在的行, 节点不可见时返回NOT_FOUND. 先验证节点记录的行, 过期时才查找整个行列表"""
+        hint = node.row_hint
+        if 0 <= hint < len(self.rows) and self.rows[hint] is node:
+            return hint
+        ancestor = node.parent
+        while ancestor is not None:  # 有祖先被折叠时节点不可见, 无需查找
+            if not ancestor.expanded:
+                return wx.NOT_FOUND
+            ancestor = ancestor.parent
+        try:
+            node.row_hint = self.rows.index(node)
+        except ValueError:
+            node.row_hint = wx.NOT_FOUND
+        return node.row_hint
+
+    @staticmethod
+    def visible_subtree(node: TreeNode) -> Iterator[TreeNode]:
+        """按显示顺序遍历节点展开后可见的子孙, 只访问被展开的分支"""
+        if node.children is None:
+            if node.pending is not None:
+                yield node.pending
+            return
+        stack = list(reversed(node.children))
+        while stack:
+            child = stack.pop()
+            yield child
+            if child.expanded:
+                if child.children is not None:
+                    stack.extend(reversed(child.children))
+                elif child.pending is not None:
+                    yield child.pending
+
+    def Expand(self, node: TreeNode):
+        """展开节点. 节点不可见时只记录展开状态, 祖先展开时一起显示"""
+        row = self.row_of(node)
+        if row != wx.NOT_FOUND:
+            self.expand_row(row)
+        elif not node.expanded and node.expandable:
+            node.expanded = True
+            if node.children is None:
+                self.load_children(node)
+
+    def Collapse(self, node: TreeNode):
+        row = self.row_of(node)
+        if row != wx.NOT_FOUND:
+            self.collapse_row(row)
+        else:
+            node.expanded = False
+
+    def Toggle(self, node: TreeNode):
+        if node.expanded:
+            self.Collapse(node)
+        else:
+            self.Expand(node)
+
+    def expand_row(self, row: int):
+        node = self.rows[row]
+        if node.expanded or not node.expandable:
+            return
+        node.expanded = True
+        if node.children is None:
+            self.load_children(node)
+        if node.children is not None and not node.children:  # 同步获取到空的子节点
+            node.expanded = node.expandable = False
+            self.refresh_row(row)
+            return
+        inserted = list(self.visible_subtree(node))
+        self.insert_rows(row + 1, inserted)
+        self.start_expand_animation(node, row, True, (row + 1, row + 1 + len(inserted)))
+        self.ProcessEvent(TreeExpandedEvent(self, node))
+
+    def collapse_row(self, row: int):
+        node = self.rows[row]
+        if not node.expanded:
+            return
+        node.expanded = False
+        # 可见的子孙紧跟在节点之后, 且深度都大于节点
+        end, depth, rows = row + 1, node.depth, self.rows
+        while end < len(rows) and rows[end].depth > depth:
+            end += 1
+        self.remove_rows(row + 1, end)
+        self.start_expand_animation(node, row, False, None)
+        self.ProcessEvent(TreeCollapsedEvent(self, node))
+
+    def toggle_row(self, row: int):
+        if self.rows[row].expanded:
+            self.collapse_row(row)
+        else:
+            self.expand_row(row)
+
+    # 扁平的行列表
+    # Flat row list.
+    def insert_rows(self, start: int, nodes: list[TreeNode]):
+        """在start处插入行, 只移动之后的行, 不重新遍历树"""
+        self.stop_expand_animation()
+        self.rows[start:start] = nodes
+        for row, node in enumerate(nodes, start):
+            node.row_hint = row
+        if self.selection >= start:
+            self.selection += len(nodes)
+        self.rows_changed(start, len(self.rows))
+
+    def remove_rows(self, start: int, end: int):
+        """删除行 [start, end), 选中的行被删除时选中其上一行 (被折叠的节点)"""
+        self.stop_expand_animation()
+        del self.rows[start:end]
+        if start <= self.selection < end:
+            self.selection = start - 1
+        elif self.selection >= end:
+            self.selection -= end - start
+        self.rows_changed(start, len(self.rows))
+
+    # 子节点获取
+    # Children loading.
+    def load_children(self, node: TreeNode):
+        """获取节点的子节点, 异步获取时先设置占位行"""
+        if not self.async_load:
+            node.children = [self.make_node(data, node) for data in self.children_provider(node.data)]
+            return
+        if node.pending is not None:  # 已经在获取中
+            return
+        placeholder = node.pending = TreeNode(None, node, placeholder=True)
+        provider = self.children_provider
+
+        def worker():
+            try:
+                children, error = list(provider(node.data)), None
+            except Exception as e:
+                children, error = [], e
+            wx.CallAfter(self.on_children_loaded, node, placeholder, children, error)
+
+        threading.Thread(target=worker, name="cwx-tree-loader", daemon=True).start()
+
+    def on_children_loaded(self, node: TreeNode, placeholder: TreeNode, children: list[object],
+                           error: BaseException | None):
+        """在主线程中接收异步获取的子节点, 用子节点替换占位行"""
+        if not self or node.pending is not placeholder:  # 控件已销毁, 或树已被替换
+            return
+        node.pending = None
+        node.load_error = error
+        node.children = [self.make_node(data, node) for data in children]
+        if not node.children:
+            node.expanded = node.expandable = False
+        row = self.row_of(placeholder)
+        if row == wx.NOT_FOUND:  # 获取期间节点被折叠
+            return
+        self.stop_expand_animation()
+        inserted = list(self.visible_subtree(node)) if node.expanded else []
+        self.rows[row:row + 1] = inserted
+        for index, child in enumerate(inserted, row):
+            child.row_hint = index
+        if self.selection == row:
+            self.selection = row - 1
+        elif self.selection > row:
+            self.selection += len(inserted) - 1
+        self.rows_changed(row - 1, len(self.rows))  # 包括节点自身, 箭头可能消失
+        if inserted:
+            self.start_expand_animation(None, wx.NOT_FOUND, True, (row, row + len(inserted)))
+
+    # 展开动画
+    # Expand animation.
+    def start_expand_animation(self, node: TreeNode | None, row: int, expanding: bool,
+                               fade_rows: tuple[int, int] | None):
+        """
+        :param row: 节点所在的行, 每帧重绘该行, 无需查找节点
+        """
+        if not self.IsShownOnScreen():
+            return
+        self.anim_node = node
+        self.anim_row = row
+        self.anim_expanding = expanding
+        self.anim_progress = 0
+        self.fade_rows = fade_rows
+        self.play_animation("expand")
+
+    def stop_expand_animation(self):
+        """行号即将改变, 结束正在进行的展开动画"""
+        if self.anim_node is None and self.fade_rows is None:
+            return
+        self.anim_node = self.fade_rows = None
+        self.anim_progress = 1
+        if self.expand_anim in self.in_playing:
+            self.stop_animation(self.expand_anim)
+
+    def chevron_angle(self, node: TreeNode) -> float:
+        """展开箭头的旋转角度, 展开动画中随进度旋转"""
+        if node is self.anim_node:
+            progress = self.anim_progress if self.anim_expanding else 1 - self.anim_progress
+            return 90 * progress
+        return 90 if node.expanded else 0
+
+    def row_opacity(self, index: int) -> float:
+        if self.fade_rows is not None and self.fade_rows[0] <= index < self.fade_rows[1]:
+            return self.anim_progress
+        return 1.0
+
+    def animation_callback(self):
+        if self.anim_node is not None or self.fade_rows is not None:
+            self.anim_progress = self.expand_anim.value
+            if self.anim_node is not None:
+                self.refresh_row(self.anim_row)
+            if self.fade_rows is not None:
+                first, last = self.visible_range()
+                self.invalidate_rows(max(first, self.fade_rows[0]), min(last, self.fade_rows[1]))
+            if self.anim_progress >= 1:
+                self.anim_node = self.fade_rows = None
+        super().animation_callback()
+
+    # 交互
+    # Interaction.
+    def on_row_left_down(self, index: int, x: int):
+        node = self.rows[index]
+        style = self.style
+        indent_x = (style.padding + node.depth * style.indent) * self.scale
+        if node.expandable and indent_x <= x < indent_x + style.indent * self.scale:
+            self.toggle_row(index)
+            return
+        super().on_row_left_down(index, x)
+
+    def on_row_dclick(self, index: int, x: int):
+        if self.rows[index].expandable:
+            self.toggle_row(index)
+        super().on_row_dclick(index, x)
+
+    def on_key_down(self, event: wx.KeyEvent):
+        key = event.GetKeyCode()
+        row = self.selection
+        if row == wx.NOT_FOUND or key not in (wx.WXK_LEFT, wx.WXK_RIGHT):
+            super().on_key_down(event)
+            return
+        node = self.rows[row]
+        if key == wx.WXK_LEFT:
+            if node.expanded:
+                self.collapse_row(row)
+            elif node.parent is not None:
+                self.select(self.row_of(node.parent))
+        elif not node.expanded:
+            self.expand_row(row)
+        elif row + 1 < self.item_count and self.rows[row + 1].parent is node:
+            self.select(row + 1)
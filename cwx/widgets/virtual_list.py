@@ -0,0 +1,583 @@
+"""
+虚拟列表, 只为可见的行绘制与保留数据, 适用于十万行以上的数据
+Virtualised list box, only visible rows are drawn and kept, suitable for 100k+ rows.
+"""
+from html import escape
+from math import ceil
+from typing import Callable
+
+import wx
+
+from .animation_widget import AnimationWrapper
+from .base_widget import Widget
+from ..animation import EZKeyFrameAnimation, KeyFrameCurves
+from ..event import SimpleCommandEvent
+from ..lib.viewport_cache import ViewportCache
+from ..render import CustomGraphicsContext
+from ..render.text_render import TextBitmap, TextRender
+from ..style import Style, WidgetStyle, Foreground, Background, TRANSPARENT_COLOR
+
+cwxEVT_LISTBOX = wx.NewEventType()
+EVT_LISTBOX = wx.PyEventBinder(cwxEVT_LISTBOX, 1)
+cwxEVT_LISTBOX_DCLICK = wx.NewEventType()
+EVT_LISTBOX_DCLICK = wx.PyEventBinder(cwxEVT_LISTBOX_DCLICK, 1)
+
+
+class ListBoxEvent(SimpleCommandEvent):
+    eventType = cwxEVT_LISTBOX
+
+    def __init__(self, window: wx.Window, selection: int):
+        super().__init__(window)
+        self.selection = selection
+
+    def GetSelection(self) -> int:
+        return self.selection
+
+
+class ListBoxDClickEvent(ListBoxEvent):
+    eventType = cwxEVT_LISTBOX_DCLICK
+
+
+class ListBoxStyle(WidgetStyle):
+    fg: Foreground
+    bg: Background
+
+    def __init__(self, fg: Foreground, bg: Background, row_bg: Background, selected_bg: Background,
+                 indicator: wx.Colour, scrollbar: wx.Colour,
+                 row_height: float, padding: float, corner_radius: float, indicator_width: float):
+        """
+        :param fg: 行文字
+        :param bg: 列表背景
+        :param row_bg: 行背景 (普通/悬停/按下)
+        :param selected_bg: 选中行的背景 (普通/悬停)
+        :param indicator: 选中行左侧指示条的颜色
+        :param scrollbar: 滚动条的颜色
+        :param row_height: 行高
+        :param padding: 行内容的水平边距
+        :param corner_radius: 行背景圆角半径
+        :param indicator_width: 指示条宽度
+        """
+        super().__init__(fg, bg)
+        self.row_bg = row_bg
+        self.selected_bg = selected_bg
+        self.indicator = indicator
+        self.scrollbar = scrollbar
+        self.row_height = row_height
+        self.padding = padding
+        self.corner_radius = corner_radius
+        self.indicator_width = indicator_width
+
+    @classmethod
+    def load(cls, style: Style) -> 'ListBoxStyle':
+        colors = style.colors
+        return cls(
+            fg=Foreground.from_colors(colors.text),
+            bg=Background(TRANSPARENT_COLOR),
+            row_bg=Background(TRANSPARENT_COLOR, colors.control_fill.secondary, colors.control_fill.tertiary),
+            selected_bg=Background(colors.control_fill.default, colors.control_fill.secondary),
+            indicator=colors.accent_fill.default,
+            scrollbar=colors.neutral_strong.default,
+            row_height=32,
+            padding=12,
+            corner_radius=4,
+            indicator_width=3,
+        )
+
+
+Style.register_style_cls(ListBoxStyle)
+
+
+class RowRenderer:
+    """
+    行渲染器, 负责绘制一行. 列表只为可见的行保留渲染器, 滚动时离开视口的渲染器交给新露出的行重新使用.
+    绑定的数据不变时保留上一次的文字位图, 不再经过文字渲染缓存的查找.
+    自定义行的绘制时继承该类, 并通过 `renderer_cls` 参数传给列表.
+
+    Row renderer, the list keeps renderers only for visible rows, and hands the ones that scrolled out
+     to newly exposed rows. The text raster is kept while the bound data doesn't change.
+    """
+
+    def __init__(self, owner: 'VirtualListBox'):
+        self.owner = owner
+        self.index: int = wx.NOT_FOUND
+        self.data: object = None
+        self.text_bitmap: TextBitmap | None = None
+        self.text_key: tuple | None = None  # 文字位图对应的 (文字, 颜色, 缩放)
+
+    def bind(self, index: int, data: object):
+        """绑定到一行, 数据改变时丢弃文字位图"""
+        self.index = index
+        if data != self.data:
+            self.data = data
+            self.text_bitmap = None
+
+    def release(self):
+        """离开视口时调用, 保留文字位图, 重新绑定到相同数据时仍可使用"""
+        self.index = wx.NOT_FOUND
+
+    def get_text(self) -> str:
+        """行显示的文字"""
+        return "" if self.data is None else str(self.data)
+
+    def get_text_bitmap(self, gc: CustomGraphicsContext, text: str, color: wx.Colour) -> TextBitmap:
+        key = (text, color.GetRGBA(), gc.scale)
+        if self.text_bitmap is None or self.text_key != key:
+            # 文字以Pango标记渲染, 需要转义; 行位图由行渲染器自己保存, 不再进入全局文字缓存
+            self.text_bitmap = TextRender.render(gc, gc.ConvertText(escape(text, quote=False)), color, gc.scale,
+                                                 cache=False)
+            self.text_key = key
+        return self.text_bitmap
+
+    def draw(self, gc: CustomGraphicsContext, rect: tuple[int, int, int, int], hovered: bool, selected: bool):
+        """
+        绘制行, 坐标为像素
+        :param rect: 行的矩形 (x, y, 宽, 高)
+        """
+        self.draw_background(gc, rect, hovered, selected)
+        self.draw_text(gc, rect, rect[0] + self.owner.style.padding * gc.scale)
+
+    def draw_background(self, gc: CustomGraphicsContext, rect: tuple[int, int, int, int],
+                        hovered: bool, selected: bool):
+        """绘制行背景与选中指示条"""
+        style = self.owner.style
+        scale = gc.scale
+        x, y, w, h = rect
+        margin = round(2 * scale)  # 行背景之间留出间隔
+        if selected:
+            fill = style.selected_bg.hover if hovered else style.selected_bg.normal
+        else:
+            fill = style.row_bg.hover if hovered else style.row_bg.normal
+        if fill.Alpha():
+            gc.DrawChrome(x + margin, y + margin, w - margin * 2, h - margin * 2,
+                          style.corner_radius * scale, 0, fill, None)
+        if selected:
+            bar_w = style.indicator_width * scale
+            bar_h = h / 2
+            gc.SetPen(gc.TRANSPARENT_PEN)
+            gc.SetBrush(gc.CreateBrush(wx.Brush(style.indicator)))
+            gc.DrawRoundedRectangle(x + margin, y + (h - bar_h) / 2, bar_w, bar_h, bar_w / 2)
+
+    def draw_text(self, gc: CustomGraphicsContext, rect: tuple[int, int, int, int], text_x: float,
+                  color: wx.Colour | None = None):
+        """在行中垂直居中绘制文字, 文字左侧位于text_x"""
+        text = self.get_text()
+        if not text:
+            return
+        if color is None:
+            style = self.owner.style
+            color = style.fg if self.owner.IsEnabled() else style.fg.disabled
+        bitmap = self.get_text_bitmap(gc, text, color)
+        t_w, t_h = bitmap.size
+        gc.DrawBitmap(bitmap.bitmap, int(text_x), int(rect[1] + (rect[3] - t_h) / 2), t_w, t_h)
+
+
+class VirtualListBox(Widget, AnimationWrapper):
+    """
+    虚拟列表. 行的数据通过 `data_source(行号)` 按需获取, 只绘制可见的行.
+    列表画面保存在视口缓存中, 平滑滚动时平移已有的画面, 只绘制新露出的行.
+
+    Virtualised list box. Row data is fetched on demand by `data_source(index)`, only visible rows are drawn.
+     Smooth pixel scrolling shifts the cached viewport image and only renders the newly exposed rows.
+    """
+    style: ListBoxStyle
+    scroll_anim: EZKeyFrameAnimation
+
+    SCROLLBAR_HIT_WIDTH = 12  # 滚动条可拖动区域的宽度
+    SCROLLBAR_WIDTH = 3
+    MIN_THUMB = 24  # 滚动条滑块的最小长度
+
+    def __init__(self, parent: wx.Window, item_count: int = 0, data_source: Callable[[int], object] | None = None,
+                 renderer_cls: type[RowRenderer] = RowRenderer, widget_style: ListBoxStyle = None):
+        """
+        :param item_count: 行数
+        :param data_source: 根据行号返回行数据的函数, 数据默认以str()显示
+        :param renderer_cls: 行渲染器类
+        """
+        super().__init__(parent, style=wx.WANTS_CHARS, widget_style=widget_style)
+        AnimationWrapper.__init__(self)
+        self.item_count = item_count
+        self.data_source: Callable[[int], object] = data_source if data_source is not None else lambda index: ""
+        self.renderer_cls = renderer_cls
+        self.renderers: dict[int, RowRenderer] = {}  # 行号 -> 可见行的渲染器
+        self.free_renderers: list[RowRenderer] = []  # 离开视口, 等待重新使用的渲染器
+        self.viewport = ViewportCache()
+
+        self.scroll_y: float = 0  # 滚动位置 (像素), 动画播放时逐帧改变
+        self.scroll_target: float = 0  # 滚动动画的目标位置
+        self.selection: int = wx.NOT_FOUND
+        self.hovered: int = wx.NOT_FOUND
+        self.pointer: tuple[int, int] | None = None
+        self.thumb_drag: tuple[int, float] | None = None  # 拖动滚动条时, 按下的 (鼠标y, 滚动位置)
+
+        self.scroll_anim = self.reg_animation(
+            "scroll", EZKeyFrameAnimation(0.2, KeyFrameCurves.CUBE_EASE_OUT, 0, 0))
+        self.handle_value("scroll", "scroll_y")
+
+        self.CacheBestSize((200, 240))
+        self.SetMinSize((80, 64))
+
+        self.Bind(wx.EVT_MOUSE_EVENTS, self.on_mouse_events)
+        self.Bind(wx.EVT_MOUSE_CAPTURE_LOST, self.on_capture_lost)
+        self.Bind(wx.EVT_KEY_DOWN, self.on_key_down)
+        self.Bind(wx.EVT_SIZE, self.on_size)
+
+    # 数据
+    # Data.
+    def GetItemCount(self) -> int:
+        return self.item_count
+
+    def SetItemCount(self, count: int):
+        """修改行数, 所有行的数据重新获取"""
+        self.item_count = max(0, count)
+        if self.selection >= self.item_count:
+            self.selection = wx.NOT_FOUND
+        if self.hovered >= self.item_count:
+            self.hovered = wx.NOT_FOUND
+        self.scroll_to(self.scroll_target, animate=False)
+        self.RefreshAll()
+
+    def SetDataSource(self, data_source: Callable[[int], object], item_count: int | None = None):
+        self.data_source = data_source
+        if item_count is None:
+            self.RefreshAll()
+        else:
+            self.SetItemCount(item_count)
+
+    def RefreshItem(self, index: int):
+        """行的数据改变, 只重新绘制这一行"""
+        self.RefreshItems(index, index)
+
+    def RefreshItems(self, start: int, end: int):
+        """行 [start, end] 的数据改变, 只重新绘制可见的部分"""
+        first, last = self.visible_range()
+        start, end = max(start, first), min(end, last - 1)
+        if start > end:
+            return
+        for index in range(start, end + 1):
+            if renderer := self.renderers.get(index):
+                renderer.bind(index, self.data_source(index))
+        self.invalidate_rows(start, end + 1)
+
+    def rows_changed(self, start: int, item_count: int):
+        """
+        从start开始的行被插入或删除, 行数变为item_count. 之前的行保留渲染器与画面,
+         之后的行重新绑定渲染器 (数据相同的渲染器保留文字位图) 并重新绘制.
+        选中的行号需要由调用者调整.
+        Rows were inserted or removed at start, rows before it keep their renderers and pixels.
+        """
+        old_count, self.item_count = self.item_count, max(0, item_count)
+        if self.selection >= self.item_count:
+            self.selection = wx.NOT_FOUND
+        for index in [index for index in self.renderers if index >= start]:
+            renderer = self.renderers.pop(index)
+            renderer.release()
+            self.free_renderers.append(renderer)
+        self.hovered = wx.NOT_FOUND
+        if self.pointer is not None:
+            self.hovered = self.row_at(self.pointer[1])
+        self.invalidate_rows(start, max(old_count, self.item_count))
+        if self.scroll_target > self.max_scroll:
+            self.scroll_to(self.max_scroll, animate=False)
+
+    def RefreshAll(self):
+        """所有行的数据改变, 丢弃渲染器绑定的数据与视口缓存"""
+        for renderer in self.renderers.values():
+            renderer.release()
+            renderer.data = None
+            renderer.text_bitmap = None
+        self.free_renderers.extend(self.renderers.values())
+        self.renderers.clear()
+        self.viewport.invalidate()
+        self.Refresh()
+
+    def SetFont(self, font: wx.Font):
+        super().SetFont(font)
+        self.RefreshAll()
+
+    # 选择
+    # Selection.
+    def GetSelection(self) -> int:
+        return self.selection
+
+    def SetSelection(self, index: int):
+        """选中一行, 不发出事件"""
+        if index >= self.item_count:
+            index = wx.NOT_FOUND
+        if index == self.selection:
+            return
+        self.refresh_row(self.selection)
+        self.selection = index
+        self.refresh_row(index)
+
+    def select(self, index: int):
+        """用户选中一行, 发出EVT_LISTBOX"""
+        if index == self.selection:
+            return
+        self.SetSelection(index)
+        self.EnsureVisible(index)
+        self.ProcessEvent(ListBoxEvent(self, index))
+
+    # 滚动
+    # Scrolling.
+    @property
+    def row_height(self) -> int:
+        """行高 (像素)"""
+        return max(1, round(self.style.row_height * self.scale))
+
+    @property
+    def max_scroll(self) -> int:
+        return max(0, self.item_count * self.row_height - self.GetTupClientSize()[1])
+
+    def visible_range(self) -> tuple[int, int]:
+        """视口中可见的行 [first, last)"""
+        row_h = self.row_height
+        scroll = round(self.scroll_y)
+        first = max(0, scroll // row_h)
+        last = min(self.item_count, ceil((scroll + self.GetTupClientSize()[1]) / row_h))
+        return first, max(first, last)
+
+    def row_at(self, y: float) -> int:
+        """控件坐标y处的行, 没有时返回NOT_FOUND"""
+        index = int((y + round(self.scroll_y)) // self.row_height)
+        return index if 0 <= index < self.item_count else wx.NOT_FOUND
+
+    def scroll_to(self, y: float, animate: bool = True):
+        """滚动到指定位置 (像素)"""
+        y = max(0, min(y, self.max_scroll))
+        self.scroll_target = y
+        if animate and y != self.scroll_y and self.IsShownOnScreen():
+            self.scroll_anim.set_range(self.scroll_y, y)
+            self.play_animation("scroll")
+            return
+        if self.scroll_anim in self.in_playing:
+            self.stop_animation(self.scroll_anim)
+        if y != self.scroll_y:
+            self.scroll_y = y
+            self.on_scrolled()
+
+    def scroll_by(self, delta: float, animate: bool = True):
+        self.scroll_to(self.scroll_target + delta, animate)
+
+    def EnsureVisible(self, index: int):
+        """滚动使该行完整可见"""
+        if not 0 <= index < self.item_count:
+            return
+        row_h = self.row_height
+        top, height = index * row_h, self.GetTupClientSize()[1]
+        if top < self.scroll_target:
+            self.scroll_to(top)
+        elif top + row_h > self.scroll_target + height:
+            self.scroll_to(top + row_h - height)
+
+    def animation_callback(self):
+        self.on_scrolled()
+
+    def on_scrolled(self):
+        # 鼠标不动时, 滚动也会改变其下方的行
+        if self.pointer is not None and self.thumb_drag is None:
+            self.set_hovered(self.row_at(self.pointer[1]))
+        self.Refresh()
+
+    def on_size(self, event: wx.SizeEvent):
+        event.Skip()
+        if self.scroll_target > self.max_scroll:
+            self.scroll_to(self.max_scroll, animate=False)
+
+    def on_scale_changed(self, old_scale: float, new_scale: float):
+        # 滚动位置以像素记录, 按比例换算以保持同一行在顶部
+        ratio = new_scale / old_scale
+        if self.scroll_anim in self.in_playing:
+            self.stop_animation(self.scroll_anim)
+        self.scroll_y = self.scroll_target = self.scroll_target * ratio
+        super().on_scale_changed(old_scale, new_scale)
+
+    # 渲染器
+    # Renderers.
+    def acquire_renderer(self, index: int) -> RowRenderer:
+        """获取绑定到该行的渲染器, 优先重新使用离开视口的渲染器"""
+        renderer = self.renderers.get(index)
+        if renderer is not None:
+            return renderer
+        data = self.data_source(index)
+        # 数据相同的空闲渲染器仍保留着文字位图
+        for i, free in enumerate(self.free_renderers):
+            if free.data == data:
+                renderer = self.free_renderers.pop(i)
+                break
+        else:
+            renderer = self.free_renderers.pop() if self.free_renderers else self.renderer_cls(self)
+        renderer.bind(index, data)
+        self.renderers[index] = renderer
+        return renderer
+
+    def recycle_renderers(self, first: int, last: int):
+        """回收不在 [first, last) 中的渲染器"""
+        for index in [index for index in self.renderers if not first <= index < last]:
+            renderer = self.renderers.pop(index)
+            renderer.release()
+            self.free_renderers.append(renderer)
+        # 空闲的渲染器不超过一屏的行数
+        del self.free_renderers[max(last - first, 1):]
+
+    # 绘制
+    # Drawing.
+    def invalidate_rows(self, start: int, end: int):
+        """使行 [start, end) 的画面失效, 视口外的部分会被忽略"""
+        if end <= start:
+            return
+        row_h = self.row_height
+        self.viewport.invalidate_rect((0, start * row_h, self.GetTupClientSize()[0], (end - start) * row_h))
+        self.Refresh()
+
+    def refresh_row(self, index: int):
+        if 0 <= index < self.item_count:
+            self.invalidate_rows(index, index + 1)
+
+    def set_hovered(self, index: int):
+        if index == self.hovered:
+            return
+        self.refresh_row(self.hovered)
+        self.hovered = index
+        self.refresh_row(index)
+
+    def viewport_key(self) -> tuple:
+        """影响所有行画面的参数"""
+        return self.scale, self.style, self.IsEnabled()
+
+    def draw_content(self, gc: CustomGraphicsContext):
+        w, h = self.GetTupClientSize()
+        if self.style.bg.Alpha():
+            gc.SetPen(gc.TRANSPARENT_PEN)
+            gc.SetBrush(gc.CreateBrush(wx.Brush(self.style.bg)))
+            gc.DrawRectangle(0, 0, w, h)
+        first, last = self.visible_range()
+        self.recycle_renderers(first, last)
+        bitmap = self.viewport.get_bitmap(self, (w, h), (0, round(self.scroll_y)), self.viewport_key(),
+                                          self.paint_rows)
+        if bitmap is not None:
+            gc.DrawBitmap(bitmap, 0, 0, w, h)
+        self.draw_scrollbar(gc)
+
+    def paint_rows(self, gc: CustomGraphicsContext, rect: tuple[int, int, int, int]):
+        """视口缓存的绘制函数, 在内容坐标中绘制与rect相交的行"""
+        x, y, w, h = rect
+        row_h = self.row_height
+        width = self.GetTupClientSize()[0]
+        gc.SetFont(self.GetFont(), self.style.fg)
+        for index in range(max(0, y // row_h), min(self.item_count, ceil((y + h) / row_h))):
+            renderer = self.acquire_renderer(index)
+            renderer.draw(gc, (0, index * row_h, width, row_h), index == self.hovered, index == self.selection)
+
+    def get_thumb_rect(self) -> tuple[float, float, float, float] | None:
+        """滚动条滑块的矩形, 内容不需要滚动时返回None"""
+        w, h = self.GetTupClientSize()
+        total = self.item_count * self.row_height
+        if total <= h or h <= 0:
+            return None
+        scale = self.scale
+        thumb_h = max(h * h / total, self.MIN_THUMB * scale)
+        thumb_y = self.scroll_y / (total - h) * (h - thumb_h)
+        bar_w = self.SCROLLBAR_WIDTH * scale
+        return w - bar_w - 2 * scale, thumb_y, bar_w, thumb_h
+
+    def draw_scrollbar(self, gc: CustomGraphicsContext):
+        thumb = self.get_thumb_rect()
+        if thumb is None:
+            return
+        x, y, w, h = thumb
+        gc.SetPen(gc.TRANSPARENT_PEN)
+        gc.SetBrush(gc.CreateBrush(wx.Brush(self.style.scrollbar)))
+        gc.DrawRoundedRectangle(x, y, w, h, w / 2)
+
+    # 事件
+    # Events.
+    def on_mouse_events(self, event: wx.MouseEvent):
+        event.Skip()
+        x, y = event.GetPosition()
+        if event.GetWheelRotation():
+            lines = event.GetWheelRotation() / event.GetWheelDelta() * event.GetLinesPerAction()
+            self.scroll_by(-lines * self.row_height)
+            return
+
+        if self.thumb_drag is not None:
+            if event.Dragging():
+                self.drag_thumb(y)
+            elif event.LeftUp():
+                self.thumb_drag = None
+                if self.HasCapture():
+                    self.ReleaseMouse()
+            return
+
+        if event.Leaving():
+            self.pointer = None
+            self.set_hovered(wx.NOT_FOUND)
+            return
+        self.pointer = (x, y)
+        in_scrollbar = self.get_thumb_rect() is not None and \
+            x >= self.GetTupClientSize()[0] - self.SCROLLBAR_HIT_WIDTH * self.scale
+        self.set_hovered(wx.NOT_FOUND if in_scrollbar else self.row_at(y))
+
+        if event.LeftDown():
+            self.SetFocus()
+            if in_scrollbar:
+                self.start_thumb_drag(y)
+            elif self.hovered != wx.NOT_FOUND:
+                self.on_row_left_down(self.hovered, x)
+        elif event.LeftDClick() and not in_scrollbar and self.hovered != wx.NOT_FOUND:
+            self.on_row_dclick(self.hovered, x)
+
+    def on_row_left_down(self, index: int, x: int):
+        """在行上按下鼠标左键, x为控件坐标"""
+        self.select(index)
+
+    def on_row_dclick(self, index: int, x: int):
+        self.ProcessEvent(ListBoxDClickEvent(self, index))
+
+    def start_thumb_drag(self, y: int):
+        thumb = self.get_thumb_rect()
+        if not thumb[1] <= y < thumb[1] + thumb[3]:
+            # 点击滑块外的轨道, 先让滑块中心跳到鼠标处
+            h = self.GetTupClientSize()[1]
+            self.scroll_to((y - thumb[3] / 2) / (h - thumb[3]) * self.max_scroll, animate=False)
+        self.thumb_drag = (y, self.scroll_y)
+        self.CaptureMouse()
+
+    def drag_thumb(self, y: int):
+        thumb = self.get_thumb_rect()
+        if thumb is None:
+            return
+        track = self.GetTupClientSize()[1] - thumb[3]
+        start_y, start_scroll = self.thumb_drag
+        if track > 0:
+            self.scroll_to(start_scroll + (y - start_y) / track * self.max_scroll, animate=False)
+
+    def on_capture_lost(self, _):
+        self.thumb_drag = None
+
+    def on_key_down(self, event: wx.KeyEvent):
+        if not self.item_count:
+            event.Skip()
+            return
+        page = max(1, self.GetTupClientSize()[1] // self.row_height - 1)
+        current = self.selection
+        key = event.GetKeyCode()
+        if key == wx.WXK_UP:
+            target = current - 1 if current != wx.NOT_FOUND else 0
+        elif key == wx.WXK_DOWN:
+            target = current + 1
+        elif key == wx.WXK_PAGEUP:
+            target = current - page
+        elif key == wx.WXK_PAGEDOWN:
+            target = current + page
+        elif key == wx.WXK_HOME:
+            target = 0
+        elif key == wx.WXK_END:
+            target = self.item_count - 1
+        else:
+            event.Skip()
+            return
+        self.select(max(0, min(target, self.item_count - 1)))
+
+    @staticmethod
+    def translate_style(style: Style):
+        return style.as_type(ListBoxStyle)